@@ -0,0 +1 @@
+"""Benchmarks for the DSF orchestrator (run with ``python -m benchmarks.<name>``)."""
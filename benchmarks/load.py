@@ -0,0 +1,469 @@
+"""End-to-end load benchmark: features through the API, run by synthetic agents.
+
+Submits features to the FastAPI app at a fixed rate, in-process (ASGI) or over
+localhost (uvicorn), with the agents replaced by synthetic ones of tunable latency
+and failure rate. Tasks run inline, or go through a fake-Redis or SQLite queue to
+in-process workers. Reports throughput, assignment latency (task ready -> agent
+start; NFR-1.2 asks < 500 ms), feature completion latency, submit latency and peak
+RSS. ``--save`` writes the report as a baseline; ``--compare`` checks a run against
+one and exits 1 on a regression beyond ``--tolerance``.
+
+    python -m benchmarks.load --mode sqlite --workers 4 --features 200 --rate 20
+    python -m benchmarks.load --latency lognormal:0.2,0.6 --latency review=fixed:0.5
+    python -m benchmarks.load --save baseline.json
+    python -m benchmarks.load --compare baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import resource
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Set
+
+import httpx
+
+from services.orchestrator.core.agents.base import BaseAgent
+from services.orchestrator.core.models import AgentType
+
+MODES = ("inline", "fakeredis", "sqlite")
+TRANSPORTS = ("asgi", "localhost")
+# Agent classes the orchestrator builds its pools from, by type
+_AGENT_CLASSES = {
+    AgentType.CODE: "CodeWriterAgent",
+    AgentType.TEST: "TestWriterAgent",
+    AgentType.REVIEW: "ReviewAgent",
+}
+# Report metrics compared against a baseline, and whether higher is better
+_COMPARED = {
+    "tasks_per_hour": True,
+    "assignment_ms.p50": False,
+    "assignment_ms.p99": False,
+    "completion_ms.p50": False,
+    "completion_ms.p99": False,
+    "submit_ms.p99": False,
+    "peak_rss_mb": False,
+}
+
+Sampler = Callable[[random.Random], float]
+
+
+def parse_latency(spec: str) -> Sampler:
+    """``fixed:S``, ``exp:MEAN`` or ``lognormal:MEDIAN,SIGMA`` (seconds) -> a sampler."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "exp" and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0])
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Bad latency spec {spec!r}; expected fixed:S, exp:MEAN or lognormal:MED,SIG")
+
+
+@dataclass
+class Recorder:
+    """What the synthetic agents saw, by task id (``perf_counter`` seconds)."""
+
+    started: Dict[str, float] = field(default_factory=dict)  # first attempt
+    finished: Dict[str, float] = field(default_factory=dict)  # successful attempt
+    depends_on: Dict[str, List[str]] = field(default_factory=dict)
+    runs: int = 0
+    failures: int = 0
+
+
+def synthetic_agent(
+    agent_type: AgentType, latency: Sampler, failure_rate: float, recorder: Recorder, seed: int
+) -> type:
+    rng = random.Random(seed)  # nosec B311 - synthetic load
+
+    class SyntheticAgent(BaseAgent):
+        name = f"synthetic-{agent_type.value}"
+
+        async def run(self, task, workspace=None) -> str:
+            recorder.started.setdefault(task.id, time.perf_counter())
+            recorder.depends_on[task.id] = list(task.depends_on)
+            recorder.runs += 1
+            await asyncio.sleep(latency(rng))
+            if rng.random() < failure_rate:
+                recorder.failures += 1
+                raise RuntimeError("synthetic agent failure")
+            recorder.finished[task.id] = time.perf_counter()
+            return f"# {task.title}\n"
+
+    return SyntheticAgent
+
+
+class DetachedASGITransport(httpx.AsyncBaseTransport):
+    """In-process ASGI transport that returns once the response is sent.
+
+    ``httpx.ASGITransport`` waits for the whole app call, background tasks included,
+    so every POST would last as long as its feature. A real server answers first and
+    runs the background work afterwards; so does this.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._calls: Set[asyncio.Task] = set()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?", 1)[0],
+            "query_string": request.url.query,
+            "root_path": "",
+            "headers": [(k.lower(), v) for k, v in request.headers.raw],
+            "server": (request.url.host, request.url.port or 80),
+            "client": ("127.0.0.1", 0),
+        }
+        sent = asyncio.get_running_loop().create_future()
+        status, headers, chunks = 500, [], []
+        delivered = False
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.Future()  # no disconnect until the call is cancelled
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status, headers = message["status"], message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body") and not sent.done():
+                    sent.set_result(None)
+
+        call = asyncio.create_task(self.app(scope, receive, send))
+        self._calls.add(call)
+        call.add_done_callback(self._calls.discard)
+        await asyncio.wait({call, sent}, return_when=asyncio.FIRST_COMPLETED)
+        if not sent.done():
+            call.result()  # the app failed before answering
+        return httpx.Response(status, headers=headers, content=b"".join(chunks))
+
+    async def aclose(self) -> None:
+        for call in list(self._calls):
+            call.cancel()
+        await asyncio.gather(*self._calls, return_exceptions=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def api_client(app, transport: str) -> AsyncIterator[httpx.AsyncClient]:
+    """A client for ``app`` with its lifespan (orchestrator start, claim loop) running."""
+    if transport == "asgi":
+        asgi = DetachedASGITransport(app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=asgi, base_url="http://dsf") as client:
+                try:
+                    yield client
+                finally:
+                    await asgi.aclose()
+        return
+    import uvicorn
+
+    port = _free_port()
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.01)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            yield client
+    finally:
+        server.should_exit = True
+        await serving
+
+
+@contextlib.contextmanager
+def environment(overrides: Dict[str, str]) -> Iterator[None]:
+    saved = {k: os.environ.get(k) for k in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+@contextlib.contextmanager
+def patched(target, name: str, value) -> Iterator[None]:
+    saved = getattr(target, name)
+    setattr(target, name, value)
+    try:
+        yield
+    finally:
+        setattr(target, name, saved)
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p99": 0.0, "max": 0.0, "n": 0}
+    ordered = sorted(samples)
+    return {
+        "p50": round(statistics.median(ordered), 2),
+        "p99": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+        "max": round(ordered[-1], 2),
+        "n": len(ordered),
+    }
+
+
+def _description(rng: random.Random, modules: int) -> str:
+    paths = [f"src/pkg{rng.randrange(1000)}/mod{i}.py" for i in range(modules)]
+    return "Synthetic feature touching " + ", ".join(paths) if paths else "Synthetic feature"
+
+
+async def _start_workers(count: int, poll_timeout: int) -> List[asyncio.Task]:
+    from services.orchestrator import worker
+    from services.orchestrator.core.orchestrator import Orchestrator
+    from services.orchestrator.integrations.secrets import SecretsProvider
+
+    tasks = []
+    for _ in range(count):
+        orch = await asyncio.to_thread(Orchestrator)
+        queue = worker.queue_from_env(SecretsProvider.shared())
+        tasks.append(asyncio.create_task(worker.run_worker(queue, orch, poll_timeout)))
+    return tasks
+
+
+async def _run(args: argparse.Namespace, recorder: Recorder) -> Dict[str, Any]:
+    from services.orchestrator.app.main import app
+
+    rng = random.Random(args.seed)  # nosec B311 - synthetic load
+    workers = await _start_workers(args.workers if args.mode != "inline" else 0, 1)
+    submitted: Dict[str, float] = {}  # feature id -> submit time
+    submit_ms: List[float] = []
+    shed = 0
+    status: Dict[str, Dict[str, Any]] = {}
+    done_at: Dict[str, float] = {}
+    started = time.perf_counter()
+    try:
+        async with api_client(app, args.transport) as client:
+
+            async def submit(i: int) -> None:
+                nonlocal shed
+                await asyncio.sleep(max(0.0, started + i / args.rate - time.perf_counter()))
+                t0 = time.perf_counter()
+                resp = await client.post(
+                    "/features",
+                    json={"title": f"Load {i}", "description": _description(rng, args.modules)},
+                )
+                submit_ms.append((time.perf_counter() - t0) * 1000)
+                if resp.status_code == 429:
+                    shed += 1
+                    return
+                resp.raise_for_status()
+                submitted[resp.json()["id"]] = t0
+
+            submitter = asyncio.gather(*(submit(i) for i in range(args.features)))
+            deadline = started + args.timeout
+            stuck: Dict[str, int] = {}
+            while time.perf_counter() < deadline:
+                for fid in [f for f in submitted if f not in done_at]:
+                    out = (await client.get(f"/features/{fid}")).json()
+                    status[fid] = out
+                    if out["status"] == "done":
+                        done_at[fid] = time.perf_counter()
+                    elif out["failed"] and not out["running"]:
+                        # Failed for good once nothing has been running for two polls
+                        stuck[fid] = stuck.get(fid, 0) + 1
+                        if stuck[fid] >= 2:
+                            done_at[fid] = time.perf_counter()
+                if submitter.done() and len(done_at) == len(submitted):
+                    break
+                await asyncio.sleep(args.poll)
+            if not submitter.done():
+                submitter.cancel()
+            await asyncio.gather(submitter, return_exceptions=True)
+            elapsed = time.perf_counter() - started
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    tasks = {t["id"]: (fid, t) for fid, out in status.items() for t in out.get("tasks", [])}
+    assignment, completion = [], []
+    for tid, (fid, _) in tasks.items():
+        if tid not in recorder.started:
+            continue
+        deps = recorder.depends_on.get(tid, [])
+        ready = max([submitted[fid], *(recorder.finished.get(d, 0.0) for d in deps)])
+        assignment.append((recorder.started[tid] - ready) * 1000)
+    for fid, out in status.items():
+        if out["status"] == "done":
+            finished = [recorder.finished.get(t["id"], done_at[fid]) for t in out["tasks"]]
+            completion.append((max(finished) - submitted[fid]) * 1000)
+    completed_tasks = sum(1 for _, t in tasks.values() if t["status"] == "done")
+    return {
+        "mode": args.mode,
+        "transport": args.transport,
+        "workers": args.workers if args.mode != "inline" else 0,
+        "agents_per_type": args.agents,
+        "features": {
+            "submitted": len(submitted),
+            "shed": shed,
+            "done": sum(1 for out in status.values() if out["status"] == "done"),
+            "unfinished": len(submitted) - len(done_at),
+        },
+        "tasks": {
+            "done": completed_tasks,
+            "failed": sum(1 for _, t in tasks.values() if t["status"] == "failed"),
+            "agent_runs": recorder.runs,
+            "agent_failures": recorder.failures,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "tasks_per_hour": round(completed_tasks / elapsed * 3600, 1) if elapsed else 0.0,
+        "assignment_ms": _percentiles(assignment),
+        "completion_ms": _percentiles(completion),
+        "submit_ms": _percentiles(submit_ms),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one benchmark in a scratch directory (fresh database, no leftover artifacts)."""
+    from services.orchestrator.core import orchestrator as orch_mod
+
+    latencies: Dict[Optional[str], Sampler] = {}
+    for spec in args.latency:
+        kind, _, rest = spec.rpartition("=")
+        latencies[kind or None] = parse_latency(rest)
+    recorder = Recorder()
+    env = {
+        "DSF_QUEUE": {"inline": "", "fakeredis": "redis", "sqlite": "sqlite"}[args.mode],
+        "DSF_AGENT_POOL_SIZE": str(args.agents),
+        "DSF_MAX_ACTIVE_FEATURES": str(args.max_active),
+        "DSF_TASK_RETRY_BACKOFF": "0.05",
+        "DSF_TASK_RETRY_MAX_BACKOFF": "0.5",
+        "DSF_GITHUB_ENABLED": "false",
+    }
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="dsf-load-") as scratch, environment(env):
+        os.chdir(scratch)
+        try:
+            with contextlib.ExitStack() as stack:
+                for i, (agent_type, cls_name) in enumerate(_AGENT_CLASSES.items()):
+                    latency = latencies.get(agent_type.value) or latencies.get(None)
+                    agent = synthetic_agent(
+                        agent_type, latency, args.failure_rate, recorder, args.seed + i
+                    )
+                    stack.enter_context(patched(orch_mod, cls_name, agent))
+                if args.mode == "fakeredis":
+                    import fakeredis
+                    import redis
+
+                    server = fakeredis.FakeServer()
+                    stack.enter_context(
+                        patched(
+                            redis.Redis,
+                            "from_url",
+                            lambda url, **kw: fakeredis.FakeRedis(server=server, **kw),
+                        )
+                    )
+                return asyncio.run(_run(args, recorder))
+        finally:
+            os.chdir(cwd)
+
+
+def _lookup(report: Dict[str, Any], path: str) -> float:
+    value: Any = report
+    for key in path.split("."):
+        value = value[key]
+    return float(value)
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Metrics that regressed by more than ``tolerance`` (a fraction) against ``baseline``."""
+    regressions = []
+    for path, higher_is_better in _COMPARED.items():
+        try:
+            new, old = _lookup(report, path), _lookup(baseline, path)
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not old:
+            continue
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f"{path}: {old:g} -> {new:g} ({change:+.0%})")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=MODES, default="inline")
+    parser.add_argument("--transport", choices=TRANSPORTS, default="asgi")
+    parser.add_argument("--features", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=10.0, help="features submitted per second")
+    parser.add_argument("--modules", type=int, default=2, help="source paths per description")
+    parser.add_argument("--workers", type=int, default=2, help="queue workers (queue modes)")
+    parser.add_argument("--agents", type=int, default=4, help="agent instances per type")
+    parser.add_argument("--max-active", type=int, default=1000, help="DSF_MAX_ACTIVE_FEATURES")
+    parser.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        help="agent run time, [TYPE=]fixed:S|exp:MEAN|lognormal:MEDIAN,SIGMA (repeatable)",
+    )
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--poll", type=float, default=0.05, help="status poll interval (s)")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="write the report to this baseline file")
+    parser.add_argument("--compare", help="baseline file to check this run against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    args.latency = args.latency or ["lognormal:0.05,0.5"]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
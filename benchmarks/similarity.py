@@ -0,0 +1,67 @@
+"""Similarity index benchmark: build time and query latency at N entries, in milliseconds.
+
+Fills a ``SimilarityIndex`` with synthetic feature descriptions, then times top-k
+queries (NFR: duplicate check at submission must stay cheap at 100k features).
+
+    python -m benchmarks.similarity --entries 100000 --queries 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from services.orchestrator.core.similarity import SimilarityIndex
+
+_WORDS = (
+    "add fix refactor api endpoint login auth cache queue worker retry metrics dashboard "
+    "chart export import user token rate limit pagination search index webhook github "
+    "pull request review test coverage timeout database migration schema config"
+).split()
+
+
+def _text(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 40)))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)  # nosec B311 - synthetic data
+    index = SimilarityIndex(dim=args.dim)
+    started = time.perf_counter()
+    for i in range(args.entries):
+        index.add(f"feature-{i}", _text(rng))
+    build_ms = (time.perf_counter() - started) * 1000
+    samples = []
+    for _ in range(args.queries):
+        query = _text(rng)
+        t0 = time.perf_counter()
+        index.query(query, k=args.k)
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    report = {
+        "entries": args.entries,
+        "dim": args.dim,
+        "build_ms": build_ms,
+        "add_us": build_ms * 1000 / max(1, args.entries),
+        "query_ms": {
+            "p50": statistics.median(samples),
+            "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+            "max": samples[-1],
+        },
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+"""Cold-start benchmark: time from process launch to the first successful probe.
+
+Launches the API under uvicorn in a fresh interpreter (as a scale-from-zero container
+would) and polls ``/healthz`` and ``/readyz`` until each answers 200.
+
+    python -m benchmarks.startup --runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess  # nosec B404 - launches the local API under test
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(url: str, started: float, timeout: float) -> float:
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:  # nosec B310 - localhost only
+                if resp.status == 200:
+                    return time.perf_counter() - started
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+def run_once(timeout: float = 30.0) -> dict[str, float]:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+        cmd = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "services.orchestrator.app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ]
+        started = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=workdir, env=env)  # nosec B603
+        try:
+            healthz = _wait_for(f"{base}/healthz", started, timeout)
+            readyz = _wait_for(f"{base}/readyz", started, timeout)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+    return {"healthz_s": healthz, "readyz_s": readyz}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    samples = [run_once(args.timeout) for _ in range(args.runs)]
+    report = {
+        key: {
+            "median": statistics.median(s[key] for s in samples),
+            "min": min(s[key] for s in samples),
+            "max": max(s[key] for s in samples),
+        }
+        for key in ("healthz_s", "readyz_s")
+    }
+    print(json.dumps({"runs": args.runs, **report}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
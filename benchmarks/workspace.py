@@ -0,0 +1,67 @@
+"""Workspace benchmark: per-task setup time from a warm local mirror, in milliseconds.
+
+Builds a synthetic repository, mirrors it once, then times ``git worktree`` checkouts
+(plus the memory-mapped file index) for a series of tasks.
+
+    python -m benchmarks.workspace --files 2000 --tasks 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess  # nosec B404 - drives the local git binary
+import tempfile
+
+from services.orchestrator.core.workspace import RepoWorkspaces
+
+
+def _make_repo(root: str, files: int) -> str:
+    src = os.path.join(root, "src")
+    os.makedirs(src)
+    for i in range(files):
+        path = os.path.join(src, f"pkg{i % 50}", f"mod{i}.py")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(f"VALUE = {i}\n" * 20)
+    git = ["git", "-c", "user.email=bench@example.com", "-c", "user.name=bench"]
+    subprocess.run(git + ["init", "-q", "-b", "main"], cwd=src, check=True)  # nosec B603
+    subprocess.run(git + ["add", "."], cwd=src, check=True)  # nosec B603
+    subprocess.run(git + ["commit", "-q", "-m", "init"], cwd=src, check=True)  # nosec B603
+    return src
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        url = _make_repo(root, args.files)
+        ws = RepoWorkspaces(root=os.path.join(root, "ws"), fetch_interval=3600)
+        first = ws.checkout(url, "cold")  # clones the mirror and builds the index
+        ws.release(url, first)
+        samples = []
+        for i in range(args.tasks):
+            workspace = ws.checkout(url, f"task-{i}")
+            samples.append(workspace.setup_ms)
+            ws.release(url, workspace)
+    report = {
+        "files": args.files,
+        "tasks": args.tasks,
+        "cold_ms": first.setup_ms,
+        "warm_ms": {
+            "median": statistics.median(samples),
+            "min": min(samples),
+            "max": max(samples),
+        },
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
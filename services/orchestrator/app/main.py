@@ -1,18 +1,80 @@
+import asyncio
+import json
+import logging
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Annotated
 
-from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Request
+from fastapi import BackgroundTasks, Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 
-from services.orchestrator.core.orchestrator import Orchestrator
+from services.orchestrator.core.admission import Overloaded
+from services.orchestrator.core.analytics import parse_group_by
+from services.orchestrator.core.metrics import metrics
+from services.orchestrator.core.models import FeatureState
+from services.orchestrator.core.orchestrator import Orchestrator, startup_secret_names
 from services.orchestrator.integrations.github import verify_signature
 from services.orchestrator.integrations.secrets import SecretsProvider
 
-from .schemas import FeatureIn, FeatureOut, FeatureStatusOut, TaskOut
+from .schemas import (
+    FeatureIn,
+    FeatureOut,
+    FeatureStatusOut,
+    SimilarFeatureOut,
+    TaskEventOut,
+    TaskOut,
+    TaskOutputOut,
+)
 
-app = FastAPI(title="Dark Software Factory - Orchestrator", version="0.1.0")
+# Orchestrator construction (SQLite schema, Key Vault, optional integrations) runs on
+# this thread so the event loop can serve /healthz while the instance is still starting.
+_init_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dsf-init")
 
-# Single orchestrator instance for MVP
-orchestrator = Orchestrator()
-secrets = SecretsProvider.from_env()
+
+def _build_orchestrator() -> Orchestrator:
+    secrets = SecretsProvider.shared()
+    secrets.prefetch(startup_secret_names())
+    return Orchestrator(secrets=secrets)
+
+
+def _start_init(app: FastAPI) -> Future:
+    init = getattr(app.state, "orchestrator_init", None)
+    if init is None:
+        init = app.state.orchestrator_init = _init_executor.submit(_build_orchestrator)
+    return init
+
+
+async def _claim_features(app: FastAPI) -> None:
+    orchestrator = await asyncio.wrap_future(_start_init(app))
+    try:
+        await orchestrator.start()
+        await orchestrator.claim_loop()
+    finally:
+        await orchestrator.aclose()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _start_init(app)
+    claimer = asyncio.create_task(_claim_features(app))
+    try:
+        yield
+    finally:
+        claimer.cancel()
+        await asyncio.gather(claimer, return_exceptions=True)
+        app.state.orchestrator_init = None
+
+
+app = FastAPI(title="Dark Software Factory - Orchestrator", version="0.1.0", lifespan=lifespan)
+
+
+async def get_orchestrator(request: Request) -> Orchestrator:
+    """Resolve the single orchestrator instance, waiting for startup if it is still running."""
+    return await asyncio.wrap_future(_start_init(request.app))
+
+
+OrchestratorDep = Annotated[Orchestrator, Depends(get_orchestrator)]
 
 
 @app.get("/healthz")
@@ -20,39 +82,219 @@ async def healthz():
     return {"ok": True}
 
 
+@app.get("/readyz")
+async def readyz(request: Request):
+    init = _start_init(request.app)
+    if not init.done():
+        raise HTTPException(status_code=503, detail="Starting")
+    if init.exception() is not None:
+        raise HTTPException(status_code=503, detail="Initialization failed")
+    return {"ok": True}
+
+
+@app.get("/agents/stats")
+async def agent_stats(orchestrator: OrchestratorDep):
+    """Per-type pool utilization, for sizing DSF_AGENT_POOL_<TYPE> against throughput."""
+    return orchestrator.agent_stats()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Process counters and summaries (e.g. agent_cache_hits{tier=memory})."""
+    return metrics.snapshot()
+
+
 @app.post("/features", response_model=FeatureOut)
-async def create_feature(feature: FeatureIn, bg: BackgroundTasks):
-    feat = orchestrator.submit_feature(title=feature.title, description=feature.description)
-    # Kick off background execution
-    bg.add_task(orchestrator.run_feature, feat.id)
-    return FeatureOut.model_validate(feat.model_dump())
+async def create_feature(
+    feature: FeatureIn,
+    bg: BackgroundTasks,
+    response: Response,
+    orchestrator: OrchestratorDep,
+    defer: float = 0,
+):
+    """Submit a feature. Under overload it is shed with 429 and ``Retry-After``, or with
+    ``?defer=<seconds>`` accepted (202) and started once pressure allows."""
+    try:
+        feat = orchestrator.submit_feature(
+            title=feature.title,
+            description=feature.description,
+            repo=feature.repo,
+            admit=True,
+            defer=defer,
+        )
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.admission.retry_after))},
+        ) from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    if feat.state == FeatureState.DEFERRED:
+        response.status_code = 202
+    elif orchestrator.has_capacity():
+        # Kick off background execution; at capacity, another instance's claim loop takes it
+        bg.add_task(orchestrator.run_feature, feat.id)
+    out = FeatureOut.model_validate(feat.model_dump())
+    out.duplicates = [
+        SimilarFeatureOut(id=fid, score=score, title=title)
+        for fid, score, title in orchestrator.likely_duplicates(feat)
+    ]
+    return out
+
+
+@app.get("/admission")
+async def admission(orchestrator: OrchestratorDep):
+    """Shedding thresholds and the current pressure they are checked against."""
+    return orchestrator.admission_status()
+
+
+@app.get("/analytics/latency")
+async def latency_analytics(
+    orchestrator: OrchestratorDep,
+    window: str = "24h",
+    group_by: str = "agent_type",
+    agent_type: str | None = None,
+    repo: str | None = None,
+):
+    """Queue wait, run time and feature lead time percentiles over the last ``window``
+    (e.g. 90m, 24h, 7d), grouped by any of ``agent_type``, ``repo`` and ``bucket`` (hour)."""
+    try:
+        dims = parse_group_by(group_by)
+        # Reads only the hourly rollups, cheap enough for the event loop
+        return orchestrator.latency_analytics(window, dims, agent_type, repo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
 
 
 @app.get("/features/{feature_id}", response_model=FeatureStatusOut)
-async def get_feature(feature_id: str):
+async def get_feature(feature_id: str, orchestrator: OrchestratorDep):
     feat = orchestrator.get_feature(feature_id)
     if not feat:
         raise HTTPException(status_code=404, detail="Feature not found")
     return orchestrator.feature_status(feature_id)
 
 
+@app.post("/features/{feature_id}/resume", response_model=FeatureStatusOut)
+async def resume_feature(feature_id: str, bg: BackgroundTasks, orchestrator: OrchestratorDep):
+    """Continue a paused feature and re-run FAILED tasks and their dependents; DONE
+    tasks keep their results."""
+    if not orchestrator.get_feature(feature_id):
+        raise HTTPException(status_code=404, detail="Feature not found")
+    try:
+        orchestrator.resume_feature(feature_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    if orchestrator.has_capacity():
+        bg.add_task(orchestrator.run_feature, feature_id)
+    return orchestrator.feature_status(feature_id)
+
+
+@app.post("/features/{feature_id}/pause", response_model=FeatureStatusOut)
+async def pause_feature(feature_id: str, orchestrator: OrchestratorDep):
+    """Stop scheduling a feature and interrupt its running tasks until it is resumed."""
+    if not orchestrator.get_feature(feature_id):
+        raise HTTPException(status_code=404, detail="Feature not found")
+    try:
+        await orchestrator.pause_feature(feature_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return orchestrator.feature_status(feature_id)
+
+
+@app.post("/features/{feature_id}/cancel", response_model=FeatureStatusOut)
+async def cancel_feature(feature_id: str, orchestrator: OrchestratorDep):
+    """Cancel a feature: running agents are stopped and queued tasks are dropped."""
+    if not orchestrator.get_feature(feature_id):
+        raise HTTPException(status_code=404, detail="Feature not found")
+    try:
+        await orchestrator.cancel_feature(feature_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return orchestrator.feature_status(feature_id)
+
+
+@app.get("/features/{feature_id}/similar", response_model=list[SimilarFeatureOut])
+async def similar_features(feature_id: str, orchestrator: OrchestratorDep, k: int = 5):
+    """Finished features most similar to this one, best first (empty without DSF_SIMILARITY)."""
+    feat = orchestrator.get_feature(feature_id)
+    if not feat:
+        raise HTTPException(status_code=404, detail="Feature not found")
+    matches = orchestrator.similar_features(feat.title, feat.description, k, exclude=feature_id)
+    return [SimilarFeatureOut(id=fid, score=score, title=title) for fid, score, title in matches]
+
+
 @app.get("/features/{feature_id}/tasks", response_model=list[TaskOut])
-async def list_feature_tasks(feature_id: str):
+async def list_feature_tasks(feature_id: str, orchestrator: OrchestratorDep):
     feat = orchestrator.get_feature(feature_id)
     if not feat:
         raise HTTPException(status_code=404, detail="Feature not found")
     return [TaskOut.model_validate(t.model_dump()) for t in orchestrator.list_tasks(feature_id)]
 
 
+@app.get("/tasks/{task_id}/events", response_model=list[TaskEventOut])
+async def get_task_events(task_id: str, orchestrator: OrchestratorDep):
+    """Lifecycle transitions of a task (queued, running, done, ...), oldest first."""
+    if not orchestrator.get_task(task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+    return [TaskEventOut.model_validate(e.model_dump()) for e in orchestrator.task_events(task_id)]
+
+
+@app.get("/tasks/{task_id}/output", response_model=TaskOutputOut)
+async def get_task_output(task_id: str, orchestrator: OrchestratorDep, after: int = 0):
+    """Output streamed so far; poll with ``after=next`` for the rest."""
+    task = orchestrator.get_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    chunks = orchestrator.task_output(task_id, after)
+    return TaskOutputOut(
+        task_id=task_id, status=task.status.value, chunks=chunks, next=after + len(chunks)
+    )
+
+
+@app.get("/tasks/{task_id}/stream")
+async def stream_task_output(
+    task_id: str,
+    orchestrator: OrchestratorDep,
+    after: int = 0,
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
+):
+    """Server-sent events: one ``data`` event per chunk, then an ``end`` event.
+
+    Event ids are chunk sequence numbers, so a reconnecting EventSource resumes
+    where it left off.
+    """
+    if not orchestrator.get_task(task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+    if last_event_id is not None and last_event_id.isdigit():
+        after = int(last_event_id) + 1
+
+    async def events():
+        async for seq, chunk in orchestrator.follow_output(task_id, after):
+            yield f"id: {seq}\ndata: {json.dumps(chunk)}\n\n"
+        task = orchestrator.get_task(task_id)
+        status = task.status.value if task else "unknown"
+        yield f"event: end\ndata: {json.dumps({'status': status})}\n\n"
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
+
+
 @app.post("/github/webhook")
 async def github_webhook(
     request: Request,
+    orchestrator: OrchestratorDep,
+    bg: BackgroundTasks,
     x_hub_signature_256: str | None = Header(default=None, alias="X-Hub-Signature-256"),
     x_github_event: str | None = Header(default=None, alias="X-GitHub-Event"),
-    bg: BackgroundTasks | None = None,
 ):
     secret = (
-        secrets.get_secret("DSF_GITHUB_WEBHOOK_SECRET", os.getenv("DSF_GITHUB_WEBHOOK_SECRET", ""))
+        orchestrator.secrets.get_secret(
+            "DSF_GITHUB_WEBHOOK_SECRET", os.getenv("DSF_GITHUB_WEBHOOK_SECRET", "")
+        )
         or ""
     )
     payload = await request.body()
@@ -77,15 +319,41 @@ async def github_webhook(
             if orchestrator._persistence and issue_id is not None:
                 existing_fid = orchestrator._persistence.get_feature_by_issue(int(issue_id))
                 if existing_fid:
-                    if bg is not None:
+                    if orchestrator.has_capacity():
                         bg.add_task(orchestrator.run_feature, existing_fid)
                     return {"ok": True, "event": event, "feature_id": existing_fid}
-            feat = orchestrator.submit_feature(title=title, description=desc)
+            repo = (body.get("repository") or {}).get("full_name")
+            try:
+                # GitHub does not retry a 429, so an issue storm is deferred rather than shed
+                feat = orchestrator.submit_feature(
+                    title=title,
+                    description=desc,
+                    repo=repo,
+                    admit=True,
+                    defer=orchestrator.admission_limits.defer_seconds,
+                )
+            except Overloaded as e:
+                logging.warning("Shedding issue from %s: %s", repo, e)
+                return {"ok": True, "event": event, "shed": e.admission.reason}
+            except ValueError as e:
+                logging.warning("Ignoring issue from %s: %s", repo, e)
+                return {"ok": True, "event": event, "ignored": str(e)}
             if orchestrator._persistence and issue_id is not None:
                 orchestrator._persistence.link_issue_feature(int(issue_id), feat.id)
-            if bg is not None:
+            result = {"ok": True, "event": event, "feature_id": feat.id}
+            duplicates = orchestrator.likely_duplicates(feat)
+            if duplicates:
+                result["possible_duplicates"] = [fid for fid, _, _ in duplicates]
+            if feat.state == FeatureState.DEFERRED:
+                return {**result, "deferred": True}
+            if orchestrator.has_capacity():
                 bg.add_task(orchestrator.run_feature, feat.id)
-            return {"ok": True, "event": event, "feature_id": feat.id}
+            return result
+
+    if event == "push" and body.get("ref"):
+        orchestrator.handle_push(
+            (body.get("repository") or {}).get("full_name"), body["ref"], body.get("after")
+        )
 
     # Default acknowledgement
     return {"ok": True, "event": x_github_event}
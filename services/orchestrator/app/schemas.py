@@ -7,13 +7,25 @@ from pydantic import BaseModel, Field
 class FeatureIn(BaseModel):
     title: str
     description: str
+    repo: Optional[str] = Field(default=None, pattern=r"^[\w.-]+/[\w.-]+$")
+
+
+class SimilarFeatureOut(BaseModel):
+    id: str
+    title: str
+    score: float  # cosine similarity; 1.0 is identical text
 
 
 class FeatureOut(BaseModel):
     id: str
     title: str
     description: str
+    repo: Optional[str] = None
+    state: str = "active"
+    admit_by: Optional[datetime] = None  # deferred features expire if not started by then
     created_at: datetime
+    # Finished features this one closely resembles (with DSF_SIMILARITY)
+    duplicates: List[SimilarFeatureOut] = Field(default_factory=list)
 
 
 class TaskOut(BaseModel):
@@ -23,6 +35,24 @@ class TaskOut(BaseModel):
     agent_type: str
     status: str
     result: Optional[str] = None
+    attempts: int = 0
+    estimate: Optional[float] = None  # seconds
+    queued_at: Optional[float] = None  # epoch seconds
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class TaskEventOut(BaseModel):
+    event: str  # queued | running | done | failed | cancelled | pending
+    attempt: int = 0
+    at: float  # epoch seconds
+
+
+class TaskOutputOut(BaseModel):
+    task_id: str
+    status: str
+    chunks: List[str] = Field(default_factory=list)
+    next: int  # pass as ``after`` to continue from here
 
 
 class FeatureStatusOut(BaseModel):
@@ -33,4 +63,7 @@ class FeatureStatusOut(BaseModel):
     running: int
     pending: int
     failed: int
+    cancelled: int = 0
+    eta_seconds: float = 0.0  # estimated time to finish along the critical path
+    critical_path: List[str] = Field(default_factory=list)  # unfinished task ids on it
     tasks: List[TaskOut] = Field(default_factory=list)
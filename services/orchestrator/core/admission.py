@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, NamedTuple, Optional
+
+# Drain rate assumed while too few tasks finished recently to measure one
+_MIN_DRAIN_RATE = 1 / 30  # tasks per second
+
+
+def _quotas(spec: str) -> Dict[str, int]:
+    """``owner/a=5,owner/b=20`` -> per-repository feature quotas."""
+    quotas: Dict[str, int] = {}
+    for item in spec.split(","):
+        repo, _, value = item.strip().partition("=")
+        if repo and value:
+            quotas[repo.strip()] = int(value)
+    return quotas
+
+
+@dataclass(frozen=True)
+class AdmissionLimits:
+    """Shedding thresholds for new features; 0 disables a limit."""
+
+    max_queue_depth: int = 0  # task messages waiting in the queue
+    max_inflight_tasks: int = 0  # pending + running tasks of active features
+    tenant_features: int = 0  # unfinished features per repository
+    tenant_quotas: Dict[str, int] = field(default_factory=dict)  # per-repository overrides
+    defer_seconds: float = 3600.0  # how long a deferred submission may wait for admission
+    max_retry_after: float = 600.0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionLimits":
+        return cls(
+            max_queue_depth=int(os.getenv("DSF_ADMIT_MAX_QUEUE_DEPTH", "0")),
+            max_inflight_tasks=int(os.getenv("DSF_ADMIT_MAX_INFLIGHT_TASKS", "0")),
+            tenant_features=int(os.getenv("DSF_ADMIT_TENANT_FEATURES", "0")),
+            tenant_quotas=_quotas(os.getenv("DSF_ADMIT_TENANT_QUOTAS", "")),
+            defer_seconds=float(os.getenv("DSF_ADMIT_DEFER_SECONDS", "3600")),
+            max_retry_after=float(os.getenv("DSF_ADMIT_MAX_RETRY_AFTER", "600")),
+        )
+
+    def quota(self, tenant: str) -> int:
+        return self.tenant_quotas.get(tenant, self.tenant_features)
+
+
+@dataclass
+class Pressure:
+    queue_depth: int = 0
+    inflight_tasks: int = 0
+    tenants: Dict[str, int] = field(default_factory=dict)  # unfinished features per repo
+    drain_rate: float = 0.0  # tasks finished per second, recently
+
+
+class Admission(NamedTuple):
+    admitted: bool
+    reason: Optional[str] = None  # queue_depth | inflight_tasks | tenant_quota
+    retry_after: float = 0.0  # seconds until enough work should have drained
+
+
+class Overloaded(RuntimeError):
+    """A submission was shed; ``admission`` says why and when to retry."""
+
+    def __init__(self, admission: Admission):
+        super().__init__(
+            f"Over the {admission.reason} limit; retry in {admission.retry_after:.0f}s"
+        )
+        self.admission = admission
+
+
+class AdmissionController:
+    """Decides whether a new feature may start, from current pressure and its cost.
+
+    ``retry_after`` is the backlog over the limit divided by the recent drain rate
+    (tasks finished per second), so clients back off longer the deeper the overload.
+    """
+
+    def __init__(self, limits: Optional[AdmissionLimits] = None, window: float = 300.0):
+        self.limits = limits or AdmissionLimits()
+        self.window = window
+        self._finished: Deque[float] = deque()
+
+    def record_completion(self, now: Optional[float] = None) -> None:
+        self._finished.append(time.monotonic() if now is None else now)
+
+    def drain_rate(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        while self._finished and self._finished[0] < now - self.window:
+            self._finished.popleft()
+        return len(self._finished) / self.window
+
+    def decide(self, pressure: Pressure, tenant: str, cost: int) -> Admission:
+        """Admit a feature of ``cost`` tasks for ``tenant`` under ``pressure``?"""
+        limits = self.limits
+        excess = []  # (reason, tasks over the limit)
+        if limits.max_queue_depth:
+            excess.append(("queue_depth", pressure.queue_depth + cost - limits.max_queue_depth))
+        if limits.max_inflight_tasks:
+            excess.append(
+                ("inflight_tasks", pressure.inflight_tasks + cost - limits.max_inflight_tasks)
+            )
+        quota = limits.quota(tenant)
+        if quota:
+            # A tenant over quota waits for its oldest features to finish
+            excess.append(("tenant_quota", (pressure.tenants.get(tenant, 0) + 1 - quota) * cost))
+        rate = max(pressure.drain_rate, _MIN_DRAIN_RATE)
+        for reason, tasks in excess:
+            if tasks > 0:
+                wait = min(limits.max_retry_after, max(1.0, tasks / rate))
+                return Admission(False, reason, float(math.ceil(wait)))
+        return Admission(True)
@@ -1,10 +1,47 @@
 from __future__ import annotations
 
+from typing import TYPE_CHECKING, AsyncIterator, Callable, List, Optional
+
 from ..models import Task
 
+if TYPE_CHECKING:
+    from ..similarity import Match
+    from ..workspace import Workspace
+
 
 class BaseAgent:
     name: str = "base"
+    # Bump when prompts or behaviour change so cached results are not reused
+    version: str = "1"
+    # Set by the orchestrator when the similarity index is enabled (DSF_SIMILARITY)
+    retriever: Optional[Callable[[str, int], List["Match"]]] = None
+
+    async def start(self) -> None:
+        """Warm up (open model clients, load caches); called before the first lease."""
+
+    async def check(self) -> bool:
+        """Health probe; an instance that returns False is replaced by the pool."""
+        return True
 
-    async def run(self, task: Task) -> str:
+    async def aclose(self) -> None:
+        """Release resources when the pool retires this instance."""
+
+    def related_work(self, query: str, k: int = 3) -> List["Match"]:
+        """Results of earlier tasks most similar to ``query`` (title, result snippet and
+        feature id in each match's ``meta``); empty without a similarity index."""
+        return self.retriever(query, k) if self.retriever is not None else []
+
+    async def run(self, task: Task, workspace: Optional[Workspace] = None) -> str:
+        """Run ``task``; ``workspace`` is a checkout of the target repo when enabled."""
         raise NotImplementedError
+
+    async def stream(self, task: Task, workspace: Optional[Workspace] = None) -> AsyncIterator[str]:
+        """Yield output chunks as they are produced; the task result is their concatenation.
+
+        Agents that generate incrementally should override this; the default yields
+        ``run``'s result as a single chunk.
+        """
+        if workspace is None:
+            yield await self.run(task)
+        else:
+            yield await self.run(task, workspace=workspace)
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+from ..metrics import Metrics, metrics
+from ..models import Task
+
+
+def task_fingerprint(
+    task: Task,
+    dependencies: Sequence[Task],
+    agent: str,
+    version: str,
+    context: Optional[str] = None,
+) -> str:
+    """Stable hash of everything an agent's output depends on.
+
+    Task and dependency ids are random, so dependencies contribute their content
+    (title, type, result) in a canonical order instead. ``context`` covers other
+    inputs such as the workspace commit.
+    """
+    payload = {
+        "agent": agent,
+        "version": version,
+        "title": task.title,
+        "description": task.description or "",
+        "agent_type": task.agent_type.value,
+        "dependencies": sorted([d.title, d.agent_type.value, d.result or ""] for d in dependencies),
+        "context": context,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """Two-tier memo of agent results: an in-memory LRU backed by files on disk.
+
+    The memory tier holds ``max_entries`` results. The disk tier (one file per key
+    under ``directory``) survives restarts and is shared by processes on a host;
+    once it exceeds ``max_bytes`` the least recently used files are removed.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        directory: Optional[str] = "artifacts/agent-cache",
+        max_bytes: int = 256 * 1024 * 1024,
+        registry: Metrics = metrics,
+    ):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._metrics = registry
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(size for _path, size, _mtime in self._disk_files())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _disk_files(self):
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _remember(self, key: str, value: str) -> None:
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self._metrics.incr("agent_cache_evictions", tier="memory")
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # recency for eviction
+        return value
+
+    def _put_disk(self, key: str, value: str) -> None:
+        if not self.directory:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp, path)
+        with self._lock:
+            self._disk_bytes += len(value.encode()) - replaced
+            over = self._disk_bytes > self.max_bytes
+        if over:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        files = sorted(self._disk_files(), key=lambda f: f[2])
+        total = sum(size for _path, size, _mtime in files)
+        target = int(self.max_bytes * 0.9)  # headroom so every put does not rescan
+        for path, size, _mtime in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            self._metrics.incr("agent_cache_evictions", tier="disk")
+        with self._lock:
+            self._disk_bytes = total
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+        if value is not None:
+            self._metrics.incr("agent_cache_hits", tier="memory")
+        return value
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        value = self._get_disk(key)
+        if value is not None:
+            self._metrics.incr("agent_cache_hits", tier="disk")
+            self._remember(key, value)
+            return value
+        self._metrics.incr("agent_cache_misses")
+        return None
+
+    def put(self, key: str, value: str) -> None:
+        self._remember(key, value)
+        self._put_disk(key, value)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """``get`` with the disk tier read off the event loop."""
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, value: str) -> None:
+        self._remember(key, value)
+        await asyncio.to_thread(self._put_disk, key, value)
+
+    def stats(self) -> dict:
+        return {
+            "memory_entries": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+            "hits_memory": self._metrics.counter("agent_cache_hits", tier="memory"),
+            "hits_disk": self._metrics.counter("agent_cache_hits", tier="disk"),
+            "misses": self._metrics.counter("agent_cache_misses"),
+        }
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Mapping, Optional
+
+from ..models import AgentType
+from .base import BaseAgent
+
+
+class AgentPool:
+    """Warm instances of one agent type, leased to one task at a time.
+
+    ``lease()`` waits for an idle instance and returns it afterwards. An instance
+    whose run raised is probed with ``check()`` on return, and one that fails the
+    probe or ``max_failures`` runs in a row is closed and replaced. ``probe()``
+    checks idle instances the same way; ``run_health_checks`` calls it periodically.
+    A replacement that fails to start leaves its slot empty; ``lease()`` refills
+    empty slots on demand, so a broken factory fails leases rather than shrinking
+    the pool for good.
+    """
+
+    refill_interval = 1.0  # how often a waiting lease rechecks for empty slots
+
+    def __init__(
+        self,
+        factory: Callable[[], BaseAgent],
+        size: int = 2,
+        max_failures: int = 3,
+        name: Optional[str] = None,
+    ):
+        if size < 1:
+            raise ValueError("Agent pool size must be at least 1")
+        self._factory = factory
+        self.size = size
+        self.max_failures = max_failures
+        self.name = name or getattr(factory, "name", "agent")
+        self.version = getattr(factory, "version", "1")
+        self._idle: asyncio.Queue[BaseAgent] = asyncio.Queue()
+        self._failures: Dict[int, int] = {}
+        self._instances = 0
+        self._spawning = 0
+        self._started: Optional[float] = None
+        self._start_lock = asyncio.Lock()
+        # Counters for stats()
+        self._leased = 0
+        self._waiting = 0
+        self._leases = 0
+        self._errors = 0
+        self._restarts = 0
+        self._busy = 0.0
+        self._wait = 0.0
+
+    @property
+    def idle(self) -> int:
+        """Instances free to lease right now."""
+        return self._idle.qsize()
+
+    async def _spawn(self) -> BaseAgent:
+        agent = self._factory()
+        await agent.start()
+        self._instances += 1
+        return agent
+
+    async def _retire(self, agent: BaseAgent) -> None:
+        self._instances -= 1
+        self._failures.pop(id(agent), None)
+        try:
+            await agent.aclose()
+        except Exception as e:
+            logging.warning("Closing %s agent failed: %s", self.name, e)
+
+    async def start(self) -> None:
+        """Create the warm instances (idempotent)."""
+        async with self._start_lock:
+            if self._started is not None:
+                return
+            agents = await asyncio.gather(*(self._spawn() for _ in range(self.size)))
+            for agent in agents:
+                self._idle.put_nowait(agent)
+            self._started = time.monotonic()
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[BaseAgent]:
+        if self._started is None:
+            await self.start()
+        self._waiting += 1
+        waited = time.monotonic()
+        try:
+            agent = await self._acquire()
+        finally:
+            self._waiting -= 1
+        started = time.monotonic()
+        self._wait += started - waited
+        self._leased += 1
+        self._leases += 1
+        failed = False
+        try:
+            yield agent
+        except Exception:
+            failed = True
+            self._errors += 1
+            raise
+        finally:
+            self._busy += time.monotonic() - started
+            self._leased -= 1
+            await self._give_back(agent, failed)
+
+    async def _acquire(self) -> BaseAgent:
+        while True:
+            if not self._idle.empty():
+                return self._idle.get_nowait()
+            if self._instances + self._spawning < self.size:
+                # A slot lost to a failed restart: start its instance for this lease
+                self._spawning += 1
+                try:
+                    return await self._spawn()
+                finally:
+                    self._spawning -= 1
+            try:
+                return await asyncio.wait_for(self._idle.get(), self.refill_interval)
+            except asyncio.TimeoutError:
+                continue
+
+    async def _give_back(self, agent: BaseAgent, failed: bool) -> None:
+        key = id(agent)
+        self._failures[key] = self._failures.get(key, 0) + 1 if failed else 0
+        healthy = not failed or (
+            self._failures[key] < self.max_failures and await self._healthy(agent)
+        )
+        if self._instances > self.size:
+            await self._retire(agent)  # shrinking after resize()
+        elif healthy:
+            self._idle.put_nowait(agent)
+        else:
+            await self._replace(agent)
+
+    async def _healthy(self, agent: BaseAgent) -> bool:
+        try:
+            return await agent.check()
+        except Exception:
+            return False
+
+    async def _replace(self, agent: BaseAgent) -> None:
+        logging.warning("Restarting unhealthy %s agent", self.name)
+        self._restarts += 1
+        await self._retire(agent)
+        try:
+            agent = await self._spawn()
+        except Exception as e:
+            # Runs while a lease unwinds: never mask the task's own error
+            logging.error(
+                "Restarting %s agent failed; slot left for the next lease: %s", self.name, e
+            )
+            return
+        self._idle.put_nowait(agent)
+
+    async def probe(self) -> int:
+        """Health-check idle instances, replacing unhealthy ones; returns restarts."""
+        restarted = 0
+        for _ in range(self._idle.qsize()):
+            agent = self._idle.get_nowait()
+            if await self._healthy(agent):
+                self._idle.put_nowait(agent)
+            else:
+                await self._replace(agent)
+                restarted += 1
+        return restarted
+
+    async def run_health_checks(self, interval: float = 30.0) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.probe()
+            except Exception as e:
+                logging.error("%s agent health check failed: %s", self.name, e)
+
+    async def resize(self, size: int) -> None:
+        """Grow now; shrink as surplus instances are returned or found idle."""
+        if size < 1:
+            raise ValueError("Agent pool size must be at least 1")
+        self.size = size
+        if self._started is None:
+            return
+        while self._instances < size:
+            self._idle.put_nowait(await self._spawn())
+        while self._instances > size and not self._idle.empty():
+            await self._retire(self._idle.get_nowait())
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = time.monotonic() - self._started if self._started is not None else 0.0
+        return {
+            "size": self.size,
+            "instances": self._instances,
+            "idle": self._idle.qsize(),
+            "leased": self._leased,
+            "waiting": self._waiting,
+            "leases": self._leases,
+            "errors": self._errors,
+            "restarts": self._restarts,
+            "busy_seconds": round(self._busy, 3),
+            "wait_seconds": round(self._wait, 3),
+            # Share of instance-time spent on tasks since the pool warmed up
+            "utilization": round(self._busy / (elapsed * self.size), 4) if elapsed else 0.0,
+        }
+
+    async def aclose(self) -> None:
+        while not self._idle.empty():
+            await self._retire(self._idle.get_nowait())
+        self._started = None
+
+
+def pool_sizes_from_env(types: Mapping[AgentType, object]) -> Dict[AgentType, int]:
+    """``DSF_AGENT_POOL_<TYPE>`` per type (e.g. ``DSF_AGENT_POOL_CODE=4``), else ``DSF_AGENT_POOL_SIZE``."""
+    default = int(os.getenv("DSF_AGENT_POOL_SIZE", "2"))
+    return {t: int(os.getenv(f"DSF_AGENT_POOL_{t.name}", default)) for t in types}
+
+
+class AgentPools:
+    """One ``AgentPool`` per agent type."""
+
+    def __init__(
+        self,
+        factories: Mapping[AgentType, Callable[[], BaseAgent]],
+        sizes: Optional[Mapping[AgentType, int]] = None,
+        health_interval: float = 30.0,
+    ):
+        sizes = sizes or pool_sizes_from_env(factories)
+        self._pools = {
+            t: AgentPool(factory, size=sizes.get(t, 2), name=t.value)
+            for t, factory in factories.items()
+        }
+        self.health_interval = health_interval
+        self._health: list[asyncio.Task] = []
+
+    def __getitem__(self, agent_type: AgentType) -> AgentPool:
+        return self._pools[agent_type]
+
+    def lease(self, agent_type: AgentType):
+        return self._pools[agent_type].lease()
+
+    async def start(self) -> None:
+        """Warm every pool and start periodic health probes."""
+        await asyncio.gather(*(p.start() for p in self._pools.values()))
+        if not self._health:
+            self._health = [
+                asyncio.create_task(p.run_health_checks(self.health_interval))
+                for p in self._pools.values()
+            ]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {t.value: p.stats() for t, p in self._pools.items()}
+
+    async def aclose(self) -> None:
+        for task in self._health:
+            task.cancel()
+        await asyncio.gather(*self._health, return_exceptions=True)
+        self._health = []
+        for pool in self._pools.values():
+            await pool.aclose()
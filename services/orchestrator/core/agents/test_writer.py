@@ -1,12 +1,14 @@
 import asyncio
+from typing import Optional
 
 from ..models import Task
+from ..workspace import Workspace
 from .base import BaseAgent
 
 
 class TestWriterAgent(BaseAgent):
     name = "test-writer"
 
-    async def run(self, task: Task) -> str:
+    async def run(self, task: Task, workspace: Optional[Workspace] = None) -> str:
         await asyncio.sleep(0.05)
         return "def test_placeholder():\n    assert 1 + 1 == 2\n"
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import math
+import re
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+# Rollups are kept per hour; windows are answered from whole buckets
+BUCKET_SECONDS = 3600
+# Latencies are counted in log-spaced bins: each bin is 10% wider than the one below,
+# so a percentile read back from the bins is within 5% of the true value
+_MIN_LATENCY = 0.001  # seconds; anything faster lands in bin 0
+_GROWTH = 1.1
+# Rolled-up latencies: queue_wait (queued -> started), run (started -> done, retries
+# included) and feature_lead (feature submitted -> its last task done)
+METRICS = ("queue_wait", "run", "feature_lead")
+GROUPS = ("agent_type", "repo", "bucket")
+_QUANTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+
+
+def bucket_of(at: float) -> int:
+    """Start of the rollup bucket containing the epoch time ``at``."""
+    return int(at // BUCKET_SECONDS * BUCKET_SECONDS)
+
+
+def latency_bin(seconds: float) -> int:
+    if seconds <= _MIN_LATENCY:
+        return 0
+    return int(math.log(seconds / _MIN_LATENCY, _GROWTH)) + 1
+
+
+def bin_value(b: int) -> float:
+    """Representative latency of bin ``b``: the geometric middle of its range."""
+    if b <= 0:
+        return _MIN_LATENCY
+    return _MIN_LATENCY * _GROWTH ** (b - 0.5)
+
+
+def summarize(bins: Iterable[Tuple[int, int]], total: float) -> Dict[str, float]:
+    """Count, mean and percentiles (seconds) of a histogram of ``(bin, count)`` pairs."""
+    ordered = sorted(bins)
+    count = sum(n for _, n in ordered)
+    out: Dict[str, float] = {"count": count, "mean": round(total / count, 4) if count else 0.0}
+    for name, q in _QUANTILES:
+        rank, seen, value = q * count, 0, 0.0
+        for b, n in ordered:
+            seen += n
+            value = bin_value(b)
+            if seen >= rank:
+                break
+        out[name] = round(value, 4)
+    return out
+
+
+_WINDOW = re.compile(r"^(\d+(?:\.\d+)?)([smhdw])$")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_window(window: str) -> float:
+    """``90m``, ``24h``, ``7d`` -> seconds."""
+    m = _WINDOW.match(window.strip())
+    if not m:
+        raise ValueError(f"Bad window {window!r}; expected e.g. 90m, 24h or 7d")
+    return float(m.group(1)) * _UNITS[m.group(2)]
+
+
+def parse_group_by(spec: Optional[str]) -> Sequence[str]:
+    """``agent_type,repo`` -> the rollup dimensions to group by (any of GROUPS)."""
+    dims = [d.strip() for d in (spec or "").split(",") if d.strip()]
+    unknown = [d for d in dims if d not in GROUPS]
+    if unknown:
+        raise ValueError(f"Cannot group by {', '.join(unknown)}; choose from {', '.join(GROUPS)}")
+    return list(dict.fromkeys(dims))
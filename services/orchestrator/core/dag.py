@@ -1,18 +1,59 @@
-from typing import List, Tuple
+from __future__ import annotations
 
-import networkx as nx
+import re
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Set, Tuple
 
 from .models import AgentType, Task
 
+if TYPE_CHECKING:
+    import networkx as nx
 
-def basic_decompose(title: str, description: str) -> Tuple[List[Task], nx.DiGraph]:
+# Source paths named in a feature description, e.g. "update api/routes.py and core/db.py"
+_MODULE_PATH = re.compile(
+    r"(?<![\w/.-])(?:[\w-]+/)*[\w-]+\.(?:py|pyi|js|jsx|ts|tsx|go|rs|java|kt|rb|cs|c|cc|cpp|h)\b"
+)
+
+
+def build_graph(tasks: Iterable[Task]) -> "nx.DiGraph":
+    """Build the dependency DAG for ``tasks`` (edges point from dependency to dependent)."""
+    # networkx is imported on first use so it stays off the API cold-start path.
+    import networkx as nx
+
+    g = nx.DiGraph()
+    tasks = list(tasks)
+    for t in tasks:
+        g.add_node(t.id, task=t)
+    for t in tasks:
+        for dep in t.depends_on:
+            g.add_edge(dep, t.id)
+    return g
+
+
+def task_levels(g: "nx.DiGraph") -> List[List[str]]:
+    """Task ids grouped by DAG level: each level only depends on earlier ones."""
+    import networkx as nx
+
+    return [list(level) for level in nx.topological_generations(g)]
+
+
+def downstream(g: "nx.DiGraph", task_ids: Iterable[str]) -> Set[str]:
+    """``task_ids`` plus every task that depends on them, directly or transitively."""
+    import networkx as nx
+
+    found: Set[str] = set()
+    for tid in task_ids:
+        found.add(tid)
+        found.update(nx.descendants(g, tid))
+    return found
+
+
+def basic_decompose(title: str, description: str) -> Tuple[List[Task], "nx.DiGraph"]:
     """
     MVP decomposition into: plan/implement/test/review with simple dependencies.
     - implement depends on plan
     - test depends on implement
     - review depends on test
     """
-    g = nx.DiGraph()
     plan = Task(title=f"Plan: {title}", description=description, agent_type=AgentType.CODE)
     implement = Task(
         title=f"Implement: {title}",
@@ -33,9 +74,80 @@ def basic_decompose(title: str, description: str) -> Tuple[List[Task], nx.DiGrap
         depends_on=[test.id],
     )
     tasks = [plan, implement, test, review]
-    for t in tasks:
-        g.add_node(t.id, task=t)
-    for t in tasks:
-        for dep in t.depends_on:
-            g.add_edge(dep, t.id)
-    return tasks, g
+    return tasks, build_graph(tasks)
+
+
+def mentioned_modules(description: str, limit: int = 8) -> List[str]:
+    """Distinct source paths mentioned in ``description``, in order of appearance."""
+    found: List[str] = []
+    for match in _MODULE_PATH.finditer(description):
+        if match.group(0) not in found:
+            found.append(match.group(0))
+    return found[:limit]
+
+
+def decompose(
+    title: str, description: str, max_modules: int = 8
+) -> Tuple[List[Task], "nx.DiGraph"]:
+    """Plan, then implement and test each module the description names in parallel, then
+    review once every module's tests are written.
+
+    Without at least two named modules this is the serial ``basic_decompose`` chain.
+    """
+    modules = mentioned_modules(description, max_modules)
+    if len(modules) < 2:
+        return basic_decompose(title, description)
+    plan = Task(title=f"Plan: {title}", description=description, agent_type=AgentType.CODE)
+    tasks = [plan]
+    tests: List[str] = []
+    for module in modules:
+        scoped = f"{description}\n\nScope: {module}"
+        implement = Task(
+            title=f"Implement: {title} [{module}]",
+            description=scoped,
+            agent_type=AgentType.CODE,
+            depends_on=[plan.id],
+        )
+        test = Task(
+            title=f"Test: {title} [{module}]",
+            description=scoped,
+            agent_type=AgentType.TEST,
+            depends_on=[implement.id],
+        )
+        tasks += [implement, test]
+        tests.append(test.id)
+    review = Task(
+        title=f"Review: {title}",
+        description=description,
+        agent_type=AgentType.REVIEW,
+        depends_on=tests,
+    )
+    tasks.append(review)
+    return tasks, build_graph(tasks)
+
+
+def remaining_path(g: "nx.DiGraph", cost: Callable[[Task], float]) -> Dict[str, float]:
+    """Per task, the cost of the longest path from it (inclusive) to the end of the DAG.
+
+    Scheduling ready tasks by this value runs the critical path first; its maximum
+    over the graph is the feature's expected time to completion.
+    """
+    import networkx as nx
+
+    remaining: Dict[str, float] = {}
+    for n in reversed(list(nx.topological_sort(g))):
+        after = max((remaining[s] for s in g.successors(n)), default=0.0)
+        remaining[n] = cost(g.nodes[n]["task"]) + after
+    return remaining
+
+
+def critical_path(g: "nx.DiGraph", remaining: Dict[str, float]) -> List[str]:
+    """Task ids along the longest remaining path, from its start."""
+    if not remaining:
+        return []
+    node = max((n for n in g.nodes if g.in_degree(n) == 0), key=remaining.get, default=None)
+    path: List[str] = []
+    while node is not None:
+        path.append(node)
+        node = max(g.successors(node), key=remaining.get, default=None)
+    return path
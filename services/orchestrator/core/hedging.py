@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import (
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    Hashable,
+    NamedTuple,
+    Optional,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Recent run durations per key (agent type), for percentile-based hedge delays."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[Hashable, Deque[float]] = {}
+
+    def record(self, key: Hashable, seconds: float) -> None:
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: Hashable, q: float) -> Optional[float]:
+        """The ``q``-th percentile (0-100) of recent samples; None until ``min_samples``."""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+    def count(self, key: Hashable) -> int:
+        return len(self._samples.get(key, ()))
+
+
+class HedgeOutcome(NamedTuple, Generic[T]):
+    result: T
+    hedged: bool  # a duplicate was started
+    hedge_won: bool  # and finished first
+
+
+async def hedged(
+    primary: Callable[[], Awaitable[T]],
+    hedge: Callable[[], Awaitable[T]],
+    delay: float,
+    should_hedge: Callable[[], bool] = lambda: True,
+) -> HedgeOutcome[T]:
+    """Run ``primary``; if it is still running after ``delay``, race it against ``hedge``.
+
+    The first attempt to succeed wins and the other is cancelled. A failed attempt
+    only fails the call once the other has failed too. ``should_hedge`` is checked
+    at the deadline (e.g. to skip hedging when no spare capacity is idle).
+    """
+    first = asyncio.ensure_future(primary())
+    pending = {first}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done or not should_hedge():
+            return HedgeOutcome(await first, False, False)
+        second = asyncio.ensure_future(hedge())
+        pending.add(second)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return HedgeOutcome(attempt.result(), True, attempt is second)
+        # Both failed: report the primary's error
+        return HedgeOutcome(first.result(), True, False)
+    finally:
+        for attempt in pending:
+            attempt.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
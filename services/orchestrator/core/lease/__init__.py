@@ -0,0 +1 @@
+"""Lease backends used to assign feature ownership across orchestrator instances."""
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class LeaseStore(ABC):
+    """Time-bounded exclusive ownership of a key.
+
+    ``acquire`` succeeds when the key is free, expired, or already held by ``owner``;
+    holders must ``renew`` before ``ttl`` elapses or another owner may take over.
+    """
+
+    @abstractmethod
+    def acquire(self, key: str, owner: str, ttl: float) -> bool: ...
+
+    @abstractmethod
+    def renew(self, key: str, owner: str, ttl: float) -> bool: ...
+
+    @abstractmethod
+    def release(self, key: str, owner: str) -> None: ...
+
+    @abstractmethod
+    def owner(self, key: str) -> Optional[str]: ...
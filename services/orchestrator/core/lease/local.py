@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .base import LeaseStore
+
+
+class LocalLeaseStore(LeaseStore):
+    """In-process stand-in for single-instance deployments and tests."""
+
+    def __init__(self):
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _live_owner(self, key: str) -> Optional[str]:
+        held = self._leases.get(key)
+        if held and held[1] > time.monotonic():
+            return held[0]
+        return None
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        with self._lock:
+            current = self._live_owner(key)
+            if current not in (None, owner):
+                return False
+            self._leases[key] = (owner, time.monotonic() + ttl)
+            return True
+
+    def renew(self, key: str, owner: str, ttl: float) -> bool:
+        with self._lock:
+            if self._live_owner(key) != owner:
+                return False
+            self._leases[key] = (owner, time.monotonic() + ttl)
+            return True
+
+    def release(self, key: str, owner: str) -> None:
+        with self._lock:
+            if self._live_owner(key) == owner:
+                del self._leases[key]
+
+    def owner(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._live_owner(key)
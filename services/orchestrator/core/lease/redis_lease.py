@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+import redis
+
+from .base import LeaseStore
+
+# Compare-and-set scripts so only the current holder can extend or drop a lease.
+_ACQUIRE = """
+local cur = redis.call('GET', KEYS[1])
+if (not cur) or cur == ARGV[1] then
+  redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+  return 1
+end
+return 0
+"""
+_RENEW = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLeaseStore(LeaseStore):
+    def __init__(self, prefix: str = "dsf:lease:", url: Optional[str] = None):
+        self._prefix = prefix
+        self._url = url or os.getenv("DSF_REDIS_URL", "redis://localhost:6379/0")
+        self._client = redis.Redis.from_url(self._url, decode_responses=True)
+        self._acquire = self._client.register_script(_ACQUIRE)
+        self._renew = self._client.register_script(_RENEW)
+        self._release = self._client.register_script(_RELEASE)
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        return bool(self._acquire(keys=[self._prefix + key], args=[owner, int(ttl * 1000)]))
+
+    def renew(self, key: str, owner: str, ttl: float) -> bool:
+        return bool(self._renew(keys=[self._prefix + key], args=[owner, int(ttl * 1000)]))
+
+    def release(self, key: str, owner: str) -> None:
+        self._release(keys=[self._prefix + key], args=[owner])
+
+    def owner(self, key: str) -> Optional[str]:
+        return self._client.get(self._prefix + key)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from .base import LeaseStore
+
+
+class SQLiteLeaseStore(LeaseStore):
+    """Leases in the orchestrator database, shared by every process using the same file.
+
+    Expiry uses wall-clock time because holders may live in different processes.
+    """
+
+    def __init__(self, path: str = "artifacts/dsf.db"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """)
+            self._conn.commit()
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                """
+                INSERT INTO leases(key, owner, expires_at) VALUES (?,?,?)
+                ON CONFLICT(key) DO UPDATE SET owner=excluded.owner, expires_at=excluded.expires_at
+                WHERE leases.owner=excluded.owner OR leases.expires_at<=?
+                """,
+                (key, owner, now + ttl, now),
+            )
+            self._conn.commit()
+            return cur.rowcount == 1
+
+    def renew(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE leases SET expires_at=? WHERE key=? AND owner=? AND expires_at>?",
+                (now + ttl, key, owner, now),
+            )
+            self._conn.commit()
+            return cur.rowcount == 1
+
+    def release(self, key: str, owner: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE key=? AND owner=?", (key, owner))
+            self._conn.commit()
+
+    def owner(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT owner FROM leases WHERE key=? AND expires_at>?",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict
+
+
+def _key(name: str, labels: Dict[str, object]) -> str:
+    if not labels:
+        return name
+    inner = ",".join(f"{k}={labels[k]}" for k in sorted(labels))
+    return f"{name}{{{inner}}}"
+
+
+class Metrics:
+    """In-process counters, gauges and summaries, served as JSON at ``GET /metrics``.
+
+    Series are named ``name{label=value,...}``; summaries keep count, sum and max.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, float]] = {}
+
+    def incr(self, name: str, value: float = 1.0, **labels: object) -> float:
+        """Add ``value`` to a counter; returns the new total."""
+        key = _key(name, labels)
+        with self._lock:
+            total = self._counters[key] = self._counters.get(key, 0.0) + value
+        return total
+
+    def set(self, name: str, value: float, **labels: object) -> None:
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels: object) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            s = self._summaries.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+            s["count"] += 1
+            s["sum"] += value
+            s["max"] = max(s["max"], value)
+
+    def counter(self, name: str, **labels: object) -> float:
+        return self._counters.get(_key(name, labels), 0.0)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {k: dict(v) for k, v in self._summaries.items()},
+            }
+
+
+# Process-wide registry
+metrics = Metrics()
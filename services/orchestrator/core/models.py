@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -17,6 +17,14 @@ class TaskStatus(str, Enum):
     RUNNING = "running"
     DONE = "done"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class FeatureState(str, Enum):
+    ACTIVE = "active"
+    PAUSED = "paused"  # not driven until resumed; unfinished tasks return to PENDING
+    CANCELLED = "cancelled"  # terminal
+    DEFERRED = "deferred"  # submitted under overload; admitted when pressure allows
 
 
 class Task(BaseModel):
@@ -27,11 +35,40 @@ class Task(BaseModel):
     depends_on: List[str] = Field(default_factory=list)
     status: TaskStatus = TaskStatus.PENDING
     result: Optional[str] = None
+    attempts: int = 0  # runs started, including retries
+    estimate: Optional[float] = None  # expected run time in seconds, from recent runs
+    # Lifecycle (epoch seconds): handed to a runner or the queue, picked up, finished
+    queued_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
 
 
 class Feature(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     title: str
     description: str
+    repo: Optional[str] = None  # "owner/name"; None means the default repository
+    state: FeatureState = FeatureState.ACTIVE
+    admit_by: Optional[datetime] = None  # a DEFERRED feature not admitted by then expires
     created_at: datetime = Field(default_factory=datetime.utcnow)
     task_ids: List[str] = Field(default_factory=list)
+
+
+class OutboxEvent(BaseModel):
+    """A side effect recorded with the task update that caused it, delivered later."""
+
+    key: str  # idempotency key, e.g. "task:<task_id>"
+    feature_id: str
+    kind: str  # task | level | feature (see core.outbox)
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    id: Optional[int] = None
+    attempts: int = 0
+
+
+class TaskEvent(BaseModel):
+    """One lifecycle transition of a task: queued, or a change of status."""
+
+    task_id: str
+    event: str  # queued | running | done | failed | cancelled | pending
+    attempt: int = 0
+    at: float  # epoch seconds
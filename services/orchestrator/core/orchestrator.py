@@ -1,58 +1,390 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
 import os
-from typing import Dict, List, Optional
+import random
+import socket
+import time
+import uuid
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
-import networkx as nx
-
-from services.orchestrator.integrations.github import GitHubClient
+from services.orchestrator.integrations.github_registry import (
+    GitHubClientRegistry,
+    repo_secret_name,
+)
 from services.orchestrator.integrations.secrets import SecretsProvider
 
+from .admission import AdmissionController, AdmissionLimits, Overloaded, Pressure
+from .agents.cache import ResultCache, task_fingerprint
 from .agents.code_writer import CodeWriterAgent
+from .agents.pool import AgentPools
 from .agents.review import ReviewAgent
 from .agents.test_writer import TestWriterAgent
-from .dag import basic_decompose
-from .models import AgentType, Feature, Task, TaskStatus
+from .analytics import BUCKET_SECONDS, METRICS, bucket_of, parse_window, summarize
+from .dag import build_graph, critical_path, decompose, downstream, remaining_path, task_levels
+from .hedging import LatencyTracker, hedged
+from .lease.base import LeaseStore
+from .lease.local import LocalLeaseStore
+from .metrics import metrics
+from .models import AgentType, Feature, FeatureState, OutboxEvent, Task, TaskEvent, TaskStatus
+from .outbox import MemoryOutbox, OutboxRelay
+from .output import TaskOutputLog
 from .persistence.base import Persistence
 from .persistence.sqlite import SQLitePersistence
-from .queue.redis_queue import RedisQueue
+from .publishing import PUBLISH_MODES, ArtifactPublisher
+from .retry import RetryPolicy, retry_policies_from_env
+from .workspace import RepoWorkspaces
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+# Optional integrations are imported only when enabled (see _load_github_client,
+# _load_redis_queue, _load_sandbox_pool and _load_feature_memory) so a cold start does
+# not pay for httpx/redis/multiprocessing/numpy it will not use.
+AsyncGitHubClient = None
+RedisQueue = None
+SandboxPool = None
+FeatureMemory = None
+
+
+def _flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in {"1", "true", "yes"}
+
+
+def _load_github_client():
+    global AsyncGitHubClient
+    if AsyncGitHubClient is None:
+        from services.orchestrator.integrations.github import (
+            AsyncGitHubClient as _AsyncGitHubClient,
+        )
+
+        AsyncGitHubClient = _AsyncGitHubClient
+    return AsyncGitHubClient
+
+
+def _load_redis_queue():
+    global RedisQueue
+    if RedisQueue is None:
+        from .queue.redis_queue import RedisQueue as _RedisQueue
+
+        RedisQueue = _RedisQueue
+    return RedisQueue
+
+
+def _load_sandbox_pool():
+    global SandboxPool
+    if SandboxPool is None:
+        from .sandbox import SandboxPool as _SandboxPool
+
+        SandboxPool = _SandboxPool
+    return SandboxPool
+
+
+def _load_feature_memory():
+    global FeatureMemory
+    if FeatureMemory is None:
+        from .similarity import FeatureMemory as _FeatureMemory
+
+        FeatureMemory = _FeatureMemory
+    return FeatureMemory
+
+
+def _load_lease_store(persistence: Optional[Persistence], redis_url: Optional[str]) -> LeaseStore:
+    """Pick the lease backend from DSF_LEASES (redis|sqlite|local), defaulting to the DB."""
+    backend = os.getenv("DSF_LEASES", "").lower() or ("sqlite" if persistence else "local")
+    if backend == "redis":
+        from .lease.redis_lease import RedisLeaseStore
+
+        return RedisLeaseStore(url=redis_url)
+    if backend == "sqlite" and persistence is not None:
+        from .lease.sqlite_lease import SQLiteLeaseStore
+
+        return SQLiteLeaseStore(persistence.path)
+    return LocalLeaseStore()
+
+
+def _queue_message(task_id: str, repo: Optional[str]) -> str:
+    """The queue payload for a task; cancelling a feature removes it by this exact value."""
+    return json.dumps({"task_id": task_id, "repo": repo})
+
+
+def startup_secret_names() -> List[str]:
+    """Secrets the enabled integrations will read, so they can be prefetched together."""
+    names = ["DSF_GITHUB_WEBHOOK_SECRET"]
+    if _flag("DSF_GITHUB_ENABLED"):
+        names += ["DSF_GITHUB_TOKEN", "DSF_GITHUB_REPO"]
+        # Per-repository tokens for the allowlisted repositories
+        names += [
+            repo_secret_name(r.strip())
+            for r in os.getenv("DSF_GITHUB_REPOS", "").split(",")
+            if r.strip()
+        ]
+    if os.getenv("DSF_QUEUE", "").lower() == "redis":
+        names.append("DSF_REDIS_URL")
+    return names
 
 
 class Orchestrator:
-    def __init__(self):
-        self._secrets = SecretsProvider.from_env()
+    def __init__(self, secrets: Optional[SecretsProvider] = None):
+        self._secrets = secrets or SecretsProvider.shared()
+        # Reads below never wait on Key Vault; load what they need in one round first
+        self._secrets.prefetch(startup_secret_names())
         self._features: Dict[str, Feature] = {}
         self._tasks: Dict[str, Task] = {}
-        self._graphs: Dict[str, nx.DiGraph] = {}
-        self._agents = {
-            AgentType.CODE: CodeWriterAgent(),
-            AgentType.TEST: TestWriterAgent(),
-            AgentType.REVIEW: ReviewAgent(),
-        }
+        self._graphs: Dict[str, "nx.DiGraph"] = {}
+        # Warm, health-checked agent instances per type (DSF_AGENT_POOL_<TYPE> sizes)
+        self._agent_pools = AgentPools(
+            {
+                AgentType.CODE: CodeWriterAgent,
+                AgentType.TEST: TestWriterAgent,
+                AgentType.REVIEW: ReviewAgent,
+            },
+            health_interval=float(os.getenv("DSF_AGENT_HEALTH_SECONDS", "30")),
+        )
         # Optional persistence
         self._persistence: Optional[Persistence] = None
         if os.getenv("DSF_DB", "sqlite").lower() == "sqlite":
-            self._persistence = SQLitePersistence()
+            self._persistence = SQLitePersistence(archive_dir=os.getenv("DSF_ARCHIVE_DIR") or None)
             self._persistence.init()
-        # Optional GitHub integration
-        self._github: Optional[GitHubClient] = None
-        if os.getenv("DSF_GITHUB_ENABLED", "false").lower() in {"1", "true", "yes"}:
+        # Streamed agent output, persisted in batches and followable through the API
+        self._output = TaskOutputLog(
+            self._persistence,
+            flush_chunks=int(os.getenv("DSF_OUTPUT_FLUSH_CHUNKS", "32")),
+            flush_interval=float(os.getenv("DSF_OUTPUT_FLUSH_MS", "250")) / 1000,
+        )
+        # Optional GitHub integration: one client (pool, cache, budget) per repository
+        self._github: Optional[GitHubClientRegistry] = None
+        self._github_token: Optional[str] = None
+        self._publish_mode = os.getenv("DSF_GITHUB_PUBLISH_MODE", "task").lower()
+        self._publishers: Dict[str, ArtifactPublisher] = {}
+        self._rotation_subscriptions: List[str] = []
+        self._github_limiters: Dict[str, object] = {}
+        self._github_waiting: Dict[str, Any] = {}  # repo secret name -> client on the shared token
+        if _flag("DSF_GITHUB_ENABLED"):
             token = self._secrets.get_secret("DSF_GITHUB_TOKEN", os.getenv("DSF_GITHUB_TOKEN"))
             repo = self._secrets.get_secret("DSF_GITHUB_REPO", os.getenv("DSF_GITHUB_REPO"))
-            if token and repo:
-                self._github = GitHubClient(repo=repo, token=token)
-        # Optional Redis queue
-        self._queue: Optional[RedisQueue] = None
-        if os.getenv("DSF_QUEUE", "").lower() == "redis":
+            if token:
+                if self._publish_mode not in PUBLISH_MODES:
+                    raise ValueError(
+                        f"Unknown publish mode {self._publish_mode!r}; expected one of {PUBLISH_MODES}"
+                    )
+                self._github_token = token
+                self._github = GitHubClientRegistry(
+                    self._github_client_factory(),
+                    default_repo=repo,
+                    allowed=os.getenv("DSF_GITHUB_REPOS", "").split(","),
+                    allow_any=_flag("DSF_GITHUB_ALLOW_ANY_REPO"),
+                )
+                # Rotated tokens apply to live clients; no restart needed
+                self._subscribe_rotation("DSF_GITHUB_TOKEN")
+        # GitHub side effects are written to an outbox with the task update and
+        # delivered by a relay, so task scheduling never waits on GitHub.
+        self._outbox = self._persistence or MemoryOutbox()
+        self._relay: Optional[OutboxRelay] = None
+        self._relay_task: Optional[asyncio.Task] = None
+        if self._github is not None:
+            self._relay = OutboxRelay(
+                self._outbox,
+                self._publisher_for,
+                self._stored_feature,
+                batch_size=int(os.getenv("DSF_OUTBOX_BATCH", "20")),
+                max_attempts=int(os.getenv("DSF_OUTBOX_MAX_ATTEMPTS", "8")),
+            )
+        # Optional task queue for separate workers: Redis, or the SQLite database
+        self._queue = None
+        redis_url = None
+        queue_backend = os.getenv("DSF_QUEUE", "").lower()
+        if queue_backend == "redis":
             # Allow Redis URL via Key Vault
-            url = self._secrets.get_secret("DSF_REDIS_URL", os.getenv("DSF_REDIS_URL"))
-            self._queue = RedisQueue(url=url)
+            redis_url = self._secrets.get_secret("DSF_REDIS_URL", os.getenv("DSF_REDIS_URL"))
+            self._queue = _load_redis_queue()(url=redis_url)
+        elif queue_backend == "sqlite":
+            if self._persistence is None:
+                raise ValueError("DSF_QUEUE=sqlite needs the SQLite database (DSF_DB=sqlite)")
+            from .queue.sqlite_queue import SQLiteQueue
+
+            self._queue = SQLiteQueue(self._persistence.path)
+        # Optional per-task checkouts of the target repository for agents
+        self._workspaces: Optional[RepoWorkspaces] = None
+        if _flag("DSF_WORKSPACES"):
+            self._workspaces = RepoWorkspaces(
+                root=os.getenv("DSF_WORKSPACE_ROOT", "artifacts/workspaces"),
+                fetch_interval=float(os.getenv("DSF_WORKSPACE_FETCH_SECONDS", "30")),
+                max_indexes=int(os.getenv("DSF_WORKSPACE_MAX_INDEXES", "64")),
+            )
+        # Optional memo of agent results keyed by task content (DSF_AGENT_CACHE)
+        self._result_cache: Optional[ResultCache] = None
+        if _flag("DSF_AGENT_CACHE"):
+            self._result_cache = ResultCache(
+                max_entries=int(os.getenv("DSF_AGENT_CACHE_ENTRIES", "1024")),
+                directory=os.getenv("DSF_AGENT_CACHE_DIR", "artifacts/agent-cache") or None,
+                max_bytes=int(os.getenv("DSF_AGENT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            )
+        # Attempts and backoff per agent type before a task is marked FAILED
+        self._retry: Dict[AgentType, RetryPolicy] = retry_policies_from_env(AgentType)
+        # Hedging: duplicate a run that outlasts the DSF_HEDGE_PERCENTILE of its agent type
+        self._hedge = _flag("DSF_HEDGE")
+        self._hedge_percentile = float(os.getenv("DSF_HEDGE_PERCENTILE", "95"))
+        self._latency = LatencyTracker(
+            window=int(os.getenv("DSF_HEDGE_WINDOW", "200")),
+            min_samples=int(os.getenv("DSF_HEDGE_MIN_SAMPLES", "20")),
+        )
+        # Optional sandboxed execution of generated tests (DSF_SANDBOX)
+        self._sandbox = None
+        if _flag("DSF_SANDBOX"):
+            self._sandbox = _load_sandbox_pool().from_env()
+        # Optional similarity index over finished features (DSF_SIMILARITY): flags likely
+        # duplicates at submission and gives agents related earlier work
+        self._memory = None
+        self._duplicate_score = float(os.getenv("DSF_SIMILARITY_DUPLICATE_SCORE", "0.85"))
+        if _flag("DSF_SIMILARITY"):
+            self._memory = _load_feature_memory()(
+                directory=os.getenv("DSF_SIMILARITY_DIR", "artifacts/similarity") or None,
+                dim=int(os.getenv("DSF_SIMILARITY_DIM", "256")),
+            )
+        # Feature ownership: an instance only drives features whose lease it holds, so
+        # several API workers/replicas can share the backlog and resume each other's work.
+        self.instance_id = (
+            os.getenv("DSF_INSTANCE_ID")
+            or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        )
+        self._leases = _load_lease_store(self._persistence, redis_url)
+        self._lease_ttl = float(os.getenv("DSF_LEASE_TTL_SECONDS", "30"))
+        self._max_active_features = int(os.getenv("DSF_MAX_ACTIVE_FEATURES", "50"))
+        self._owned: Dict[str, asyncio.Task] = {}
+        # Running tasks hold a heartbeat lease; the reaper requeues or fails expired ones
+        self._task_lease_ttl = float(os.getenv("DSF_TASK_LEASE_SECONDS", "20"))
+        self._reaper_interval = float(os.getenv("DSF_REAPER_INTERVAL_SECONDS", "10"))
+        self._reaper_task: Optional[asyncio.Task] = None
+        # Retention: finished features older than this move to the archive (0 disables)
+        self._archive_after = float(os.getenv("DSF_ARCHIVE_AFTER_DAYS", "30")) * 86400
+        self._archive_interval = float(os.getenv("DSF_ARCHIVE_INTERVAL_SECONDS", "3600"))
+        self._archive_batch = int(os.getenv("DSF_ARCHIVE_BATCH", "100"))
+        self._retention_task: Optional[asyncio.Task] = None
+        # Decomposition width and run-time estimates for scheduling and ETAs
+        self._max_modules = int(os.getenv("DSF_DECOMPOSE_MAX_MODULES", "8"))
+        self._default_estimate = float(os.getenv("DSF_TASK_ESTIMATE_SECONDS", "60"))
+        # Load shedding for new features (queue depth, in-flight tasks, per-repo quotas)
+        self._admission = AdmissionController(AdmissionLimits.from_env())
+        # Set when a slot frees up (cancel/pause) so the claim loop refills it right away
+        self._claim_wake = asyncio.Event()
+
+    @property
+    def secrets(self) -> SecretsProvider:
+        return self._secrets
+
+    def _github_client_factory(self):
+        from services.orchestrator.integrations.github_cache import ResponseCache
+        from services.orchestrator.integrations.ratelimit import limiter_from_env
+
+        redis_url = self._secrets.get_secret("DSF_REDIS_URL", os.getenv("DSF_REDIS_URL"))
+
+        def limiter(name: str):
+            # Budgets follow tokens, and tokens follow secrets: one limiter per secret
+            # name, so repos on the shared token share one and rotation keeps it
+            if name not in self._github_limiters:
+                self._github_limiters[name] = limiter_from_env(name, redis_url)
+            return self._github_limiters[name]
+
+        self._github_limiter = limiter
+
+        def build(repo: str):
+            name = repo_secret_name(repo)
+            # A repo token not loaded yet is fetched in the background; the client
+            # starts on the shared token and switches when it arrives
+            self._subscribe_rotation(name)
+            token = self._secrets.get_secret(name, os.getenv(name))
+            client = _load_github_client()(
+                repo=repo,
+                token=token or self._github_token,
+                limiter=limiter(name if token else "DSF_GITHUB_TOKEN"),
+                max_connections=int(os.getenv("DSF_GITHUB_MAX_CONNECTIONS", "20")),
+                max_concurrency=int(os.getenv("DSF_GITHUB_CONCURRENCY", "10")),
+                cache=ResponseCache(
+                    max_entries=int(os.getenv("DSF_GITHUB_CACHE_SIZE", "1024")),
+                    ttl=float(os.getenv("DSF_GITHUB_CACHE_TTL", "300")),
+                ),
+            )
+            if not token:
+                self._github_waiting[name] = client
+                # The token may have landed while the client was being built
+                self._adopt_repo_token(name, self._secrets.get_secret(name))
+            return client
+
+        return build
+
+    def _adopt_repo_token(self, name: str, token: Optional[str]) -> None:
+        """Move a client started on the shared token onto its repository's own token."""
+        client = self._github_waiting.pop(name, None) if token else None
+        if client is not None:
+            client.token = token
+            client.limiter = self._github_limiter(name)
+            logging.info("Switched %s to its own GitHub token", client.repo)
+
+    def _subscribe_rotation(self, name: str) -> None:
+        self._rotation_subscriptions.append(name)
+        self._secrets.subscribe(name, self._on_token_rotated)
+
+    def _on_token_rotated(self, name: str, old: Optional[str], new: Optional[str]) -> None:
+        if not new or self._github is None:
+            return
+        if name == "DSF_GITHUB_TOKEN":
+            self._github_token = new
+        elif old is None:
+            self._adopt_repo_token(name, new)
+            return
+        rotated = self._github.rotate_token(old, new)
+        logging.info("Applied rotated %s to %d GitHub client(s)", name, rotated)
 
-    def submit_feature(self, title: str, description: str) -> Feature:
-        feature = Feature(title=title, description=description)
-        tasks, g = basic_decompose(title, description)
+    def _publisher_for(self, feature: Feature) -> ArtifactPublisher:
+        repo = self._github.resolve(feature.repo)
+        if repo not in self._publishers:
+            self._publishers[repo] = ArtifactPublisher(
+                self._github.get(repo), self._persistence, mode=self._publish_mode
+            )
+        return self._publishers[repo]
+
+    def _repo_url(self, feature: Optional[Feature]) -> Optional[str]:
+        repo = feature.repo if feature else None
+        if repo is None and os.getenv("DSF_GIT_URL"):
+            return os.getenv("DSF_GIT_URL")
+        repo = repo or (self._github.default_repo if self._github else None)
+        return f"https://github.com/{repo}.git" if repo else None
+
+    def submit_feature(
+        self,
+        title: str,
+        description: str,
+        repo: Optional[str] = None,
+        admit: bool = False,
+        defer: float = 0.0,
+    ) -> Feature:
+        """Create a feature and its tasks.
+
+        With ``admit`` the submission goes through admission control first: over the
+        limits it raises ``Overloaded``, or with ``defer`` > 0 it is stored DEFERRED
+        and started by the claim loop once pressure allows (it expires after ``defer``
+        seconds).
+        """
+        if self._github is not None:
+            repo = self._github.resolve(repo)
+        feature = Feature(title=title, description=description, repo=repo)
+        tasks, g = decompose(title, description, self._max_modules)
+        for t in tasks:
+            t.estimate = self._estimate(t)
+        if admit:
+            decision = self._admission.decide(self.pressure(), self._tenant(repo), len(tasks))
+            if not decision.admitted:
+                metrics.incr("admission_shed", reason=decision.reason)
+                if defer <= 0:
+                    raise Overloaded(decision)
+                feature.state = FeatureState.DEFERRED
+                feature.admit_by = datetime.utcnow() + timedelta(seconds=defer)
+                metrics.incr("admission_deferred")
         self._features[feature.id] = feature
         self._graphs[feature.id] = g
         for t in tasks:
@@ -62,17 +394,91 @@ class Orchestrator:
             self._persistence.save_feature_with_tasks(feature, tasks)
         return feature
 
+    def _tenant(self, repo: Optional[str]) -> str:
+        default = self._github.default_repo if self._github is not None else None
+        return repo or default or "default"
+
+    def pressure(self) -> Pressure:
+        """Current load that admission control checks new features against."""
+        depth = 0
+        if self._queue is not None and hasattr(self._queue, "depth"):
+            depth = sum(self._queue.depth().values())
+        if self._persistence:
+            inflight = self._persistence.active_task_count()
+            by_repo = self._persistence.unfinished_features_by_repo()
+        else:
+            inflight, by_repo = 0, {}
+            for feature in self._features.values():
+                if feature.state != FeatureState.ACTIVE:
+                    continue
+                left = sum(
+                    1
+                    for tid in feature.task_ids
+                    if self._tasks[tid].status in (TaskStatus.PENDING, TaskStatus.RUNNING)
+                )
+                inflight += left
+                if left:
+                    by_repo[feature.repo] = by_repo.get(feature.repo, 0) + 1
+        tenants: Dict[str, int] = {}
+        for repo, count in by_repo.items():
+            tenant = self._tenant(repo)
+            tenants[tenant] = tenants.get(tenant, 0) + count
+        return Pressure(depth, inflight, tenants, self._admission.drain_rate())
+
+    @property
+    def admission_limits(self) -> AdmissionLimits:
+        return self._admission.limits
+
+    def admission_status(self) -> Dict[str, Any]:
+        deferred = 0
+        if self._persistence:
+            deferred = len(
+                self._persistence.list_features_in_state(FeatureState.DEFERRED, limit=10000)
+            )
+        return {
+            "limits": asdict(self._admission.limits),
+            "pressure": asdict(self.pressure()),
+            "deferred": deferred,
+        }
+
+    async def _admit_deferred(self) -> List[str]:
+        """Start deferred features oldest first while pressure allows; expire stale ones."""
+        if not self._persistence:
+            return []
+        ids = self._persistence.list_features_in_state(FeatureState.DEFERRED, limit=100)
+        if not ids:
+            return []
+        pressure = self.pressure()
+        now = datetime.utcnow()
+        admitted: List[str] = []
+        for feature_id in ids:
+            feature = self._persistence.get_feature(feature_id)
+            if feature is None or feature.state != FeatureState.DEFERRED:
+                continue
+            if feature.admit_by is not None and feature.admit_by <= now:
+                logging.warning("Deferred feature %s expired before admission", feature_id)
+                metrics.incr("admission_expired")
+                await self._halt(feature_id, FeatureState.CANCELLED)
+                continue
+            tenant, cost = self._tenant(feature.repo), len(feature.task_ids)
+            if not self._admission.decide(pressure, tenant, cost).admitted:
+                continue
+            self._set_state(feature, FeatureState.ACTIVE)
+            self._features[feature_id] = feature
+            pressure.inflight_tasks += cost
+            pressure.tenants[tenant] = pressure.tenants.get(tenant, 0) + 1
+            admitted.append(feature_id)
+        if admitted:
+            metrics.incr("admission_deferred_admitted", len(admitted))
+        return admitted
+
     def get_feature(self, feature_id: str) -> Optional[Feature]:
         if self._persistence:
             feat = self._persistence.get_feature(feature_id)
             if feat:
                 # Ensure in-memory graph exists if loaded later (rebuild minimal graph)
                 if feature_id not in self._graphs:
-                    g = nx.DiGraph()
-                    for t in self._persistence.list_tasks(feature_id):
-                        g.add_node(t.id, task=t)
-                        for dep in t.depends_on:
-                            g.add_edge(dep, t.id)
+                    g = build_graph(self._persistence.list_tasks(feature_id))
                     self._graphs[feature_id] = g
                     self._tasks.update(
                         {
@@ -95,63 +501,742 @@ class Orchestrator:
             return tasks
         return [self._tasks[tid] for tid in feat.task_ids]
 
+    @staticmethod
+    def _lease_key(feature_id: str) -> str:
+        return f"feature:{feature_id}"
+
+    def has_capacity(self) -> bool:
+        return len(self._owned) < self._max_active_features
+
     async def run_feature(self, feature_id: str):
-        g = self._graphs[feature_id]
-        # Run tasks respecting dependencies
-        pending = set(g.nodes())
-        while pending:
-            runnable = [
-                n
-                for n in list(pending)
-                if all(self._tasks[d].status == TaskStatus.DONE for d in g.predecessors(n))
-            ]
-            if not runnable:
-                # Detect deadlock if any task failed
-                failures = [n for n in pending if self._tasks[n].status == TaskStatus.FAILED]
-                if failures:
-                    break
-                # Otherwise wait a bit for running tasks
-                await asyncio.sleep(0.05)
+        """Drive ``feature_id`` to completion unless another instance holds its lease."""
+        if feature_id in self._owned:
+            return
+        if not self._leases.acquire(self._lease_key(feature_id), self.instance_id, self._lease_ttl):
+            logging.info("Feature %s is owned by %s", feature_id, self.lease_owner(feature_id))
+            return
+        self._owned[feature_id] = asyncio.current_task()
+        await self._run_owned_feature(feature_id)
+
+    def resume_feature(self, feature_id: str) -> List[str]:
+        """Reactivate a paused feature and reset FAILED tasks and everything downstream
+        of them to PENDING.
+
+        DONE tasks keep their results, so driving the feature again only re-runs the
+        failed subtree. Returns the reset task ids. Raises RuntimeError while the
+        feature is still being driven or once it was cancelled.
+        """
+        feature = self.get_feature(feature_id)
+        if feature is not None and feature.state == FeatureState.CANCELLED:
+            raise RuntimeError("Feature was cancelled")
+        if feature_id in self._owned or self.lease_owner(feature_id):
+            raise RuntimeError("Feature is still running")
+        if feature is not None and feature.state != FeatureState.ACTIVE:
+            self._set_state(feature, FeatureState.ACTIVE)
+        tasks = {t.id: t for t in self.list_tasks(feature_id)}
+        failed = [tid for tid, t in tasks.items() if t.status == TaskStatus.FAILED]
+        subtree = downstream(self._graphs[feature_id], failed)
+        reset = [tid for tid in tasks if tid in subtree and tasks[tid].status != TaskStatus.DONE]
+        for tid in reset:
+            task = tasks[tid]
+            task.status = TaskStatus.PENDING
+            task.result = None
+            task.attempts = 0
+            task.queued_at = task.started_at = task.finished_at = None
+            self._tasks[tid] = task
+            if self._persistence:
+                self._persistence.update_task(task)
+        return reset
+
+    async def cancel_feature(self, feature_id: str) -> List[str]:
+        """Stop ``feature_id`` for good: in-flight agent runs are cancelled, its queued
+        tasks are purged and every unfinished task becomes CANCELLED.
+
+        Returns the ids of the tasks that were cancelled.
+        """
+        return await self._halt(feature_id, FeatureState.CANCELLED)
+
+    async def pause_feature(self, feature_id: str) -> List[str]:
+        """Stop driving ``feature_id`` until ``resume_feature``.
+
+        In-flight agent runs are cancelled and their tasks go back to PENDING (DONE
+        results are kept). Returns the ids of the tasks that were interrupted.
+        """
+        return await self._halt(feature_id, FeatureState.PAUSED)
+
+    async def _halt(self, feature_id: str, state: FeatureState) -> List[str]:
+        feature = self.get_feature(feature_id)
+        if feature is None:
+            raise KeyError(feature_id)
+        if feature.state == FeatureState.CANCELLED:
+            raise RuntimeError("Feature was cancelled")
+        # Persist first: a driver on another instance (or a queue worker) sees it and stops
+        self._set_state(feature, state)
+        driver = self._owned.get(feature_id)
+        if driver is not None and driver is not asyncio.current_task():
+            # Cancelling the driver cancels the agent coroutines it awaits; its lease
+            # and scheduler slot are released as it unwinds
+            driver.cancel()
+            await asyncio.gather(driver, return_exceptions=True)
+        stopped: List[str] = []
+        for task in self.list_tasks(feature_id):
+            if task.status not in (TaskStatus.PENDING, TaskStatus.RUNNING):
                 continue
+            if self._queue is not None and task.status == TaskStatus.PENDING:
+                self._queue.remove(_queue_message(task.id, feature.repo), shard=feature.repo)
+            if state == FeatureState.CANCELLED:
+                task.status = TaskStatus.CANCELLED
+                task.finished_at = time.time()
+            elif task.status == TaskStatus.RUNNING:
+                task.status = TaskStatus.PENDING
+            else:
+                continue
+            stopped.append(task.id)
+            self._tasks[task.id] = task
+            if self._persistence:
+                self._persistence.update_task(task)
+        metrics.incr("features_halted", state=state.value)
+        self._claim_wake.set()
+        return stopped
+
+    def _set_state(self, feature: Feature, state: FeatureState) -> None:
+        feature.state = state
+        if self._persistence:
+            self._persistence.set_feature_state(feature.id, state)
+
+    def _is_active(self, feature_id: str) -> bool:
+        """Whether ``feature_id`` should still be driven (re-read so other instances' halts count)."""
+        feature = self._persistence.get_feature(feature_id) if self._persistence else None
+        feature = feature or self._features.get(feature_id)
+        return feature is not None and feature.state == FeatureState.ACTIVE
+
+    def handle_push(self, repo: Optional[str], ref: str, after: Optional[str]) -> None:
+        """Push webhook: keep the repo client's default-branch sha and ref cache current."""
+        if self._github is None:
+            return
+        client = self._github.peek(repo or self._github.default_repo or "")
+        if client is not None:
+            client.note_push(ref, after)
+
+    def lease_owner(self, feature_id: str) -> Optional[str]:
+        return self._leases.owner(self._lease_key(feature_id))
+
+    async def claim_once(self) -> List[str]:
+        """Take over unfinished features with no live lease, up to this instance's capacity."""
+        if not self._persistence:
+            return []
+        await self._admit_deferred()
+        claimed: List[str] = []
+        offset = 0
+        while self.has_capacity():
+            batch = self._persistence.list_unfinished_features(limit=100, offset=offset)
+            if not batch:
+                break
+            offset += len(batch)
+            for feature_id in batch:
+                if not self.has_capacity():
+                    break
+                if feature_id in self._owned:
+                    continue
+                if self._leases.acquire(
+                    self._lease_key(feature_id), self.instance_id, self._lease_ttl
+                ):
+                    self._owned[feature_id] = asyncio.create_task(
+                        self._run_owned_feature(feature_id)
+                    )
+                    claimed.append(feature_id)
+        return claimed
 
-            if self._queue is None:
-                # Run all runnable tasks concurrently inline
-                await asyncio.gather(*(self._run_task(n) for n in runnable))
+    async def claim_loop(self, interval: Optional[float] = None) -> None:
+        interval = interval or float(os.getenv("DSF_CLAIM_INTERVAL_SECONDS", "5"))
+        self._wake_relay()  # deliver what a previous run left in the outbox
+        if self._persistence and self._reaper_task is None:
+            self._reaper_task = asyncio.create_task(self.reaper_loop())
+        if self._persistence and self._archive_after > 0 and self._retention_task is None:
+            self._retention_task = asyncio.create_task(self.retention_loop())
+        while True:
+            try:
+                claimed = await self.claim_once()
+                if claimed:
+                    logging.info("Instance %s claimed features %s", self.instance_id, claimed)
+            except Exception as e:
+                logging.error("Feature claim failed: %s", e)
+            # Jitter so replicas polling the same backlog do not claim in lockstep; a freed
+            # slot (cancel/pause) wakes the loop early
+            self._claim_wake.clear()
+            try:
+                await asyncio.wait_for(
+                    self._claim_wake.wait(), interval * random.uniform(0.5, 1.5)  # nosec B311
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def reap_once(self) -> List[str]:
+        """Recover RUNNING tasks whose worker stopped heartbeating (crashed or killed).
+
+        Each goes back to PENDING, and onto the queue in queue mode, while its retry
+        policy has attempts left; otherwise it is marked FAILED. Returns the reaped ids.
+        """
+        if not self._persistence:
+            return []
+        now = time.time()
+        reaped: List[str] = []
+        for task_id, feature_id in self._persistence.expired_task_leases(now):
+            task = self._persistence.get_task(task_id)
+            if task is None:
+                continue
+            policy = self._retry.get(task.agent_type, RetryPolicy())
+            if task.attempts >= policy.max_attempts:
+                status, result = TaskStatus.FAILED, "error: worker stopped heartbeating"
             else:
-                # Enqueue runnable tasks
-                import json as _json
+                status, result = TaskStatus.PENDING, None
+            if not self._persistence.reap_task(task_id, now, status, result):
+                continue  # finished, renewed or reaped elsewhere in the meantime
+            logging.warning("Reaped task %s with an expired lease: now %s", task_id, status.value)
+            action = "failed" if status == TaskStatus.FAILED else "requeued"
+            metrics.incr("tasks_reaped", action=action, agent=task.agent_type.value)
+            if task_id in self._tasks:
+                self._tasks[task_id].status, self._tasks[task_id].result = status, result
+            if self._queue is not None and status == TaskStatus.PENDING:
+                feature = self._persistence.get_feature(feature_id)
+                repo = feature.repo if feature is not None else None
+                self._mark_queued([task_id])
+                self._queue.enqueue(_queue_message(task_id, repo), shard=repo)
+            reaped.append(task_id)
+        return reaped
+
+    async def reaper_loop(self) -> None:
+        while True:
+            try:
+                self.reap_once()
+            except Exception as e:
+                logging.error("Task reaper failed: %s", e)
+            await asyncio.sleep(self._reaper_interval)
+
+    async def archive_once(self, older_than: Optional[float] = None) -> List[str]:
+        """Move features finished more than ``older_than`` seconds ago (default
+        ``DSF_ARCHIVE_AFTER_DAYS``) out of the hot tables, a batch per transaction, and
+        hand the freed pages back with an incremental VACUUM. Returns the archived ids.
+        """
+        if not self._persistence:
+            return []
+        cutoff = time.time() - (self._archive_after if older_than is None else older_than)
+        archived: List[str] = []
+        while True:
+            batch = self._persistence.archive_features(cutoff, self._archive_batch)
+            for feature_id in batch:
+                self._features.pop(feature_id, None)
+                graph = self._graphs.pop(feature_id, None)
+                for task_id in graph.nodes() if graph is not None else ():
+                    self._tasks.pop(task_id, None)
+            archived += batch
+            if batch:
+                self._persistence.compact()
+            if len(batch) < self._archive_batch:
+                break
+            await asyncio.sleep(0)  # let requests in between batches
+        if archived:
+            metrics.incr("features_archived", len(archived))
+            logging.info("Archived %d finished features", len(archived))
+        return archived
+
+    async def retention_loop(self) -> None:
+        while True:
+            try:
+                # Held for a whole interval, so one instance runs each pass
+                if self._leases.acquire("retention", self.instance_id, self._archive_interval):
+                    await self.archive_once()
+            except Exception as e:
+                logging.error("Retention pass failed: %s", e)
+            await asyncio.sleep(self._archive_interval)
+
+    async def start(self) -> None:
+        """Warm the agent pools (and sandbox workers) ahead of the first task (optional)."""
+        await self._agent_pools.start()
+        if self._sandbox is not None:
+            await self._sandbox.start()
+
+    def agent_stats(self) -> Dict[str, Dict[str, float]]:
+        return self._agent_pools.stats()
+
+    async def aclose(self) -> None:
+        """Stop driving owned features and release their leases for other instances."""
+        drivers = list(self._owned.values())
+        if self._reaper_task is not None:
+            drivers.append(self._reaper_task)
+            self._reaper_task = None
+        if self._retention_task is not None:
+            drivers.append(self._retention_task)
+            self._retention_task = None
+        for driver in drivers:
+            driver.cancel()
+        await asyncio.gather(*drivers, return_exceptions=True)
+        await self._agent_pools.aclose()
+        if self._sandbox is not None:
+            await self._sandbox.aclose()
+        if self._relay is not None:
+            # Best effort: whatever is not delivered stays in the outbox for the next start
+            try:
+                await asyncio.wait_for(
+                    self.flush_outbox(), float(os.getenv("DSF_OUTBOX_DRAIN_SECONDS", "5"))
+                )
+            except Exception as e:
+                logging.warning("Outbox not fully drained on shutdown: %s", e)
+        if self._relay_task is not None:
+            self._relay_task.cancel()
+            await asyncio.gather(self._relay_task, return_exceptions=True)
+            self._relay_task = None
+        for name in self._rotation_subscriptions:
+            self._secrets.unsubscribe(name, self._on_token_rotated)
+        if self._github is not None:
+            await self._github.aclose()
+
+    async def _run_owned_feature(self, feature_id: str) -> None:
+        key = self._lease_key(feature_id)
+        lost = asyncio.Event()
+        renewer = asyncio.create_task(self._keep_lease(key, asyncio.current_task(), lost))
+        try:
+            await self._drive_feature(feature_id)
+        except asyncio.CancelledError:
+            if not lost.is_set():
+                raise
+            logging.warning("Lost lease on feature %s; leaving it to its new owner", feature_id)
+        finally:
+            renewer.cancel()
+            self._owned.pop(feature_id, None)
+            if not lost.is_set():
+                self._leases.release(key, self.instance_id)
+
+    async def _keep_lease(self, key: str, driver: asyncio.Task, lost: asyncio.Event) -> None:
+        while True:
+            await asyncio.sleep(self._lease_ttl / 3)
+            if not self._leases.renew(key, self.instance_id, self._lease_ttl):
+                lost.set()
+                driver.cancel()
+                return
 
+    async def _drive_feature(self, feature_id: str) -> None:
+        if self.get_feature(feature_id) is None:
+            return
+        g = self._graphs[feature_id]
+        # Start from the stored state so a new owner resumes where the previous one stopped
+        for t in self.list_tasks(feature_id):
+            if t.status == TaskStatus.RUNNING and self._queue is None:
+                # Inline tasks only run under the lease holder, so these were orphaned
+                t.status = TaskStatus.PENDING
+                if self._persistence:
+                    self._persistence.update_task(t)
+        # Start each task as soon as its dependencies are done, longest remaining path
+        # first, so the critical path gets agents (and queue slots) ahead of side branches
+        priority = remaining_path(g, lambda t: self._estimate(self._tasks[t.id]))
+        pending = {n for n in g.nodes() if self._tasks[n].status != TaskStatus.DONE}
+        # Started tasks: the inline coroutine, or None once enqueued for a worker
+        started: Dict[str, Optional[asyncio.Task]] = {}
+        finished = (TaskStatus.DONE, TaskStatus.FAILED, TaskStatus.CANCELLED)
+        try:
+            while pending:
+                if not self._is_active(feature_id):
+                    return
+                if self._queue is not None:
+                    self.list_tasks(feature_id)  # pick up the workers' progress
+                for n, runner in list(started.items()):
+                    if runner is None:
+                        if self._tasks[n].status not in finished:
+                            continue
+                        if self._tasks[n].status == TaskStatus.DONE:
+                            self._admission.record_completion()
+                    elif runner.done():
+                        runner.result()
+                    else:
+                        continue
+                    del started[n]
+                    pending.discard(n)
+                runnable = sorted(
+                    (
+                        n
+                        for n in pending
+                        if n not in started
+                        and all(self._tasks[d].status == TaskStatus.DONE for d in g.predecessors(n))
+                    ),
+                    key=priority.__getitem__,
+                    reverse=True,
+                )
+                repo = self._features[feature_id].repo
+                self._mark_queued(
+                    [
+                        n
+                        for n in runnable
+                        if self._queue is None or self._tasks[n].status == TaskStatus.PENDING
+                    ]
+                )
                 for n in runnable:
-                    self._queue.enqueue(_json.dumps({"task_id": n}))
-                # Poll for completion
-                while True:
-                    tasks = {t.id: t for t in self.list_tasks(feature_id)}
-                    if all(
-                        tasks[n].status in (TaskStatus.DONE, TaskStatus.FAILED) for n in runnable
-                    ):
-                        break
+                    if self._queue is None:
+                        started[n] = asyncio.create_task(self._run_task(n))
+                        continue
+                    if self._tasks[n].status == TaskStatus.PENDING:
+                        # Sharded by repository so one busy repo cannot starve the rest
+                        self._queue.enqueue(_queue_message(n, repo), shard=repo)
+                    started[n] = None
+                if not started:
+                    # Nothing running and nothing ready: the rest waits on a failure
+                    break
+                runners = [r for r in started.values() if r is not None]
+                if runners:
+                    await asyncio.wait(runners, timeout=1.0, return_when=asyncio.FIRST_COMPLETED)
+                else:
                     await asyncio.sleep(0.1)
-            for n in runnable:
-                pending.discard(n)
+        finally:
+            runners = [r for r in started.values() if r is not None and not r.done()]
+            for runner in runners:
+                runner.cancel()
+            await asyncio.gather(*runners, return_exceptions=True)
+        if self._memory is not None and not pending:
+            feature = self._features[feature_id]
+            tasks = [self._tasks[n] for n in feature.task_ids]
+            if all(t.status == TaskStatus.DONE for t in tasks):
+                await asyncio.to_thread(self._memory.record, feature, tasks)
+
+    def similar_features(
+        self, title: str, description: str, k: int = 5, exclude: Optional[str] = None
+    ) -> List[Tuple[str, float, str]]:
+        """``(feature_id, score, title)`` of the most similar finished features."""
+        if self._memory is None:
+            return []
+        matches = self._memory.similar_features(title, description, k, exclude=exclude)
+        return [(m.key, m.score, m.meta.get("title", "")) for m in matches]
+
+    def likely_duplicates(self, feature: Feature) -> List[Tuple[str, float, str]]:
+        """Finished features scoring at least ``DSF_SIMILARITY_DUPLICATE_SCORE``."""
+        found = [
+            match
+            for match in self.similar_features(feature.title, feature.description, 3)
+            if match[1] >= self._duplicate_score
+        ]
+        if found:
+            metrics.incr("features_flagged_duplicate")
+            logging.info("Feature %s looks like a duplicate of %s", feature.id, found[0][0])
+        return found
+
+    def _estimate(self, task: Task) -> float:
+        """Expected run time of ``task`` in seconds: its stored estimate, else the recent
+        median for its agent type, else ``DSF_TASK_ESTIMATE_SECONDS``."""
+        if task.estimate is not None:
+            return task.estimate
+        median = self._latency.percentile(task.agent_type, 50)
+        return median if median is not None else self._default_estimate
+
+    async def run_queued_task(self, task_id: str, repo: Optional[str] = None) -> None:
+        """Run a task taken off the queue, loading its feature from the store first.
+
+        Workers never saw the submission, so the task, its graph and its feature (and
+        with it the repository to publish to) all come from persistence.
+        """
+        feature_id = self._persistence.get_task_feature(task_id) if self._persistence else None
+        if feature_id is None:
+            feature_id = next((f for f, g in self._graphs.items() if task_id in g.nodes), None)
+        feature = self.get_feature(feature_id) if feature_id else None
+        if feature is None or task_id not in self._tasks:
+            logging.warning("Dropping queued task %s: not in the store", task_id)
+            metrics.incr("queue_unknown_tasks")
+            return
+        if repo and feature.repo and repo != feature.repo:
+            logging.warning(
+                "Task %s was queued for %s but belongs to %s", task_id, repo, feature.repo
+            )
+        await self._run_task(task_id)
 
     async def _run_task(self, task_id: str):
         task = self._tasks[task_id]
-        if task.status in (TaskStatus.DONE, TaskStatus.RUNNING):
+        if self._persistence and self._queue is not None:
+            # Workers and reapers in other processes change tasks behind our back
+            task = self._tasks[task_id] = self._persistence.get_task(task_id) or task
+        if task.status in (TaskStatus.DONE, TaskStatus.RUNNING, TaskStatus.CANCELLED):
             return
+        feature_id = self._feature_of(task_id)
+        if feature_id and not self._is_active(feature_id):
+            return  # dequeued before its feature was paused or cancelled
         task.status = TaskStatus.RUNNING
+        task.started_at, task.finished_at = time.time(), None
+        heartbeat = None
+        if self._persistence:
+            self._persistence.start_task(task, self.instance_id, time.time() + self._task_lease_ttl)
+            heartbeat = asyncio.create_task(self._heartbeat(task.id))
         try:
-            agent = self._agents[task.agent_type]
-            result = await agent.run(task)
+            policy = self._retry.get(task.agent_type, RetryPolicy())
+            while True:
+                task.attempts += 1
+                try:
+                    result = await self._attempt_task(task)
+                    break
+                except Exception as e:
+                    if task.attempts >= policy.max_attempts:
+                        raise
+                    delay = policy.delay(task.attempts)
+                    logging.warning(
+                        "Task %s attempt %d failed (%s); retrying in %.1fs",
+                        task.id,
+                        task.attempts,
+                        e,
+                        delay,
+                    )
+                    metrics.incr("task_retries", agent=task.agent_type.value)
+                    if self._persistence:
+                        self._persistence.update_task(task)  # checkpoint the attempt count
+                    await asyncio.sleep(delay)
             task.result = result
             task.status = TaskStatus.DONE
+            task.finished_at = time.time()
+            self._admission.record_completion()
+            events = self._completion_events(task)
             if self._persistence:
-                self._persistence.update_task(task)
-            await self._on_task_completed(task)
+                self._persistence.update_task(task, outbox=events)
+            elif events:
+                self._outbox.add(events)
+            if events:
+                self._wake_relay()
         except Exception as e:
             task.result = f"error: {e}"
             task.status = TaskStatus.FAILED
+            task.finished_at = time.time()
             if self._persistence:
                 self._persistence.update_task(task)
+        finally:
+            # A status read (list_tasks) while this ran swapped in a copy loaded before
+            # the update; the driver must see this object's final status
+            self._tasks[task.id] = task
+            if heartbeat is not None:
+                heartbeat.cancel()
+            self._output.end(task.id)
+
+    def _mark_queued(self, task_ids: List[str]) -> None:
+        """Stamp ``task_ids`` as handed to a runner or the queue (start of queue wait)."""
+        if not task_ids:
+            return
+        now = time.time()
+        for tid in task_ids:
+            if tid in self._tasks:
+                self._tasks[tid].queued_at = now
+        if self._persistence:
+            self._persistence.mark_tasks_queued(task_ids, now)
+
+    async def _heartbeat(self, task_id: str) -> None:
+        """Renew the lease of a running task so the reaper leaves it alone."""
+        while True:
+            await asyncio.sleep(self._task_lease_ttl / 3)
+            try:
+                renewed = self._persistence.renew_task_lease(
+                    task_id, self.instance_id, time.time() + self._task_lease_ttl
+                )
+            except Exception as e:
+                logging.warning("Heartbeat for task %s failed: %s", task_id, e)
+                continue
+            if not renewed:
+                # Reaped while we were stalled; its result will be overwritten by the rerun
+                logging.warning("Lost the lease on task %s", task_id)
+                metrics.incr("task_leases_lost")
+                return
+
+    async def _attempt_task(self, task: Task) -> str:
+        """One attempt: check out a workspace, then serve from cache or run the agent."""
+        feature_id = self._feature_of(task.id)
+        url = self._repo_url(self._features.get(feature_id)) if self._workspaces else None
+        workspace = None
+        if url is not None:
+            workspace = await self._workspaces.acheckout(url, task.id, token=self._token_for(url))
+        self._output.begin(task.id)
+        try:
+            key = self._cache_key(task, workspace)
+            result = await self._result_cache.aget(key) if key else None
+            if result is None:
+                result = await self._run_agent(task, workspace)
+                await self._verify(task, result, workspace)
+                if key:
+                    await self._result_cache.aput(key, result)
+            else:
+                self._output.append(task.id, result)
+            return result
+        finally:
+            if workspace is not None:
+                await self._workspaces.arelease(url, workspace)
+
+    async def _run_agent(self, task: Task, workspace) -> str:
+        """Lease an agent and run ``task``, hedging with a second instance if it straggles."""
+        kind = task.agent_type
+        pool = self._agent_pools[kind]
+
+        async def attempt(live: bool) -> str:
+            async with self._agent_pools.lease(kind) as agent:
+                if self._memory is not None:
+                    agent.retriever = self._memory.related_work
+                return await self._stream_agent(agent, task, workspace, live=live)
+
+        started = time.monotonic()
+        delay = self._latency.percentile(kind, self._hedge_percentile) if self._hedge else None
+        if delay is None:
+            result = await attempt(True)
+            hedge, hedge_won = False, False
+        else:
+            # Only hedge onto an idle instance; queueing the duplicate would not help
+            result, hedge, hedge_won = await hedged(
+                lambda: attempt(True), lambda: attempt(False), delay, lambda: pool.idle > 0
+            )
+        self._latency.record(kind, time.monotonic() - started)
+        runs = metrics.incr("agent_runs", agent=kind.value)
+        if hedge:
+            metrics.incr("agent_hedges", agent=kind.value)
+        if hedge_won:
+            metrics.incr("agent_hedge_wins", agent=kind.value)
+            # The duplicate ran silently; its output replaces the straggler's partial log
+            self._output.begin(task.id)
+            self._output.append(task.id, result)
+        metrics.set(
+            "agent_hedge_rate",
+            metrics.counter("agent_hedges", agent=kind.value) / runs,
+            agent=kind.value,
+        )
+        return result
+
+    async def _stream_agent(self, agent, task: Task, workspace, live: bool = True) -> str:
+        """Run ``agent`` on ``task``; returns the result.
+
+        With ``live`` each chunk is logged as it arrives; hedged duplicates run silent.
+        """
+        started = time.monotonic()
+        chunks: List[str] = []
+        stream = agent.stream(task) if workspace is None else agent.stream(task, workspace)
+        async for chunk in stream:
+            if not chunk:
+                continue
+            if not live:
+                chunks.append(chunk)
+                continue
+            if not chunks:
+                metrics.observe(
+                    "agent_first_output_seconds",
+                    time.monotonic() - started,
+                    agent=task.agent_type.value,
+                )
+            chunks.append(chunk)
+            self._output.append(task.id, chunk)
+        return "".join(chunks)
+
+    async def _verify(self, task: Task, result: str, workspace) -> None:
+        """Run generated tests in the sandbox; raises when they fail."""
+        if self._sandbox is None or task.agent_type != AgentType.TEST:
+            return
+        paths = [workspace.path] if workspace is not None else []
+        outcome = await self._sandbox.run_pytest(result, paths=paths)
+        label = "timeout" if outcome.timed_out else "passed" if outcome.ok else "failed"
+        metrics.incr("sandbox_runs", outcome=label)
+        metrics.observe("sandbox_seconds", outcome.duration_ms / 1000)
+        if not outcome.ok:
+            tail = (outcome.stdout + outcome.stderr)[-2000:]
+            raise RuntimeError(f"generated tests {label} (exit {outcome.returncode}):\n{tail}")
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        if self._persistence:
+            return self._persistence.get_task(task_id)
+        return self._tasks.get(task_id)
+
+    def task_events(self, task_id: str) -> List[TaskEvent]:
+        """Lifecycle transitions of ``task_id``, oldest first (empty without the database)."""
+        return self._persistence.list_task_events(task_id) if self._persistence else []
+
+    def latency_analytics(
+        self,
+        window: str = "24h",
+        group_by: Sequence[str] = ("agent_type",),
+        agent_type: Optional[str] = None,
+        repo: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Latency percentiles and outcome counts over the last ``window``, per group.
+
+        Read from the hourly rollups, so the window is rounded out to whole hours and
+        the cost does not grow with the task history. ``feature_lead`` is not split by
+        agent type (it is reported under ``agent_type`` "").
+        """
+        if self._persistence is None:
+            raise RuntimeError("Latency analytics need the SQLite database (DSF_DB=sqlite)")
+        until = time.time() if now is None else now
+        since = until - parse_window(window)
+        dims = list(group_by)
+        args = (since, until, dims, agent_type, repo)
+        groups: Dict[Tuple, Dict[str, Any]] = {}
+        bins: Dict[Tuple, Dict[str, List[Tuple[int, int]]]] = {}
+        totals: Dict[Tuple, Dict[str, float]] = {}
+
+        def group(row: Dict[str, Any]) -> Tuple:
+            key = tuple(row[d] for d in dims)
+            if key not in groups:
+                labels = {d: row[d] for d in dims}
+                if "repo" in labels:
+                    labels["repo"] = labels["repo"] or None  # "" is the default repository
+                groups[key] = {**labels, "latency": {}, "outcomes": {}}
+                bins[key], totals[key] = {}, {}
+            return key
+
+        for row in self._persistence.latency_rollups(*args):
+            key = group(row)
+            bins[key].setdefault(row["metric"], []).append((row["bin"], row["count"]))
+            totals[key][row["metric"]] = totals[key].get(row["metric"], 0.0) + row["total"]
+        for row in self._persistence.task_outcomes(*args):
+            groups[group(row)]["outcomes"][row["status"]] = row["count"]
+        for key, g in groups.items():
+            g["latency"] = {
+                m: summarize(bins[key][m], totals[key][m]) for m in METRICS if m in bins[key]
+            }
+        return {
+            "window": window,
+            "since": bucket_of(since),
+            "until": until,
+            "bucket_seconds": BUCKET_SECONDS,
+            "group_by": dims,
+            "groups": [groups[k] for k in sorted(groups, key=lambda k: tuple(map(str, k)))],
+        }
+
+    def task_output(self, task_id: str, after: int = 0) -> List[str]:
+        """Output chunks of ``task_id`` so far, from sequence number ``after`` on."""
+        return self._output.read(task_id, after)
+
+    async def follow_output(
+        self, task_id: str, after: int = 0, poll: float = 1.0
+    ) -> AsyncIterator[Tuple[int, str]]:
+        """Yield ``(seq, chunk)`` as output arrives until the task is done, failed or cancelled.
+
+        Local runs wake followers immediately; output written by other processes
+        (queue workers) is picked up every ``poll`` seconds.
+        """
+        seq = after
+        while True:
+            task = self.get_task(task_id)
+            chunks = self.task_output(task_id, seq)
+            for chunk in chunks:
+                yield seq, chunk
+                seq += 1
+            if task is None or task.status in (
+                TaskStatus.DONE,
+                TaskStatus.FAILED,
+                TaskStatus.CANCELLED,
+            ):
+                if not chunks:
+                    return
+                continue  # drain anything written between the two reads
+            await self._output.wait(task_id, poll)
+
+    def _cache_key(self, task: Task, workspace) -> Optional[str]:
+        """Result-cache key for ``task``, or None when caching is off."""
+        if self._result_cache is None:
+            return None
+        pool = self._agent_pools[task.agent_type]
+        deps = [self._tasks[d] for d in task.depends_on if d in self._tasks]
+        return task_fingerprint(
+            task,
+            deps,
+            agent=pool.name,
+            version=pool.version,
+            context=workspace.commit if workspace is not None else None,
+        )
 
     def feature_status(self, feature_id: str):
         from services.orchestrator.app.schemas import FeatureStatusOut, TaskOut
@@ -161,79 +1246,109 @@ class Orchestrator:
         completed = sum(1 for t in tasks if t.status == TaskStatus.DONE)
         running = sum(1 for t in tasks if t.status == TaskStatus.RUNNING)
         failed = sum(1 for t in tasks if t.status == TaskStatus.FAILED)
-        pending = total - completed - running - failed
+        cancelled = sum(1 for t in tasks if t.status == TaskStatus.CANCELLED)
+        pending = total - completed - running - failed - cancelled
+        feature = self._features.get(feature_id)
+        state = feature.state if feature is not None else FeatureState.ACTIVE
+        # Critical-path ETA: the longest chain of unfinished tasks, by estimated run time
+        by_id = {t.id: t for t in tasks}
+        g = self._graphs.get(feature_id)
+        eta, path = 0.0, []
+        if g is not None and completed < total:
+            remaining = remaining_path(
+                g,
+                lambda t: (
+                    0.0 if by_id[t.id].status == TaskStatus.DONE else self._estimate(by_id[t.id])
+                ),
+            )
+            eta = max(remaining.values())
+            path = [n for n in critical_path(g, remaining) if by_id[n].status != TaskStatus.DONE]
         return FeatureStatusOut(
             id=feature_id,
             status=(
                 "done"
                 if completed == total
-                else "running" if completed > 0 or running > 0 else "pending"
+                else (
+                    state.value
+                    if state != FeatureState.ACTIVE
+                    else "running" if completed > 0 or running > 0 else "pending"
+                )
             ),
             completed=completed,
             total=total,
             running=running,
             pending=pending,
             failed=failed,
+            cancelled=cancelled,
+            eta_seconds=eta,
+            critical_path=path,
             tasks=[TaskOut.model_validate(t.model_dump()) for t in tasks],
         )
 
-    async def _on_task_completed(self, task: Task) -> None:
-        """Optional GitHub branch/PR creation for completed tasks."""
-        if not self._github:
-            return
+    def _feature_of(self, task_id: str) -> Optional[str]:
         # Find feature id via reverse lookup
-        feature_id = None
         for fid, feat in self._features.items():
-            if task.id in feat.task_ids:
-                feature_id = fid
-                break
+            if task_id in feat.task_ids:
+                return fid
+        return None
+
+    def _completion_events(self, task: Task) -> List[OutboxEvent]:
+        """Outbox events due now that ``task`` is done, per the publish mode."""
+        if self._github is None:
+            return []
+        feature_id = self._feature_of(task.id)
         if not feature_id:
-            return
-        branch = f"dsf/{feature_id}/{task.id}"
-        # Skip if PR already recorded
+            return []
+        if self._publish_mode == "task":
+            return [
+                OutboxEvent(
+                    key=f"task:{task.id}",
+                    feature_id=feature_id,
+                    kind="task",
+                    payload={"task_id": task.id},
+                )
+            ]
+        levels = task_levels(self._graphs[feature_id])
+
+        def finished(ids) -> bool:
+            return all(n == task.id or self._tasks[n].status == TaskStatus.DONE for n in ids)
+
+        if self._publish_mode == "level":
+            index = next(i for i, level in enumerate(levels, start=1) if task.id in level)
+            if finished(levels[index - 1]):
+                return [
+                    OutboxEvent(
+                        key=f"level:{feature_id}:{index}", feature_id=feature_id, kind="level"
+                    )
+                ]
+        elif finished([n for level in levels for n in level]):
+            return [OutboxEvent(key=f"feature:{feature_id}", feature_id=feature_id, kind="feature")]
+        return []
+
+    def _token_for(self, url: str) -> Optional[str]:
+        if self._github is None or not url.startswith("https://github.com/"):
+            return None
+        repo = url.removeprefix("https://github.com/").removesuffix(".git")
+        return getattr(self._github.get(repo), "token", self._github_token)
+
+    def _stored_feature(self, feature_id: str) -> Tuple[Optional[Feature], List[Task]]:
+        """Feature and tasks as persisted, without touching the state drivers work on."""
         if self._persistence:
-            existing = self._persistence.get_task_pr(task.id)
-            if existing:
-                return
-        try:
-            # Create branch if missing
-            try:
-                self._github.create_branch(branch)
-            except Exception as e:
-                # Branch may already exist or other recoverable error
-                logging.warning("GitHub branch creation skipped: %s", e)
-            # Commit task result as artifact file
-            path = f"artifacts/agents/{feature_id}/{task.id}.txt"
-            title = f"DSF: {task.title} [{task.agent_type.value}]"
-            self._github.create_or_update_file(
-                path=path,
-                content=task.result or "",
-                message=title,
-                branch=branch,
+            return (
+                self._persistence.get_feature(feature_id),
+                self._persistence.list_tasks(feature_id),
             )
-            # Create PR
-            pr_num = self._github.create_pull_request(
-                branch=branch, title=title, body="Automated by DSF"
-            )
-            if self._persistence:
-                self._persistence.record_task_pr(task.id, branch, pr_num)
-                # Comment on originating issue if linked
-                try:
-                    feature_id = None
-                    for fid, feat in self._features.items():
-                        if task.id in feat.task_ids:
-                            feature_id = fid
-                            break
-                    if feature_id and hasattr(self._persistence, "get_issue_by_feature"):
-                        issue_num = self._persistence.get_issue_by_feature(feature_id)
-                        if issue_num:
-                            self._github.comment_on_issue(
-                                issue_num,
-                                f"Automated PR created for task {task.title}: #{pr_num} on branch `{branch}`",
-                            )
-                except Exception as _e:
-                    logging.warning("Failed to comment on issue: %s", _e)
-        except Exception as e:
-            # Swallow errors for MVP but log
-            logging.error("GitHub integration error: %s", e)
+        feat = self._features.get(feature_id)
+        return feat, [self._tasks[tid] for tid in feat.task_ids] if feat else []
+
+    def _wake_relay(self) -> None:
+        if self._relay is None:
             return
+        if self._relay_task is None or self._relay_task.done():
+            self._relay_task = asyncio.get_running_loop().create_task(self._relay.run())
+        self._relay.notify()
+
+    async def flush_outbox(self) -> None:
+        """Deliver all currently due outbox events (used by tests and on shutdown)."""
+        if self._relay is not None:
+            await self._relay.flush()
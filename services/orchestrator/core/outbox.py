@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .dag import build_graph, task_levels
+from .models import Feature, OutboxEvent, Task, TaskStatus
+from .publishing import ArtifactPublisher
+
+
+class MemoryOutbox:
+    """Outbox for runs without a database; same interface as the persistence methods."""
+
+    def __init__(self):
+        self._events: Dict[int, OutboxEvent] = {}
+        self._keys: set[str] = set()
+        self._due: Dict[int, float] = {}
+        self._next_id = 1
+
+    def add(self, events: Sequence[OutboxEvent]) -> None:
+        for event in events:
+            if event.key in self._keys:
+                continue
+            self._keys.add(event.key)
+            stored = event.model_copy(update={"id": self._next_id, "attempts": 0})
+            self._events[stored.id] = stored
+            self._due[stored.id] = time.time()
+            self._next_id += 1
+
+    def claim_outbox(self, limit: int, lease_seconds: float) -> List[OutboxEvent]:
+        now = time.time()
+        due = [i for i in sorted(self._events) if self._due[i] <= now][:limit]
+        for i in due:
+            self._events[i].attempts += 1
+            self._due[i] = now + lease_seconds
+        return [self._events[i].model_copy() for i in due]
+
+    def complete_outbox(self, event_id: int) -> None:
+        self._events.pop(event_id, None)
+        self._due.pop(event_id, None)
+
+    def fail_outbox(self, event_id: int, error: str, retry_in: Optional[float]) -> None:
+        if retry_in is None:
+            self.complete_outbox(event_id)
+        elif event_id in self._due:
+            self._due[event_id] = time.time() + retry_in
+
+    def outbox_depth(self) -> int:
+        return len(self._events)
+
+
+class OutboxRelay:
+    """Delivers outbox events to GitHub, off the task scheduling path.
+
+    Events are claimed in batches; a claim hides them from other relays for
+    ``lease_seconds`` so a crashed relay's work is picked up again. Events of one
+    feature are delivered in order, different features concurrently. Failures are
+    retried with exponential backoff and parked as dead after ``max_attempts``;
+    ``task_prs`` keeps redeliveries from opening duplicate PRs.
+    """
+
+    def __init__(
+        self,
+        store,
+        publishers: Callable[[Feature], ArtifactPublisher],
+        load: Callable[[str], Tuple[Optional[Feature], List[Task]]],
+        batch_size: int = 20,
+        max_attempts: int = 8,
+        backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 1.0,
+    ):
+        self._store = store
+        self._publishers = publishers
+        self._load = load
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._wake = asyncio.Event()
+        self._draining = asyncio.Lock()  # flush() waits for batches run() has in flight
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    async def drain_once(self) -> int:
+        """Deliver one batch of due events; returns how many were claimed."""
+        async with self._draining:
+            events = self._store.claim_outbox(self.batch_size, self.lease_seconds)
+            by_feature: Dict[str, List[OutboxEvent]] = defaultdict(list)
+            for event in events:
+                by_feature[event.feature_id].append(event)
+            await asyncio.gather(*(self._deliver_in_order(evs) for evs in by_feature.values()))
+            return len(events)
+
+    async def flush(self) -> None:
+        """Deliver everything that is currently due (events backing off are left alone)."""
+        while await self.drain_once():
+            pass
+
+    async def run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                if await self.drain_once():
+                    continue
+            except Exception as e:
+                logging.error("Outbox relay error: %s", e)
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver_in_order(self, events: List[OutboxEvent]) -> None:
+        for event in events:
+            await self._deliver(event)
+
+    async def _deliver(self, event: OutboxEvent) -> None:
+        try:
+            await self._publish(event)
+        except asyncio.CancelledError:
+            # Hand the claim back instead of hiding the event until its lease expires
+            self._store.fail_outbox(event.id, "cancelled", 0.0)
+            raise
+        except Exception as e:
+            if event.attempts >= self.max_attempts:
+                logging.error(
+                    "Giving up on outbox event %s after %d attempts: %s",
+                    event.key,
+                    event.attempts,
+                    e,
+                )
+                self._store.fail_outbox(event.id, str(e), None)
+            else:
+                delay = min(self.backoff * 2 ** (event.attempts - 1), self.max_backoff)
+                logging.warning(
+                    "Outbox event %s failed, retrying in %.1fs: %s", event.key, delay, e
+                )
+                self._store.fail_outbox(event.id, str(e), delay * random.uniform(0.5, 1.0))
+        else:
+            self._store.complete_outbox(event.id)
+
+    async def _publish(self, event: OutboxEvent) -> None:
+        feature, tasks = self._load(event.feature_id)
+        if feature is None:
+            raise RuntimeError(f"Unknown feature {event.feature_id}")
+        publisher = self._publishers(feature)
+        if event.kind == "task":
+            task = next((t for t in tasks if t.id == event.payload["task_id"]), None)
+            if task is None:
+                raise RuntimeError(f"Unknown task {event.payload['task_id']}")
+            await publisher.publish_task(feature.id, task)
+            return
+        by_id = {t.id: t for t in tasks}
+        levels = [[by_id[n] for n in level] for level in task_levels(build_graph(tasks))]
+        done = [all(t.status == TaskStatus.DONE for t in level) for level in levels]
+        if event.kind == "level":
+            # Levels publish in order; stop at the first one still in progress
+            ready = done.index(False) if False in done else len(levels)
+            await publisher.publish_levels(feature.id, feature.title, levels[:ready])
+        elif event.kind == "feature" and all(done):
+            tasks = [t for level in levels for t in level]
+            await publisher.publish_feature(feature.id, feature.title, tasks)
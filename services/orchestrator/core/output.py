@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from .persistence.base import Persistence
+
+
+class TaskOutputLog:
+    """Agent output chunks per task, persisted as they arrive and followable live.
+
+    Chunks of a running task are kept in memory for cheap reads and written to
+    ``store`` in batches: once ``flush_chunks`` are pending or ``flush_interval``
+    seconds after the last write, and always at ``end``. The first chunk of a quiet
+    stream goes out at once, so other processes (API replicas, workers) see output
+    as it starts, and a crash loses at most one interval of it.
+    """
+
+    def __init__(
+        self,
+        store: Optional[Persistence] = None,
+        flush_chunks: int = 32,
+        flush_interval: float = 0.25,
+    ):
+        self._store = store
+        self.flush_chunks = flush_chunks
+        self.flush_interval = flush_interval
+        self._live: Dict[str, List[str]] = {}
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._flushed: Dict[str, int] = {}  # chunks already in the store, per task
+        self._flushed_at: Dict[str, float] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+
+    def begin(self, task_id: str) -> None:
+        """Start a fresh log for a (re)run of ``task_id``."""
+        self._cancel_timer(task_id)
+        self._live[task_id] = []
+        self._flushed[task_id] = 0
+        self._flushed_at.pop(task_id, None)
+        if self._store:
+            self._store.clear_task_output(task_id)
+        self._notify(task_id)
+
+    def append(self, task_id: str, chunk: str) -> None:
+        chunks = self._live.setdefault(task_id, [])
+        chunks.append(chunk)
+        if self._store:
+            pending = len(chunks) - self._flushed.get(task_id, 0)
+            since = time.monotonic() - self._flushed_at.get(task_id, float("-inf"))
+            if pending >= self.flush_chunks or since >= self.flush_interval:
+                self.flush(task_id)
+            elif task_id not in self._timers:
+                self._schedule_flush(task_id, self.flush_interval - since)
+        self._notify(task_id)
+
+    def flush(self, task_id: str) -> None:
+        """Write ``task_id``'s pending chunks to the store now."""
+        self._cancel_timer(task_id)
+        chunks = self._live.get(task_id)
+        if not self._store or chunks is None:
+            return
+        start = self._flushed.get(task_id, 0)
+        if start < len(chunks):
+            self._store.append_task_output(task_id, start, chunks[start:])
+            self._flushed[task_id] = len(chunks)
+        self._flushed_at[task_id] = time.monotonic()
+
+    def end(self, task_id: str) -> None:
+        """The run finished; with a store, later reads come from it."""
+        if self._store:
+            self.flush(task_id)
+            self._live.pop(task_id, None)
+            self._flushed.pop(task_id, None)
+            self._flushed_at.pop(task_id, None)
+        self._notify(task_id)
+
+    def read(self, task_id: str, after: int = 0) -> List[str]:
+        """Chunks from sequence number ``after`` on."""
+        if task_id in self._live:
+            return self._live[task_id][after:]
+        if self._store:
+            return self._store.read_task_output(task_id, after)
+        return []
+
+    async def wait(self, task_id: str, timeout: float) -> None:
+        """Return when ``task_id`` gets output or finishes, or after ``timeout``."""
+        event = self._changed.setdefault(task_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _schedule_flush(self, task_id: str, delay: float) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush(task_id)  # no loop to flush later from
+            return
+        self._timers[task_id] = loop.call_later(max(0.0, delay), self.flush, task_id)
+
+    def _cancel_timer(self, task_id: str) -> None:
+        timer = self._timers.pop(task_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _notify(self, task_id: str) -> None:
+        event = self._changed.pop(task_id, None)
+        if event is not None:
+            event.set()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_SEGMENT = re.compile(r"^features-(\d{6})\.jsonl\.gz$")
+
+
+class FeatureArchive:
+    """Append-only, gzip-compressed files of archived features.
+
+    Each feature is one JSON line compressed as its own gzip member and appended to
+    the current segment (``features-000001.jsonl.gz``, ...); a new segment starts
+    once one reaches ``segment_bytes``. Members decompress independently, so a
+    feature is read back with one seek and one ``gzip.decompress`` given the
+    ``(segment, offset, length)`` returned by ``append``, while ``zcat`` still reads
+    a whole segment as JSON lines. Files are never rewritten.
+    """
+
+    def __init__(self, directory: str = "artifacts/archive", segment_bytes: int = 64 << 20):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._segment: Optional[str] = None
+
+    def _current(self) -> str:
+        if self._segment is None:
+            os.makedirs(self.directory, exist_ok=True)
+            numbers = [
+                int(m.group(1)) for m in map(_SEGMENT.match, os.listdir(self.directory)) if m
+            ]
+            self._segment = f"features-{max(numbers, default=1):06d}.jsonl.gz"
+        path = os.path.join(self.directory, self._segment)
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+            number = int(_SEGMENT.match(self._segment).group(1)) + 1
+            self._segment = f"features-{number:06d}.jsonl.gz"
+        return self._segment
+
+    def append(self, records: Sequence[Dict[str, Any]]) -> List[Tuple[str, int, int]]:
+        """Write ``records`` and sync them to disk; returns where each one landed."""
+        placed: List[Tuple[str, int, int]] = []
+        with self._lock:
+            segment = self._current()
+            with open(os.path.join(self.directory, segment), "ab") as f:
+                offset = f.tell()
+                for record in records:
+                    member = gzip.compress(
+                        (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+                    )
+                    f.write(member)
+                    placed.append((segment, offset, len(member)))
+                    offset += len(member)
+                f.flush()
+                # Durable before the caller deletes the hot rows
+                os.fsync(f.fileno())
+        return placed
+
+    def read(self, segment: str, offset: int, length: int) -> Dict[str, Any]:
+        if not _SEGMENT.match(segment):
+            raise ValueError(f"Not an archive segment: {segment!r}")
+        with open(os.path.join(self.directory, segment), "rb") as f:
+            f.seek(offset)
+            return json.loads(gzip.decompress(f.read(length)))
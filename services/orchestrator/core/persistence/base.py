@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from ..models import Feature, Task
+from ..models import Feature, FeatureState, OutboxEvent, Task, TaskEvent, TaskStatus
 
 
 class Persistence(ABC):
@@ -16,14 +16,122 @@ class Persistence(ABC):
     @abstractmethod
     def get_feature(self, feature_id: str) -> Optional[Feature]: ...
 
+    @abstractmethod
+    def set_feature_state(self, feature_id: str, state: FeatureState) -> None: ...
+
     @abstractmethod
     def list_tasks(self, feature_id: str) -> List[Task]: ...
 
+    @abstractmethod
+    def get_task(self, task_id: str) -> Optional[Task]: ...
+
+    @abstractmethod
+    def list_unfinished_features(self, limit: int = 100, offset: int = 0) -> List[str]: ...
+
+    @abstractmethod
+    def list_features_in_state(self, state: FeatureState, limit: int = 100) -> List[str]: ...
+
+    @abstractmethod
+    def active_task_count(self) -> int:
+        """Pending and running tasks of active features."""
+
+    @abstractmethod
+    def unfinished_features_by_repo(self) -> Dict[Optional[str], int]: ...
+
     @abstractmethod
     def get_task_dependencies(self, task_id: str) -> List[str]: ...
 
     @abstractmethod
-    def update_task(self, task: Task) -> None: ...
+    def update_task(self, task: Task, outbox: Sequence[OutboxEvent] = ()) -> None:
+        """Persist ``task`` and enqueue ``outbox`` events in the same transaction."""
+
+    # Lifecycle events and latency rollups; status changes are logged by the methods
+    # that make them (update_task, start_task, reap_task)
+    @abstractmethod
+    def mark_tasks_queued(self, task_ids: Sequence[str], at: float) -> None:
+        """Record that ``task_ids`` were handed to a runner or the queue at ``at``."""
+
+    @abstractmethod
+    def list_task_events(self, task_id: str) -> List[TaskEvent]: ...
+
+    @abstractmethod
+    def latency_rollups(
+        self,
+        since: float,
+        until: float,
+        group_by: Sequence[str] = (),
+        agent_type: Optional[str] = None,
+        repo: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Summed histogram rows (``group_by`` columns, metric, bin, count, total) of
+        the rollup buckets between ``since`` and ``until``."""
+
+    @abstractmethod
+    def task_outcomes(
+        self,
+        since: float,
+        until: float,
+        group_by: Sequence[str] = (),
+        agent_type: Optional[str] = None,
+        repo: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Finished-task counts (``group_by`` columns, status, count) in the window."""
+
+    # Retention: finished features are moved to compressed archive files and stay
+    # readable through get_feature/list_tasks
+    @abstractmethod
+    def archive_features(self, cutoff: float, limit: int = 100) -> List[str]:
+        """Archive up to ``limit`` features finished before ``cutoff``; returns their ids."""
+
+    @abstractmethod
+    def compact(self, pages: int = 0) -> int:
+        """Give free pages back to the filesystem; returns how many were free."""
+
+    # Streamed agent output
+    @abstractmethod
+    def get_task_feature(self, task_id: str) -> Optional[str]:
+        """Id of the feature ``task_id`` belongs to."""
+
+    @abstractmethod
+    def start_task(self, task: Task, owner: str, lease_expires: float) -> None:
+        """Save ``task`` as RUNNING under a lease held by ``owner`` until ``lease_expires``."""
+
+    @abstractmethod
+    def renew_task_lease(self, task_id: str, owner: str, lease_expires: float) -> bool:
+        """Heartbeat; False once the task is no longer running under ``owner``'s lease."""
+
+    @abstractmethod
+    def expired_task_leases(self, now: float, limit: int = 100) -> List[Tuple[str, str]]:
+        """``(task_id, feature_id)`` of RUNNING tasks whose lease expired before ``now``."""
+
+    @abstractmethod
+    def reap_task(
+        self, task_id: str, now: float, status: TaskStatus, result: Optional[str]
+    ) -> bool:
+        """Move a RUNNING task with an expired lease to ``status``; False if it was not one."""
+
+    @abstractmethod
+    def append_task_output(self, task_id: str, seq: int, chunks: Sequence[str]) -> None:
+        """Store ``chunks`` as sequence numbers ``seq``, ``seq + 1``, ... in one write."""
+
+    @abstractmethod
+    def read_task_output(self, task_id: str, after: int = 0) -> List[str]: ...
+
+    @abstractmethod
+    def clear_task_output(self, task_id: str) -> None: ...
+
+    # Outbox of pending GitHub side effects
+    @abstractmethod
+    def claim_outbox(self, limit: int, lease_seconds: float) -> List[OutboxEvent]: ...
+
+    @abstractmethod
+    def complete_outbox(self, event_id: int) -> None: ...
+
+    @abstractmethod
+    def fail_outbox(self, event_id: int, error: str, retry_in: Optional[float]) -> None: ...
+
+    @abstractmethod
+    def outbox_depth(self) -> int: ...
 
     # PR metadata
     @abstractmethod
@@ -1,22 +1,40 @@
 from __future__ import annotations
 
+import json
 import os
 import sqlite3
-from datetime import datetime
-from typing import List, Optional
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from ..models import AgentType, Feature, Task, TaskStatus
+from ..analytics import GROUPS, bucket_of, latency_bin
+from ..models import AgentType, Feature, FeatureState, OutboxEvent, Task, TaskEvent, TaskStatus
+from .archive import FeatureArchive
+
+_TASK_COLUMNS = (
+    "id, title, description, agent_type, status, result, attempts, estimate, queued_at, "
+    "started_at, finished_at"
+)
 
 
 class SQLitePersistence:
-    def __init__(self, path: str = "artifacts/dsf.db"):
+    def __init__(self, path: str = "artifacts/dsf.db", archive_dir: Optional[str] = None):
         os.makedirs(os.path.dirname(path), exist_ok=True)
         self._path = path
         self._conn = sqlite3.connect(self._path, check_same_thread=False)
         self._conn.row_factory = sqlite3.Row
+        # Finished features moved out of the hot tables (see archive_features)
+        self.archive = FeatureArchive(archive_dir or os.path.join(os.path.dirname(path), "archive"))
+
+    @property
+    def path(self) -> str:
+        return self._path
 
     def init(self) -> None:
         cur = self._conn.cursor()
+        # Lets compact() hand pages freed by archiving back to the filesystem; only takes
+        # effect on a new database (older ones are switched by compact's one-off VACUUM)
+        cur.execute("PRAGMA auto_vacuum=INCREMENTAL")
         cur.executescript(
             """
             CREATE TABLE IF NOT EXISTS features (
@@ -55,22 +73,115 @@ class SQLitePersistence:
                 created_at TEXT NOT NULL,
                 FOREIGN KEY(feature_id) REFERENCES features(id)
             );
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                feature_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                last_error TEXT,
+                created_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS outbox_due ON outbox(status, available_at);
+            CREATE TABLE IF NOT EXISTS task_output (
+                task_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                chunk TEXT NOT NULL,
+                PRIMARY KEY(task_id, seq)
+            );
+            CREATE TABLE IF NOT EXISTS task_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT NOT NULL,
+                feature_id TEXT NOT NULL,
+                event TEXT NOT NULL,
+                attempt INTEGER NOT NULL DEFAULT 0,
+                at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS task_events_by_task ON task_events(task_id, id);
+            -- Hourly latency histograms and outcome counts, kept up to date as tasks
+            -- finish so analytics never scan the task history (see core.analytics)
+            CREATE TABLE IF NOT EXISTS latency_rollups (
+                bucket INTEGER NOT NULL,
+                metric TEXT NOT NULL,
+                agent_type TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                bin INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                total REAL NOT NULL,
+                PRIMARY KEY(bucket, metric, agent_type, repo, bin)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS task_outcomes (
+                bucket INTEGER NOT NULL,
+                agent_type TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                status TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY(bucket, agent_type, repo, status)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS archived_features (
+                feature_id TEXT PRIMARY KEY,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                archived_at TEXT NOT NULL
+            );
             """
         )
+        # Columns added after the first release; CREATE TABLE IF NOT EXISTS skips them
+        columns = {r["name"] for r in cur.execute("PRAGMA table_info(features)")}
+        if "repo" not in columns:
+            cur.execute("ALTER TABLE features ADD COLUMN repo TEXT")
+        if "state" not in columns:
+            cur.execute("ALTER TABLE features ADD COLUMN state TEXT NOT NULL DEFAULT 'active'")
+        if "admit_by" not in columns:
+            cur.execute("ALTER TABLE features ADD COLUMN admit_by TEXT")
+        columns = {r["name"] for r in cur.execute("PRAGMA table_info(tasks)")}
+        if "attempts" not in columns:
+            cur.execute("ALTER TABLE tasks ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        if "lease_owner" not in columns:
+            # Heartbeat lease of the worker running the task (see expired_task_leases)
+            cur.execute("ALTER TABLE tasks ADD COLUMN lease_owner TEXT")
+            cur.execute("ALTER TABLE tasks ADD COLUMN lease_expires REAL")
+        if "estimate" not in columns:
+            cur.execute("ALTER TABLE tasks ADD COLUMN estimate REAL")
+        if "queued_at" not in columns:
+            cur.execute("ALTER TABLE tasks ADD COLUMN queued_at REAL")
+            cur.execute("ALTER TABLE tasks ADD COLUMN started_at REAL")
+            cur.execute("ALTER TABLE tasks ADD COLUMN finished_at REAL")
+        # Scheduling and admission queries filter on these
+        cur.execute("CREATE INDEX IF NOT EXISTS tasks_by_feature ON tasks(feature_id, status)")
+        cur.execute("CREATE INDEX IF NOT EXISTS features_by_state ON features(state, created_at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tasks_by_lease ON tasks(status, lease_expires)")
+        cur.execute("CREATE INDEX IF NOT EXISTS outbox_by_feature ON outbox(feature_id)")
         self._conn.commit()
 
     def save_feature_with_tasks(self, feature: Feature, tasks: List[Task]) -> None:
         cur = self._conn.cursor()
         cur.execute(
-            "INSERT OR REPLACE INTO features(id,title,description,created_at) VALUES (?,?,?,?)",
-            (feature.id, feature.title, feature.description, feature.created_at.isoformat()),
+            """
+            INSERT OR REPLACE INTO features(id,title,description,repo,state,admit_by,created_at)
+            VALUES (?,?,?,?,?,?,?)
+            """,
+            (
+                feature.id,
+                feature.title,
+                feature.description,
+                feature.repo,
+                feature.state.value,
+                feature.admit_by.isoformat() if feature.admit_by else None,
+                feature.created_at.isoformat(),
+            ),
         )
         for t in tasks:
             cur.execute(
                 """
                 INSERT OR REPLACE INTO tasks
-                (id, feature_id, title, description, agent_type, status, result)
-                VALUES (?,?,?,?,?,?,?)
+                (id, feature_id, title, description, agent_type, status, result, attempts,
+                 estimate, queued_at, started_at, finished_at)
+                VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
                 """,
                 (
                     t.id,
@@ -80,8 +191,20 @@ class SQLitePersistence:
                     t.agent_type.value,
                     t.status.value,
                     t.result,
+                    t.attempts,
+                    t.estimate,
+                    t.queued_at,
+                    t.started_at,
+                    t.finished_at,
                 ),
             )
+            cur.execute(
+                """
+                INSERT INTO task_events(task_id, feature_id, event, attempt, at)
+                VALUES (?,?,?,?,?)
+                """,
+                (t.id, feature.id, t.status.value, t.attempts, time.time()),
+            )
             for dep in t.depends_on:
                 cur.execute(
                     "INSERT OR IGNORE INTO task_deps(task_id, depends_on_id) VALUES (?,?)",
@@ -92,15 +215,22 @@ class SQLitePersistence:
     def get_feature(self, feature_id: str) -> Optional[Feature]:
         cur = self._conn.cursor()
         row = cur.execute(
-            "SELECT id,title,description,created_at FROM features WHERE id=?",
+            "SELECT id,title,description,repo,state,admit_by,created_at FROM features WHERE id=?",
             (feature_id,),
         ).fetchone()
         if not row:
-            return None
+            record = self._archived(feature_id)
+            if record is None:
+                return None
+            task_ids = [t["id"] for t in record["tasks"]]
+            return Feature.model_validate({**record["feature"], "task_ids": task_ids})
         feat = Feature(
             id=row["id"],
             title=row["title"],
             description=row["description"],
+            repo=row["repo"],
+            state=FeatureState(row["state"]),
+            admit_by=datetime.fromisoformat(row["admit_by"]) if row["admit_by"] else None,
             created_at=datetime.fromisoformat(row["created_at"]),
             task_ids=[],
         )
@@ -111,15 +241,48 @@ class SQLitePersistence:
         feat.task_ids = [r[0] for r in task_rows]
         return feat
 
+    def set_feature_state(self, feature_id: str, state: FeatureState) -> None:
+        cur = self._conn.cursor()
+        cur.execute("UPDATE features SET state=? WHERE id=?", (state.value, feature_id))
+        self._conn.commit()
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        cur = self._conn.cursor()
+        r = cur.execute(f"SELECT {_TASK_COLUMNS} FROM tasks WHERE id=?", (task_id,)).fetchone()
+        if not r:
+            return None
+        return self._task(r, self.get_task_dependencies(task_id))
+
+    @staticmethod
+    def _task(r: sqlite3.Row, deps: List[str]) -> Task:
+        return Task(
+            id=r["id"],
+            title=r["title"],
+            description=r["description"],
+            agent_type=AgentType(r["agent_type"]),
+            status=TaskStatus(r["status"]),
+            result=r["result"],
+            attempts=r["attempts"],
+            estimate=r["estimate"],
+            queued_at=r["queued_at"],
+            started_at=r["started_at"],
+            finished_at=r["finished_at"],
+            depends_on=deps,
+        )
+
     def list_tasks(self, feature_id: str) -> List[Task]:
         cur = self._conn.cursor()
         rows = cur.execute(
-            """
-            SELECT id, title, description, agent_type, status, result FROM tasks
-            WHERE feature_id=? ORDER BY rowid ASC
-            """,
+            f"SELECT {_TASK_COLUMNS} FROM tasks WHERE feature_id=? ORDER BY rowid ASC",
             (feature_id,),
         ).fetchall()
+        if not rows:
+            record = self._archived(feature_id)
+            if record is not None:
+                return [
+                    Task.model_validate({k: v for k, v in t.items() if k in Task.model_fields})
+                    for t in record["tasks"]
+                ]
         tasks: List[Task] = []
         for r in rows:
             tid = r["id"]
@@ -130,19 +293,62 @@ class SQLitePersistence:
                     (tid,),
                 ).fetchall()
             ]
-            tasks.append(
-                Task(
-                    id=tid,
-                    title=r["title"],
-                    description=r["description"],
-                    agent_type=AgentType(r["agent_type"]),
-                    status=TaskStatus(r["status"]),
-                    result=r["result"],
-                    depends_on=deps,
-                )
-            )
+            tasks.append(self._task(r, deps))
         return tasks
 
+    def list_unfinished_features(self, limit: int = 100, offset: int = 0) -> List[str]:
+        """Active features with work left to schedule (pending/running tasks, no failures), oldest first."""
+        cur = self._conn.cursor()
+        rows = cur.execute(
+            """
+            SELECT f.id FROM features f
+            WHERE f.state='active'
+            AND EXISTS (
+                SELECT 1 FROM tasks t
+                WHERE t.feature_id=f.id AND t.status IN ('pending','running')
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM tasks t WHERE t.feature_id=f.id AND t.status='failed'
+            )
+            ORDER BY f.created_at ASC
+            LIMIT ? OFFSET ?
+            """,
+            (limit, offset),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def list_features_in_state(self, state: FeatureState, limit: int = 100) -> List[str]:
+        cur = self._conn.cursor()
+        rows = cur.execute(
+            "SELECT id FROM features WHERE state=? ORDER BY created_at ASC LIMIT ?",
+            (state.value, limit),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def active_task_count(self) -> int:
+        cur = self._conn.cursor()
+        return cur.execute(
+            """
+            SELECT COUNT(*) FROM tasks t JOIN features f ON f.id=t.feature_id
+            WHERE f.state='active' AND t.status IN ('pending','running')
+            """
+        ).fetchone()[0]
+
+    def unfinished_features_by_repo(self) -> Dict[Optional[str], int]:
+        """Active features with pending or running tasks, counted per repository."""
+        cur = self._conn.cursor()
+        rows = cur.execute(
+            """
+            SELECT f.repo, COUNT(*) FROM features f
+            WHERE f.state='active' AND EXISTS (
+                SELECT 1 FROM tasks t
+                WHERE t.feature_id=f.id AND t.status IN ('pending','running')
+            )
+            GROUP BY f.repo
+            """
+        ).fetchall()
+        return {r[0]: r[1] for r in rows}
+
     def get_task_dependencies(self, task_id: str) -> List[str]:
         cur = self._conn.cursor()
         return [
@@ -153,14 +359,438 @@ class SQLitePersistence:
             ).fetchall()
         ]
 
-    def update_task(self, task: Task) -> None:
+    def update_task(self, task: Task, outbox: Sequence[OutboxEvent] = ()) -> None:
+        cur = self._conn.cursor()
+        before = self._status_of(cur, task.id)
+        cur.execute(
+            """
+            UPDATE tasks SET status=?, result=?, attempts=?, estimate=?, queued_at=?,
+            started_at=?, finished_at=?
+            WHERE id=?
+            """,
+            (
+                task.status.value,
+                task.result,
+                task.attempts,
+                task.estimate,
+                task.queued_at,
+                task.started_at,
+                task.finished_at,
+                task.id,
+            ),
+        )
+        self._log_transition(cur, task.id, before)
+        for event in outbox:
+            # Same transaction as the task update; the key makes re-completions no-ops
+            cur.execute(
+                """
+                INSERT OR IGNORE INTO outbox
+                (idempotency_key, feature_id, kind, payload, available_at, created_at)
+                VALUES (?,?,?,?,?,?)
+                """,
+                (
+                    event.key,
+                    event.feature_id,
+                    event.kind,
+                    json.dumps(event.payload),
+                    time.time(),
+                    datetime.utcnow().isoformat(),
+                ),
+            )
+        self._conn.commit()
+
+    # Retention: finished features move to compressed archive files
+    def _archived(self, feature_id: str) -> Optional[Dict[str, Any]]:
+        cur = self._conn.cursor()
+        row = cur.execute(
+            "SELECT segment, offset, length FROM archived_features WHERE feature_id=?",
+            (feature_id,),
+        ).fetchone()
+        return self.archive.read(*row) if row else None
+
+    def _export_feature(self, feature_id: str) -> Dict[str, Any]:
+        """Everything stored about ``feature_id``, as one JSON-ready archive record."""
+        cur = self._conn.cursor()
+        feature = self.get_feature(feature_id)
+        tasks = []
+        for task in self.list_tasks(feature_id):
+            record = task.model_dump(mode="json")
+            record["events"] = [
+                e.model_dump(exclude={"task_id"}) for e in self.list_task_events(task.id)
+            ]
+            pr = self.get_task_pr(task.id)
+            record["pr"] = {"branch": pr[0], "number": pr[1]} if pr else None
+            tasks.append(record)
+        outbox = cur.execute(
+            """
+            SELECT idempotency_key, kind, payload, status, attempts, last_error, created_at
+            FROM outbox WHERE feature_id=? ORDER BY id ASC
+            """,
+            (feature_id,),
+        ).fetchall()
+        return {
+            "feature": feature.model_dump(mode="json", exclude={"task_ids"}),
+            "tasks": tasks,
+            "outbox": [{**dict(r), "payload": json.loads(r["payload"])} for r in outbox],
+            "issue_id": self.get_issue_by_feature(feature_id),
+            "archived_at": datetime.utcnow().isoformat(),
+        }
+
+    def archive_features(self, cutoff: float, limit: int = 100) -> List[str]:
+        """Move up to ``limit`` finished features out of the hot tables; returns their ids.
+
+        A feature qualifies once all its tasks are done (or it was cancelled), nothing
+        of it finished after ``cutoff`` (epoch seconds) and it has no undelivered
+        outbox events. Records are synced to the archive before one transaction drops
+        the hot rows, so a crash in between leaves a stray archive entry at worst.
+        Issue links stay, so webhooks still find the feature.
+        """
+        cur = self._conn.cursor()
+        created_before = datetime.fromtimestamp(cutoff, timezone.utc).replace(tzinfo=None)
+        ids = [
+            r[0]
+            for r in cur.execute(
+                """
+                SELECT f.id FROM features f
+                WHERE f.created_at < ?
+                AND (
+                    f.state='cancelled'
+                    OR (f.state='active' AND NOT EXISTS (
+                        SELECT 1 FROM tasks t WHERE t.feature_id=f.id AND t.status!='done'
+                    ))
+                )
+                AND NOT EXISTS (
+                    SELECT 1 FROM tasks t
+                    WHERE t.feature_id=f.id AND COALESCE(t.finished_at, 0) >= ?
+                )
+                AND NOT EXISTS (
+                    SELECT 1 FROM outbox o WHERE o.feature_id=f.id AND o.status='pending'
+                )
+                ORDER BY f.created_at ASC
+                LIMIT ?
+                """,
+                (created_before.isoformat(), cutoff, limit),
+            ).fetchall()
+        ]
+        if not ids:
+            return []
+        placed = self.archive.append([self._export_feature(fid) for fid in ids])
+        archived_at = datetime.utcnow().isoformat()
+        of_feature = "SELECT id FROM tasks WHERE feature_id=?"
+        for fid, (segment, offset, length) in zip(ids, placed, strict=True):
+            for table in ("task_output", "task_events", "task_deps", "task_prs"):
+                cur.execute(
+                    f"DELETE FROM {table} WHERE task_id IN ({of_feature})", (fid,)  # nosec B608
+                )
+            cur.execute("DELETE FROM outbox WHERE feature_id=?", (fid,))
+            cur.execute("DELETE FROM tasks WHERE feature_id=?", (fid,))
+            cur.execute("DELETE FROM features WHERE id=?", (fid,))
+            cur.execute(
+                """
+                INSERT OR REPLACE INTO archived_features
+                (feature_id, segment, offset, length, archived_at)
+                VALUES (?,?,?,?,?)
+                """,
+                (fid, segment, offset, length, archived_at),
+            )
+        self._conn.commit()
+        return ids
+
+    def compact(self, pages: int = 0) -> int:
+        """Return up to ``pages`` free pages (0: all) to the filesystem and truncate the
+        WAL; returns how many pages were free before."""
+        cur = self._conn.cursor()
+        self._conn.commit()
+        free = cur.execute("PRAGMA freelist_count").fetchone()[0]
+        if cur.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # Created before incremental mode: one full VACUUM switches the file over
+            cur.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            cur.execute("VACUUM")
+        elif free:
+            cur.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            self._conn.commit()
+        cur.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return free
+
+    def get_task_feature(self, task_id: str) -> Optional[str]:
+        cur = self._conn.cursor()
+        row = cur.execute("SELECT feature_id FROM tasks WHERE id=?", (task_id,)).fetchone()
+        return row[0] if row else None
+
+    def start_task(self, task: Task, owner: str, lease_expires: float) -> None:
+        cur = self._conn.cursor()
+        before = self._status_of(cur, task.id)
+        cur.execute(
+            """
+            UPDATE tasks SET status=?, result=?, attempts=?, started_at=?, finished_at=?,
+            lease_owner=?, lease_expires=?
+            WHERE id=?
+            """,
+            (
+                task.status.value,
+                task.result,
+                task.attempts,
+                task.started_at,
+                task.finished_at,
+                owner,
+                lease_expires,
+                task.id,
+            ),
+        )
+        self._log_transition(cur, task.id, before)
+        self._conn.commit()
+
+    def mark_tasks_queued(self, task_ids: Sequence[str], at: float) -> None:
+        cur = self._conn.cursor()
+        cur.executemany("UPDATE tasks SET queued_at=? WHERE id=?", [(at, t) for t in task_ids])
+        cur.executemany(
+            """
+            INSERT INTO task_events(task_id, feature_id, event, attempt, at)
+            SELECT id, feature_id, 'queued', attempts, ? FROM tasks WHERE id=?
+            """,
+            [(at, t) for t in task_ids],
+        )
+        self._conn.commit()
+
+    def list_task_events(self, task_id: str) -> List[TaskEvent]:
+        cur = self._conn.cursor()
+        rows = cur.execute(
+            "SELECT task_id, event, attempt, at FROM task_events WHERE task_id=? ORDER BY id ASC",
+            (task_id,),
+        ).fetchall()
+        return [TaskEvent(**dict(r)) for r in rows]
+
+    @staticmethod
+    def _status_of(cur: sqlite3.Cursor, task_id: str) -> Optional[str]:
+        row = cur.execute("SELECT status FROM tasks WHERE id=?", (task_id,)).fetchone()
+        return row[0] if row else None
+
+    def _log_transition(self, cur: sqlite3.Cursor, task_id: str, before: Optional[str]) -> None:
+        """Record a status change of ``task_id`` (already written, in the same
+        transaction) in ``task_events`` and add its latencies to the rollups."""
+        r = cur.execute(
+            """
+            SELECT t.feature_id, t.agent_type, t.status, t.attempts, t.queued_at, t.started_at,
+                   t.finished_at, f.repo, f.created_at
+            FROM tasks t JOIN features f ON f.id=t.feature_id
+            WHERE t.id=?
+            """,
+            (task_id,),
+        ).fetchone()
+        if r is None or r["status"] == before:
+            return
+        now = time.time()
+        status, agent, repo = r["status"], r["agent_type"], r["repo"] or ""
+        cur.execute(
+            "INSERT INTO task_events(task_id, feature_id, event, attempt, at) VALUES (?,?,?,?,?)",
+            (task_id, r["feature_id"], status, r["attempts"], now),
+        )
+        started, finished = r["started_at"], r["finished_at"]
+        if status == "running" and r["queued_at"] is not None and started is not None:
+            self._rollup(cur, "queue_wait", agent, repo, started, started - r["queued_at"])
+        if status not in ("done", "failed", "cancelled"):
+            return
+        cur.execute(
+            """
+            INSERT INTO task_outcomes(bucket, agent_type, repo, status, count) VALUES (?,?,?,?,1)
+            ON CONFLICT(bucket, agent_type, repo, status) DO UPDATE SET count=count+1
+            """,
+            (bucket_of(now), agent, repo, status),
+        )
+        if status != "done" or started is None or finished is None:
+            return
+        self._rollup(cur, "run", agent, repo, finished, finished - started)
+        left = cur.execute(
+            "SELECT COUNT(*) FROM tasks WHERE feature_id=? AND status!='done'", (r["feature_id"],)
+        ).fetchone()[0]
+        if not left:
+            # The feature's last task: created_at is naive UTC (datetime.utcnow)
+            created = datetime.fromisoformat(r["created_at"])
+            if created.tzinfo is None:
+                created = created.replace(tzinfo=timezone.utc)
+            self._rollup(cur, "feature_lead", "", repo, finished, finished - created.timestamp())
+
+    @staticmethod
+    def _rollup(
+        cur: sqlite3.Cursor, metric: str, agent_type: str, repo: str, at: float, seconds: float
+    ) -> None:
+        seconds = max(0.0, seconds)
+        cur.execute(
+            """
+            INSERT INTO latency_rollups(bucket, metric, agent_type, repo, bin, count, total)
+            VALUES (?,?,?,?,?,1,?)
+            ON CONFLICT(bucket, metric, agent_type, repo, bin)
+            DO UPDATE SET count=count+1, total=total+excluded.total
+            """,
+            (bucket_of(at), metric, agent_type, repo, latency_bin(seconds), seconds),
+        )
+
+    def _rollup_query(
+        self,
+        table: str,
+        columns: str,
+        since: float,
+        until: float,
+        group_by: Sequence[str],
+        agent_type: Optional[str],
+        repo: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        dims = [d for d in group_by if d in GROUPS]
+        where, params = ["bucket>=?", "bucket<?"], [bucket_of(since), until]
+        if agent_type is not None:
+            where.append("agent_type=?")
+            params.append(agent_type)
+        if repo is not None:
+            where.append("repo=?")
+            params.append(repo)
+        keys = ", ".join(dims + [columns])
+        sql = f"SELECT {keys}, SUM(count) AS count"
+        if table == "latency_rollups":
+            sql += ", SUM(total) AS total"
+        sql += f" FROM {table} WHERE {' AND '.join(where)} GROUP BY {keys}"  # nosec B608
+        cur = self._conn.cursor()
+        return [dict(r) for r in cur.execute(sql, params).fetchall()]
+
+    def latency_rollups(
+        self,
+        since: float,
+        until: float,
+        group_by: Sequence[str] = (),
+        agent_type: Optional[str] = None,
+        repo: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        return self._rollup_query(
+            "latency_rollups", "metric, bin", since, until, group_by, agent_type, repo
+        )
+
+    def task_outcomes(
+        self,
+        since: float,
+        until: float,
+        group_by: Sequence[str] = (),
+        agent_type: Optional[str] = None,
+        repo: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        return self._rollup_query(
+            "task_outcomes", "status", since, until, group_by, agent_type, repo
+        )
+
+    def renew_task_lease(self, task_id: str, owner: str, lease_expires: float) -> bool:
+        cur = self._conn.cursor()
+        cur.execute(
+            """
+            UPDATE tasks SET lease_expires=?
+            WHERE id=? AND status='running' AND lease_owner=?
+            """,
+            (lease_expires, task_id, owner),
+        )
+        self._conn.commit()
+        return cur.rowcount == 1
+
+    def expired_task_leases(self, now: float, limit: int = 100) -> List[Tuple[str, str]]:
+        cur = self._conn.cursor()
+        # Tasks started before heartbeats existed have no lease and count as expired
+        rows = cur.execute(
+            """
+            SELECT id, feature_id FROM tasks
+            WHERE status='running' AND COALESCE(lease_expires, 0) < ?
+            LIMIT ?
+            """,
+            (now, limit),
+        ).fetchall()
+        return [(r[0], r[1]) for r in rows]
+
+    def reap_task(self, task_id: str, now: float, status: TaskStatus, result: Optional[str]) -> bool:
+        cur = self._conn.cursor()
+        # Conditional, so of several reapers racing for a task exactly one wins
+        cur.execute(
+            """
+            UPDATE tasks SET status=?, result=?, lease_owner=NULL, lease_expires=NULL
+            WHERE id=? AND status='running' AND COALESCE(lease_expires, 0) < ?
+            """,
+            (status.value, result, task_id, now),
+        )
+        reaped = cur.rowcount == 1
+        if reaped:
+            self._log_transition(cur, task_id, TaskStatus.RUNNING.value)
+        self._conn.commit()
+        return reaped
+
+    def append_task_output(self, task_id: str, seq: int, chunks: Sequence[str]) -> None:
+        cur = self._conn.cursor()
+        cur.executemany(
+            "INSERT OR REPLACE INTO task_output(task_id, seq, chunk) VALUES (?,?,?)",
+            [(task_id, seq + i, chunk) for i, chunk in enumerate(chunks)],
+        )
+        self._conn.commit()
+
+    def read_task_output(self, task_id: str, after: int = 0) -> List[str]:
+        cur = self._conn.cursor()
+        rows = cur.execute(
+            "SELECT chunk FROM task_output WHERE task_id=? AND seq>=? ORDER BY seq ASC",
+            (task_id, after),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def clear_task_output(self, task_id: str) -> None:
+        cur = self._conn.cursor()
+        cur.execute("DELETE FROM task_output WHERE task_id=?", (task_id,))
+        self._conn.commit()
+
+    def claim_outbox(self, limit: int, lease_seconds: float) -> List[OutboxEvent]:
+        """Take up to ``limit`` due events, hiding them from other relays for ``lease_seconds``."""
+        now = time.time()
+        cur = self._conn.cursor()
+        rows = cur.execute(
+            """
+            UPDATE outbox SET available_at=?, attempts=attempts+1
+            WHERE id IN (
+                SELECT id FROM outbox WHERE status='pending' AND available_at<=?
+                ORDER BY id ASC LIMIT ?
+            )
+            RETURNING id, idempotency_key, feature_id, kind, payload, attempts
+            """,
+            (now + lease_seconds, now, limit),
+        ).fetchall()
+        self._conn.commit()
+        events = [
+            OutboxEvent(
+                id=r["id"],
+                key=r["idempotency_key"],
+                feature_id=r["feature_id"],
+                kind=r["kind"],
+                payload=json.loads(r["payload"]),
+                attempts=r["attempts"],
+            )
+            for r in rows
+        ]
+        return sorted(events, key=lambda e: e.id)
+
+    def complete_outbox(self, event_id: int) -> None:
         cur = self._conn.cursor()
         cur.execute(
-            "UPDATE tasks SET status=?, result=? WHERE id=?",
-            (task.status.value, task.result, task.id),
+            "UPDATE outbox SET status='published', last_error=NULL WHERE id=?", (event_id,)
         )
         self._conn.commit()
 
+    def fail_outbox(self, event_id: int, error: str, retry_in: Optional[float]) -> None:
+        """Reschedule a failed delivery, or park it as ``dead`` when ``retry_in`` is None."""
+        cur = self._conn.cursor()
+        if retry_in is None:
+            cur.execute(
+                "UPDATE outbox SET status='dead', last_error=? WHERE id=?", (error, event_id)
+            )
+        else:
+            cur.execute(
+                "UPDATE outbox SET available_at=?, last_error=? WHERE id=?",
+                (time.time() + retry_in, error, event_id),
+            )
+        self._conn.commit()
+
+    def outbox_depth(self) -> int:
+        cur = self._conn.cursor()
+        return cur.execute("SELECT COUNT(*) FROM outbox WHERE status='pending'").fetchone()[0]
+
     def record_task_pr(self, task_id: str, branch: str, pr_number: int) -> None:
         cur = self._conn.cursor()
         cur.execute(
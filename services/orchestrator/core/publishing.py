@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import logging
+from typing import Dict, List, Optional, Sequence
+
+from .models import Task
+from .persistence.base import Persistence
+
+PUBLISH_MODES = ("task", "feature", "level")
+
+
+def artifact_path(feature_id: str, task: Task) -> str:
+    return f"artifacts/agents/{feature_id}/{task.id}.txt"
+
+
+class ArtifactPublisher:
+    """Publishes task artifacts to GitHub as branches, commits and PRs.
+
+    Modes (DSF_GITHUB_PUBLISH_MODE):
+    - ``task``: one branch, commit and PR per completed task
+    - ``feature``: one commit and PR with every artifact once the feature is done
+    - ``level``: one commit and PR per DAG level, each branch stacked on the previous one
+
+    ``task_prs`` records which tasks are already published so reruns do not open
+    duplicate PRs.
+    """
+
+    def __init__(self, github, persistence: Optional[Persistence] = None, mode: str = "task"):
+        if mode not in PUBLISH_MODES:
+            raise ValueError(f"Unknown publish mode {mode!r}; expected one of {PUBLISH_MODES}")
+        self._github = github
+        self._persistence = persistence
+        self.mode = mode
+
+    def _published(self, tasks: Sequence[Task]) -> bool:
+        if not self._persistence:
+            return False
+        return all(self._persistence.get_task_pr(t.id) for t in tasks)
+
+    async def publish_task(self, feature_id: str, task: Task) -> Optional[int]:
+        if self._published([task]):
+            return None
+        branch = f"dsf/{feature_id}/{task.id}"
+        # Create branch if missing
+        try:
+            await self._github.create_branch(branch)
+        except Exception as e:
+            # Branch may already exist or other recoverable error
+            logging.warning("GitHub branch creation skipped: %s", e)
+        # Commit task result as artifact file
+        title = f"DSF: {task.title} [{task.agent_type.value}]"
+        await self._github.create_or_update_file(
+            path=artifact_path(feature_id, task),
+            content=task.result or "",
+            message=title,
+            branch=branch,
+        )
+        pr_num = await self._github.create_pull_request(
+            branch=branch, title=title, body="Automated by DSF"
+        )
+        await self._record(feature_id, [task], branch, pr_num, f"task {task.title}")
+        return pr_num
+
+    async def publish_feature(
+        self, feature_id: str, title: str, tasks: List[Task]
+    ) -> Optional[int]:
+        if not tasks or self._published(tasks):
+            return None
+        branch = f"dsf/{feature_id}"
+        pr_title = f"DSF: {title}"
+        await self._github.commit_files(branch, self._files(feature_id, tasks), pr_title)
+        pr_num = await self._github.create_pull_request(
+            branch=branch, title=pr_title, body=self._body(tasks)
+        )
+        await self._record(feature_id, tasks, branch, pr_num, f"feature {title}")
+        return pr_num
+
+    async def publish_levels(
+        self, feature_id: str, title: str, levels: List[List[Task]]
+    ) -> List[int]:
+        """Publish each fully completed level that has no PR yet, in DAG order.
+
+        Each level's PR targets the previous level's branch, so its diff shows only
+        that level's artifacts; the first targets the default branch.
+        """
+        prs: List[int] = []
+        previous: Optional[str] = None
+        for index, level in enumerate(levels, start=1):
+            branch = f"dsf/{feature_id}/level-{index}"
+            if self._published(level):
+                previous = branch
+                continue
+            pr_title = f"DSF: {title} (level {index})"
+            await self._github.commit_files(
+                branch, self._files(feature_id, level), pr_title, base_branch=previous
+            )
+            pr_num = await self._github.create_pull_request(
+                branch=branch, title=pr_title, body=self._body(level), base=previous
+            )
+            await self._record(feature_id, level, branch, pr_num, f"level {index} of {title}")
+            prs.append(pr_num)
+            previous = branch
+        return prs
+
+    @staticmethod
+    def _files(feature_id: str, tasks: Sequence[Task]) -> Dict[str, str]:
+        return {artifact_path(feature_id, t): t.result or "" for t in tasks}
+
+    @staticmethod
+    def _body(tasks: Sequence[Task]) -> str:
+        lines = [f"- {t.title} [{t.agent_type.value}]" for t in tasks]
+        return "Automated by DSF\n\n" + "\n".join(lines)
+
+    async def _record(
+        self, feature_id: str, tasks: Sequence[Task], branch: str, pr_num: int, what: str
+    ) -> None:
+        if not self._persistence:
+            return
+        for t in tasks:
+            self._persistence.record_task_pr(t.id, branch, pr_num)
+        # Comment on originating issue if linked
+        try:
+            issue_num = self._persistence.get_issue_by_feature(feature_id)
+            if issue_num:
+                await self._github.comment_on_issue(
+                    issue_num,
+                    f"Automated PR created for {what}: #{pr_num} on branch `{branch}`",
+                )
+        except Exception as _e:
+            logging.warning("Failed to comment on issue: %s", _e)
@@ -6,7 +6,12 @@ from typing import Optional
 
 class TaskQueue(ABC):
     @abstractmethod
-    def enqueue(self, payload: str) -> None: ...
+    def enqueue(self, payload: str, shard: Optional[str] = None) -> None:
+        """Add ``payload``; ``shard`` (e.g. a repository) selects a fairly-served sub-queue."""
 
     @abstractmethod
     def dequeue(self, block: bool = True, timeout: int = 5) -> Optional[str]: ...
+
+    @abstractmethod
+    def remove(self, payload: str, shard: Optional[str] = None) -> int:
+        """Drop queued copies of ``payload`` (e.g. for a cancelled feature); returns how many."""
@@ -1,27 +1,96 @@
 from __future__ import annotations
 
 import os
-from typing import Optional
+from typing import List, Optional
 
 import redis
+from redis.exceptions import WatchError
 
 from .base import TaskQueue
 
 
 class RedisQueue(TaskQueue):
+    """Redis lists, one per shard, consumed round-robin.
+
+    Each shard (repository) is its own list and the shard names are kept in a set.
+    ``dequeue`` BLPOPs all shards but rotates the key order on every call; BLPOP
+    serves the first non-empty key, so a repository with a deep backlog cannot
+    starve the others. Drained shards are dropped from the set when the queue is
+    idle and every ``prune_every`` dequeues, so repositories seen once do not
+    widen every BLPOP forever.
+    """
+
+    prune_every = 256
+
     def __init__(self, name: str = "dsf:queue:tasks", url: Optional[str] = None):
         self._name = name
+        self._shards = f"{name}:shards"
+        self._turn = 0
+        self._dequeues = 0
         self._url = url or os.getenv("DSF_REDIS_URL", "redis://localhost:6379/0")
         self._client = redis.Redis.from_url(self._url, decode_responses=True)
 
-    def enqueue(self, payload: str) -> None:
-        self._client.rpush(self._name, payload)
+    def _key(self, shard: Optional[str]) -> str:
+        return f"{self._name}:{shard}" if shard else self._name
+
+    def enqueue(self, payload: str, shard: Optional[str] = None) -> None:
+        key = self._key(shard)
+        pipe = self._client.pipeline()
+        if shard:
+            pipe.sadd(self._shards, key)
+        pipe.rpush(key, payload)
+        pipe.execute()
+
+    def remove(self, payload: str, shard: Optional[str] = None) -> int:
+        return int(self._client.lrem(self._key(shard), 0, payload))
+
+    def _keys(self) -> List[str]:
+        keys = [self._name, *sorted(self._client.smembers(self._shards))]
+        self._turn = (self._turn + 1) % len(keys)
+        return keys[self._turn :] + keys[: self._turn]
+
+    def prune(self) -> int:
+        """Drop empty shards from the shard set; returns how many were dropped."""
+        pruned = 0
+        for key in self._client.smembers(self._shards):
+            with self._client.pipeline() as pipe:
+                try:
+                    # An enqueue to ``key`` between the check and the SREM aborts it
+                    pipe.watch(key)
+                    if pipe.llen(key):
+                        continue
+                    pipe.multi()
+                    pipe.srem(self._shards, key)
+                    pruned += pipe.execute()[0]
+                except WatchError:
+                    continue
+        return pruned
 
     def dequeue(self, block: bool = True, timeout: int = 5) -> Optional[str]:
+        self._dequeues += 1
+        if self._dequeues % self.prune_every == 0:
+            self.prune()
+        keys = self._keys()
         if block:
-            item = self._client.blpop(self._name, timeout=timeout)
+            item = self._client.blpop(keys, timeout=timeout)
             if item is None:
+                self.prune()
                 return None
             return item[1]
-        data = self._client.lpop(self._name)
-        return data
+        for key in keys:
+            data = self._client.lpop(key)
+            if data is not None:
+                return data
+        self.prune()
+        return None
+
+    def depth(self) -> dict[str, int]:
+        """Pending messages per shard (the unsharded list is reported as "")."""
+        keys = [self._name, *sorted(self._client.smembers(self._shards))]
+        pipe = self._client.pipeline()
+        for key in keys:
+            pipe.llen(key)
+        return {
+            k.removeprefix(self._name).lstrip(":"): n
+            for k, n in zip(keys, pipe.execute(), strict=True)
+        }
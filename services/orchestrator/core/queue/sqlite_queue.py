@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .base import TaskQueue
+
+
+class SQLiteQueue(TaskQueue):
+    """Task queue in a SQLite table, shared by every process using the same file.
+
+    Needs no Redis: API and worker processes on one host share the orchestrator
+    database. Each message is claimed by a single ``DELETE ... RETURNING``, so two
+    workers never get the same one. Shards (repositories) are served round-robin
+    like ``RedisQueue``'s; a blocking ``dequeue`` polls with backoff up to ``timeout``.
+    """
+
+    def __init__(self, path: str = "artifacts/dsf.db", poll_interval: float = 0.05):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.poll_interval = poll_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._lock = threading.Lock()
+        self._turn = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    shard TEXT NOT NULL,
+                    payload TEXT NOT NULL
+                )
+                """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS queue_by_shard ON queue(shard, id)")
+            self._conn.commit()
+
+    def enqueue(self, payload: str, shard: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO queue(shard, payload) VALUES (?,?)", (shard or "", payload)
+            )
+            self._conn.commit()
+
+    def remove(self, payload: str, shard: Optional[str] = None) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM queue WHERE shard=? AND payload=?", (shard or "", payload)
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    def _shards(self) -> List[str]:
+        # Distinct shards via the index: one seek per shard rather than a scan of the queue
+        shards: List[str] = []
+        row = self._conn.execute("SELECT MIN(shard) FROM queue").fetchone()
+        while row and row[0] is not None:
+            shards.append(row[0])
+            row = self._conn.execute(
+                "SELECT MIN(shard) FROM queue WHERE shard>?", (row[0],)
+            ).fetchone()
+        return shards
+
+    def _pop(self) -> Optional[str]:
+        with self._lock:
+            shards = self._shards()
+            if not shards:
+                return None
+            self._turn = (self._turn + 1) % len(shards)
+            for shard in shards[self._turn :] + shards[: self._turn]:
+                row = self._conn.execute(
+                    """
+                    DELETE FROM queue WHERE id = (
+                        SELECT id FROM queue WHERE shard=? ORDER BY id LIMIT 1
+                    ) RETURNING payload
+                    """,
+                    (shard,),
+                ).fetchone()
+                self._conn.commit()
+                if row is not None:
+                    return row[0]
+            return None
+
+    def dequeue(self, block: bool = True, timeout: int = 5) -> Optional[str]:
+        deadline = time.monotonic() + timeout
+        delay = self.poll_interval / 8
+        while True:
+            payload = self._pop()
+            if payload is not None or not block or time.monotonic() >= deadline:
+                return payload
+            time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 2, self.poll_interval)
+
+    def depth(self) -> Dict[str, int]:
+        """Pending messages per shard (the unsharded queue is reported as "")."""
+        with self._lock:
+            rows = self._conn.execute("SELECT shard, COUNT(*) FROM queue GROUP BY shard").fetchall()
+        return {"": 0, **{shard: n for shard, n in rows}}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import os
+import random
+from dataclasses import dataclass
+from typing import Dict, Iterable
+
+from .models import AgentType
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often a task is attempted before it is marked FAILED, and how long to wait between."""
+
+    max_attempts: int = 3
+    backoff: float = 1.0  # seconds before the second attempt; doubles per attempt
+    max_backoff: float = 30.0
+
+    def delay(self, attempt: int) -> float:
+        """Wait after failed attempt number ``attempt`` (1-based), with full jitter."""
+        cap = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(cap / 2, cap)  # nosec B311 - jitter, not security
+
+
+def retry_policies_from_env(types: Iterable[AgentType]) -> Dict[AgentType, RetryPolicy]:
+    """``DSF_TASK_MAX_ATTEMPTS``/``DSF_TASK_RETRY_BACKOFF`` for all types, overridable per
+    type with ``DSF_TASK_MAX_ATTEMPTS_<TYPE>`` (e.g. ``DSF_TASK_MAX_ATTEMPTS_REVIEW=5``)."""
+    attempts = int(os.getenv("DSF_TASK_MAX_ATTEMPTS", "3"))
+    backoff = float(os.getenv("DSF_TASK_RETRY_BACKOFF", "1.0"))
+    max_backoff = float(os.getenv("DSF_TASK_RETRY_MAX_BACKOFF", "30"))
+    return {
+        t: RetryPolicy(
+            max_attempts=max(1, int(os.getenv(f"DSF_TASK_MAX_ATTEMPTS_{t.name}", attempts))),
+            backoff=float(os.getenv(f"DSF_TASK_RETRY_BACKOFF_{t.name}", backoff)),
+            max_backoff=max_backoff,
+        )
+        for t in types
+    }
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Modules imported once per worker so each job forks an interpreter that already has them
+WARM_MODULES = ("pytest",)
+_PYTHON = {"python", "python3"}
+
+
+@dataclass(frozen=True)
+class SandboxLimits:
+    wall_seconds: float = 30.0
+    cpu_seconds: int = 30
+    memory_bytes: int = 512 * 1024 * 1024  # address space
+    file_bytes: int = 16 * 1024 * 1024  # largest file a job may write
+    open_files: int = 256
+    max_output: int = 64 * 1024  # bytes of stdout/stderr kept
+
+    @classmethod
+    def from_env(cls) -> "SandboxLimits":
+        wall = float(os.getenv("DSF_SANDBOX_TIMEOUT_SECONDS", "30"))
+        return cls(
+            wall_seconds=wall,
+            cpu_seconds=int(os.getenv("DSF_SANDBOX_CPU_SECONDS", str(int(wall)))),
+            memory_bytes=int(os.getenv("DSF_SANDBOX_MEMORY_MB", "512")) * 1024 * 1024,
+        )
+
+
+@dataclass
+class SandboxResult:
+    returncode: int
+    stdout: str
+    stderr: str
+    duration_ms: float
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+
+def _warm(modules: Sequence[str], owner: int) -> None:
+    for name in modules:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+    # Workers hold both ends of their call queue, so they never see EOF when the
+    # orchestrator is killed; exit on our own instead of lingering under init.
+    threading.Thread(target=_watch_owner, args=(owner,), daemon=True).start()
+
+
+def _watch_owner(owner: int) -> None:
+    while True:
+        time.sleep(1.0)
+        try:
+            os.kill(owner, 0)
+        except ProcessLookupError:
+            os._exit(0)
+
+
+def _jail_path(jail: str, name: str) -> str:
+    path = os.path.normpath(os.path.join(jail, name))
+    if os.path.isabs(name) or not path.startswith(jail + os.sep):
+        raise ValueError(f"Sandbox file escapes its directory: {name!r}")
+    return path
+
+
+def _child(jail: str, argv: List[str], paths: List[str], limits: SandboxLimits, out, err):
+    """Runs in the forked job process; never returns."""
+    import resource
+
+    code = 1
+    try:
+        os.setsid()  # own process group, so a timeout kills everything it started
+        for limit, value in (
+            (resource.RLIMIT_CPU, limits.cpu_seconds),
+            (resource.RLIMIT_AS, limits.memory_bytes),
+            (resource.RLIMIT_FSIZE, limits.file_bytes),
+            (resource.RLIMIT_NOFILE, limits.open_files),
+            (resource.RLIMIT_CORE, 0),
+        ):
+            resource.setrlimit(limit, (value, value))
+        null = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(null, 0)
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+        os.chdir(jail)
+        # Nothing from the orchestrator's environment (tokens, DSNs) reaches the job
+        path = os.environ.get("PATH", os.defpath)
+        env = {"HOME": jail, "TMPDIR": jail, "PATH": path, "PYTHONDONTWRITEBYTECODE": "1"}
+        os.environ.clear()
+        os.environ.update(env)
+        tempfile.tempdir = jail
+        if argv[0] not in _PYTHON:
+            os.execvpe(argv[0], argv, env)
+        import runpy
+
+        sys.path[:0] = [jail, *paths]
+        try:
+            if argv[1] == "-m":
+                sys.argv = argv[2:]
+                runpy.run_module(argv[2], run_name="__main__", alter_sys=True)
+            else:
+                sys.argv = argv[1:]
+                runpy.run_path(argv[1], run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _read(f, limit: int) -> str:
+    f.seek(0)
+    data = f.read(limit + 1)
+    text = data[:limit].decode("utf-8", errors="replace")
+    return text + "\n[output truncated]" if len(data) > limit else text
+
+
+def _execute(files: Dict[str, str], argv: List[str], paths: List[str], limits: Dict) -> Dict:
+    """Pool worker: write ``files`` to a fresh jail, fork the job there and wait for it."""
+    limits = SandboxLimits(**limits)
+    jail = os.path.realpath(tempfile.mkdtemp(prefix="dsf-sandbox-"))
+    started = time.perf_counter()
+    try:
+        for name, content in files.items():
+            path = _jail_path(jail, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+        # Output goes to unnamed files outside the jail: no pipe to fill, nothing to tamper with
+        with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+            pid = os.fork()
+            if pid == 0:
+                _child(jail, argv, paths, limits, out, err)
+            deadline = started + limits.wall_seconds
+            timed_out = False
+            delay = 0.001
+            while True:
+                done, status = os.waitpid(pid, os.WNOHANG)
+                if done:
+                    break
+                if time.perf_counter() >= deadline:
+                    timed_out = True
+                    try:
+                        os.killpg(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        # Stuck before setsid(): not a group leader yet
+                        os.kill(pid, signal.SIGKILL)
+                    _, status = os.waitpid(pid, 0)
+                    break
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+            return {
+                "returncode": os.waitstatus_to_exitcode(status),
+                "stdout": _read(out, limits.max_output),
+                "stderr": _read(err, limits.max_output),
+                "duration_ms": (time.perf_counter() - started) * 1000,
+                "timed_out": timed_out,
+            }
+    finally:
+        shutil.rmtree(jail, ignore_errors=True)
+
+
+def _noop() -> int:
+    return os.getpid()
+
+
+class SandboxPool:
+    """Pre-forked worker processes that run generated tests, linters and checks.
+
+    Workers come from a ``forkserver`` and import ``WARM_MODULES`` once; every job
+    is then ``fork()``ed from a warm worker into a fresh temp-dir jail with rlimits
+    (CPU, address space, file size, open files), an empty environment and a wall
+    clock timeout that kills its whole process group. Jobs never touch the
+    orchestrator's process or event loop, and throughput scales with ``workers``.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        limits: Optional[SandboxLimits] = None,
+        warm_modules: Iterable[str] = WARM_MODULES,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.limits = limits or SandboxLimits()
+        self._warm_modules = tuple(warm_modules)
+        self.grace_seconds = 10.0  # beyond the wall clock before a worker is presumed stuck
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def from_env(cls) -> "SandboxPool":
+        workers = int(os.getenv("DSF_SANDBOX_WORKERS", "0")) or None
+        return cls(workers=workers, limits=SandboxLimits.from_env())
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            if "forkserver" in methods:
+                ctx.set_forkserver_preload([__name__])
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=ctx,
+                initializer=_warm,
+                initargs=(self._warm_modules, os.getpid()),
+            )
+        return self._executor
+
+    async def start(self) -> None:
+        """Start and warm every worker now rather than on the first job."""
+        pool = self._pool()
+        await asyncio.gather(
+            *(asyncio.wrap_future(pool.submit(_noop)) for _ in range(self.workers))
+        )
+
+    async def run(
+        self,
+        files: Dict[str, str],
+        argv: Sequence[str],
+        paths: Sequence[str] = (),
+        limits: Optional[SandboxLimits] = None,
+    ) -> SandboxResult:
+        """Run ``argv`` in a jail holding ``files``.
+
+        ``python``/``python3`` commands (``python -m pytest``, ``python script.py``) run
+        in the warm interpreter; anything else is exec'd. ``paths`` are prepended to
+        ``sys.path`` for Python jobs (e.g. a read-only workspace checkout).
+        """
+        limits = limits or self.limits
+        started = time.perf_counter()
+        future = self._pool().submit(_execute, dict(files), list(argv), list(paths), asdict(limits))
+        try:
+            # The worker enforces the wall clock; this bounds a worker that cannot
+            return SandboxResult(
+                **await asyncio.wait_for(
+                    asyncio.wrap_future(future), limits.wall_seconds + self.grace_seconds
+                )
+            )
+        except asyncio.TimeoutError:
+            logging.warning("Sandbox worker missed its deadline; restarting the pool")
+            self.close()
+            return SandboxResult(
+                returncode=-signal.SIGKILL,
+                stdout="",
+                stderr="sandbox worker did not respond",
+                duration_ms=(time.perf_counter() - started) * 1000,
+                timed_out=True,
+            )
+
+    async def run_pytest(
+        self, source: str, filename: str = "test_generated.py", paths: Sequence[str] = ()
+    ) -> SandboxResult:
+        return await self.run(
+            {filename: source},
+            ["python", "-m", "pytest", "-q", "-p", "no:cacheprovider", filename],
+            paths=paths,
+        )
+
+    def close(self) -> None:
+        """Kill the workers (and with them any job they are waiting on) and stop the pool."""
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        for proc in list((getattr(executor, "_processes", None) or {}).values()):
+            proc.kill()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    async def aclose(self) -> None:
+        await asyncio.to_thread(self.close)
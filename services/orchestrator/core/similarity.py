@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+_VECTORS = "vectors.f32"
+_KEYS = "keys.jsonl"
+
+
+class Match(NamedTuple):
+    key: str
+    score: float  # cosine similarity in [-1, 1]; near-duplicates score close to 1
+    meta: Dict[str, Any]
+
+
+def embed(text: str, dim: int = 256) -> np.ndarray:
+    """Hashed character-trigram vector of ``text``, L2-normalised (float32, ``dim`` a power of 2).
+
+    Trigram codes are hashed with a multiplicative hash into ``dim`` buckets with a
+    +/-1 sign, so the vector is stable across processes and needs no vocabulary.
+    """
+    data = np.frombuffer(" ".join(text.lower().split()).encode("utf-8"), dtype=np.uint8)
+    if data.size < 3:
+        return np.zeros(dim, dtype=np.float32)
+    codes = (
+        data[:-2].astype(np.uint32) << np.uint32(16)
+        | data[1:-1].astype(np.uint32) << np.uint32(8)
+        | data[2:].astype(np.uint32)
+    )
+    hashed = codes * np.uint32(2654435761)  # Knuth's multiplicative hash, mod 2**32
+    buckets = hashed >> np.uint32(32 - (dim.bit_length() - 1))
+    # The low bits of the product mirror the code's, so take the sign from a middle one
+    signs = np.where(hashed & np.uint32(1 << 15), 1.0, -1.0)
+    vec = np.bincount(buckets, weights=signs, minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class SimilarityIndex:
+    """In-process nearest-neighbour index over short documents (features and their results).
+
+    Vectors live in one contiguous float32 matrix, so a query is a single matrix-vector
+    product plus a partial sort. With ``directory`` every ``add`` is appended to a
+    vector file and a key log, and the index is reloaded from them on start; a key
+    added again replaces its earlier entry.
+    """
+
+    def __init__(self, dim: int = 256, directory: Optional[str] = None):
+        if dim < 8 or dim & (dim - 1):
+            raise ValueError("Similarity index dimension must be a power of two >= 8")
+        self.dim = dim
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((1024, dim), dtype=np.float32)
+        self._keys: List[str] = []
+        self._meta: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, text: str, meta: Optional[Dict[str, Any]] = None) -> None:
+        vec = embed(text, self.dim)
+        meta = dict(meta or {})
+        with self._lock:
+            self._put(key, vec, meta)
+            if self.directory:
+                with open(os.path.join(self.directory, _VECTORS), "ab") as f:
+                    f.write(vec.tobytes())
+                with open(os.path.join(self.directory, _KEYS), "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": key, "meta": meta}) + "\n")
+
+    def query(
+        self, text: str, k: int = 5, min_score: float = -1.0, exclude: Optional[str] = None
+    ) -> List[Match]:
+        """The ``k`` entries most similar to ``text``, best first."""
+        q = embed(text, self.dim)
+        with self._lock:
+            n = len(self._keys)
+            if not n or k <= 0:
+                return []
+            scores = self._vectors[:n] @ q
+            if exclude is not None and exclude in self._rows:
+                scores[self._rows[exclude]] = -np.inf
+            top = min(k, n)
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            return [
+                Match(self._keys[i], float(scores[i]), self._meta[i])
+                for i in best
+                if scores[i] >= min_score
+            ]
+
+    def _put(self, key: str, vec: np.ndarray, meta: Dict[str, Any]) -> None:
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            if row == len(self._vectors):
+                grown = np.zeros((row * 2, self.dim), dtype=np.float32)
+                grown[:row] = self._vectors
+                self._vectors = grown
+            self._keys.append(key)
+            self._meta.append(meta)
+            self._rows[key] = row
+        self._vectors[row] = vec
+        self._meta[row] = meta
+
+    def _load(self) -> None:
+        vectors_path = os.path.join(self.directory, _VECTORS)
+        keys_path = os.path.join(self.directory, _KEYS)
+        if not os.path.exists(keys_path) or not os.path.exists(vectors_path):
+            return
+        vectors = np.fromfile(vectors_path, dtype=np.float32)
+        vectors = vectors[: vectors.size - vectors.size % self.dim].reshape(-1, self.dim)
+        rows, offset = 0, 0
+        with open(keys_path, "rb") as f:
+            for line in f:
+                if rows >= len(vectors) or not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self._put(entry["key"], vectors[rows], entry.get("meta") or {})
+                rows += 1
+                offset += len(line)
+        # A crash between the two appends leaves one file ahead; cut both back to the
+        # last complete entry so later appends stay aligned
+        os.truncate(keys_path, offset)
+        os.truncate(vectors_path, rows * self.dim * 4)
+
+
+class FeatureMemory:
+    """Past features and task results, for duplicate detection and agent retrieval.
+
+    Two indexes under ``directory``: ``features`` (title and description, so a new
+    submission is compared like for like) and ``results`` (each finished task's
+    output, returned to agents as related earlier work).
+    """
+
+    def __init__(self, directory: Optional[str] = None, dim: int = 256, snippet: int = 2000):
+        self.snippet = snippet
+        self.features = SimilarityIndex(
+            dim, os.path.join(directory, "features") if directory else None
+        )
+        self.results = SimilarityIndex(
+            dim, os.path.join(directory, "results") if directory else None
+        )
+
+    def record(self, feature, tasks) -> None:
+        """Index a completed ``feature`` and the results of its ``tasks``."""
+        for task in tasks:
+            if task.result:
+                self.results.add(
+                    task.id,
+                    f"{task.title}\n{task.description or ''}\n{task.result}",
+                    {
+                        "feature_id": feature.id,
+                        "title": task.title,
+                        "agent_type": task.agent_type.value,
+                        "result": task.result[: self.snippet],
+                    },
+                )
+        self.features.add(
+            feature.id,
+            f"{feature.title}\n{feature.description}",
+            {"title": feature.title, "repo": feature.repo},
+        )
+
+    def similar_features(
+        self, title: str, description: str, k: int = 5, min_score: float = -1.0, exclude=None
+    ) -> List[Match]:
+        return self.features.query(f"{title}\n{description}", k, min_score, exclude)
+
+    def related_work(self, query: str, k: int = 3) -> List[Match]:
+        return self.results.query(query, k)
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import shutil
+import struct
+import subprocess  # nosec B404 - git is invoked with fixed argument lists
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+_INDEX_MAGIC = b"DSFIDX1\n"
+_U64 = struct.Struct("<Q")
+
+
+class IndexEntry(NamedTuple):
+    path: str
+    sha: str  # blob sha
+    size: int
+
+
+class FileIndex:
+    """Read-only, memory-mapped ``path -> (blob sha, size)`` index of one commit.
+
+    Layout: magic, entry count, one offset per entry, then ``path\\0sha\\0size\\n``
+    records sorted by path. Lookups binary-search the offset table in place, so
+    opening an index costs one ``mmap`` regardless of repository size and every
+    worktree at the same commit shares the same pages.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[: len(_INDEX_MAGIC)] != _INDEX_MAGIC:
+            self._mm.close()
+            raise ValueError(f"Not a file index: {path}")
+        self._count = _U64.unpack_from(self._mm, len(_INDEX_MAGIC))[0]
+        self._table = len(_INDEX_MAGIC) + _U64.size
+
+    @staticmethod
+    def write(path: str, entries: List[IndexEntry]) -> None:
+        records = sorted((e.path.encode(), e.sha.encode(), str(e.size).encode()) for e in entries)
+        offset = len(_INDEX_MAGIC) + _U64.size * (len(records) + 1)
+        offsets, blobs = [], []
+        for p, sha, size in records:
+            rec = p + b"\0" + sha + b"\0" + size + b"\n"
+            offsets.append(offset)
+            blobs.append(rec)
+            offset += len(rec)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_INDEX_MAGIC + _U64.pack(len(records)))
+            f.write(b"".join(_U64.pack(o) for o in offsets))
+            f.write(b"".join(blobs))
+        os.replace(tmp, path)  # readers never see a partial index
+
+    def _record(self, i: int) -> IndexEntry:
+        start = _U64.unpack_from(self._mm, self._table + i * _U64.size)[0]
+        end = self._mm.find(b"\n", start)
+        p, sha, size = self._mm[start:end].split(b"\0")
+        return IndexEntry(p.decode(), sha.decode(), int(size))
+
+    def _path_at(self, i: int) -> bytes:
+        start = _U64.unpack_from(self._mm, self._table + i * _U64.size)[0]
+        return self._mm[start : self._mm.find(b"\0", start)]
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._path_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def get(self, path: str) -> Optional[IndexEntry]:
+        i = self._lower_bound(path.encode())
+        if i < self._count and self._path_at(i) == path.encode():
+            return self._record(i)
+        return None
+
+    def iter_prefix(self, prefix: str = "") -> Iterator[IndexEntry]:
+        key = prefix.encode()
+        for i in range(self._lower_bound(key), self._count):
+            if not self._path_at(i).startswith(key):
+                return
+            yield self._record(i)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        return self.iter_prefix("")
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+@dataclass
+class Workspace:
+    task_id: str
+    path: str  # worktree checkout
+    commit: str
+    index: FileIndex
+    setup_ms: float
+
+    def read(self, path: str) -> str:
+        with open(os.path.join(self.path, path), encoding="utf-8", errors="replace") as f:
+            return f.read()
+
+
+class RepoWorkspaces:
+    """One bare mirror per repository plus a ``git worktree`` per task.
+
+    Mirrors live under ``root/mirrors`` and are fetched incrementally, at most every
+    ``fetch_interval`` seconds. Per-mirror operations are serialized with a thread
+    lock and an ``flock`` so several workers on one host can share the mirrors.
+    Commit indexes under ``root/index`` are kept for the ``max_indexes`` most
+    recently used commits.
+    """
+
+    def __init__(
+        self,
+        root: str = "artifacts/workspaces",
+        fetch_interval: float = 30.0,
+        token: Optional[str] = None,
+        max_indexes: int = 64,
+    ):
+        self.root = os.path.abspath(root)
+        self.fetch_interval = fetch_interval
+        self.max_indexes = max_indexes
+        self._token = token
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        for sub in ("mirrors", "worktrees", "index"):
+            os.makedirs(os.path.join(self.root, sub), exist_ok=True)
+
+    @staticmethod
+    def _slug(url: str) -> str:
+        name = url.rstrip("/").rsplit("/", 1)[-1].removesuffix(".git") or "repo"
+        return f"{name}-{hashlib.sha256(url.encode()).hexdigest()[:12]}"
+
+    def _git(self, *args: str, cwd: Optional[str] = None, token: Optional[str] = None) -> str:
+        env = None
+        token = token or self._token
+        if token:
+            # Through the environment, not ``-c``: argv is visible to every local user
+            basic = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+            env = dict(os.environ)
+            n = int(env.get("GIT_CONFIG_COUNT", "0"))
+            env.update(
+                {
+                    "GIT_CONFIG_COUNT": str(n + 1),
+                    f"GIT_CONFIG_KEY_{n}": "http.extraHeader",
+                    f"GIT_CONFIG_VALUE_{n}": f"Authorization: Basic {basic}",
+                }
+            )
+        out = subprocess.run(  # nosec B603
+            ["git", *args], cwd=cwd, env=env, check=True, capture_output=True, text=True
+        )
+        return out.stdout
+
+    @contextmanager
+    def _locked(self, mirror: str):
+        with self._locks_guard:
+            lock = self._locks.setdefault(mirror, threading.Lock())
+        with lock, open(mirror + ".lock", "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def mirror(self, url: str, refresh: bool = False, token: Optional[str] = None) -> str:
+        """Path of the bare mirror for ``url``, cloned or fetched as needed."""
+        path = os.path.join(self.root, "mirrors", self._slug(url) + ".git")
+        stamp = path + ".fetched"
+        with self._locked(path):
+            if not os.path.isdir(path):
+                self._git("clone", "--mirror", "--quiet", url, path, token=token)
+                open(stamp, "w").close()
+            elif refresh or time.time() - os.path.getmtime(stamp) > self.fetch_interval:
+                self._git("--git-dir", path, "fetch", "--prune", "--quiet", "origin", token=token)
+                os.utime(stamp)
+        return path
+
+    def _index(self, mirror: str, commit: str) -> FileIndex:
+        path = os.path.join(self.root, "index", f"{commit}.idx")
+        try:
+            os.utime(path)  # recency for eviction
+        except FileNotFoundError:
+            entries = []
+            listing = self._git("--git-dir", mirror, "ls-tree", "-r", "-l", "-z", commit)
+            for item in filter(None, listing.split("\0")):
+                meta, name = item.split("\t", 1)
+                _mode, kind, sha, size = meta.split()
+                if kind == "blob":
+                    entries.append(IndexEntry(name, sha, int(size)))
+            FileIndex.write(path, entries)
+            self._evict_indexes()
+        return FileIndex(path)
+
+    def _evict_indexes(self) -> None:
+        """Delete all but the ``max_indexes`` most recently used commit indexes.
+
+        Open ``FileIndex`` maps stay valid: unlinking only drops the directory entry.
+        """
+        directory = os.path.join(self.root, "index")
+        stale = []
+        for name in os.listdir(directory):
+            if name.endswith(".idx"):
+                try:
+                    stale.append((os.path.getmtime(os.path.join(directory, name)), name))
+                except FileNotFoundError:
+                    continue  # evicted by another worker
+        stale.sort(reverse=True)
+        for _, name in stale[self.max_indexes :]:
+            try:
+                os.unlink(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+    def checkout(
+        self,
+        url: str,
+        task_id: str,
+        ref: str = "HEAD",
+        refresh: bool = False,
+        token: Optional[str] = None,
+    ) -> Workspace:
+        """Detached worktree of ``ref`` for ``task_id``, with the commit's file index."""
+        started = time.perf_counter()
+        mirror = self.mirror(url, refresh=refresh, token=token)
+        dest = os.path.join(self.root, "worktrees", task_id)
+        with self._locked(mirror):
+            commit = self._git("--git-dir", mirror, "rev-parse", f"{ref}^{{commit}}").strip()
+            if os.path.isdir(dest):
+                self._git("--git-dir", mirror, "worktree", "remove", "--force", dest)
+            self._git("--git-dir", mirror, "worktree", "add", "--detach", "--quiet", dest, commit)
+        index = self._index(mirror, commit)
+        setup_ms = (time.perf_counter() - started) * 1000
+        logging.info("Workspace for task %s at %s ready in %.1f ms", task_id, commit, setup_ms)
+        return Workspace(task_id, dest, commit, index, setup_ms)
+
+    def release(self, url: str, workspace: Workspace) -> None:
+        workspace.index.close()
+        mirror = os.path.join(self.root, "mirrors", self._slug(url) + ".git")
+        with self._locked(mirror):
+            try:
+                self._git("--git-dir", mirror, "worktree", "remove", "--force", workspace.path)
+            except subprocess.CalledProcessError:
+                shutil.rmtree(workspace.path, ignore_errors=True)
+                self._git("--git-dir", mirror, "worktree", "prune")
+
+    async def acheckout(
+        self, url: str, task_id: str, ref: str = "HEAD", token: Optional[str] = None
+    ) -> Workspace:
+        return await asyncio.to_thread(self.checkout, url, task_id, ref, False, token)
+
+    async def arelease(self, url: str, workspace: Workspace) -> None:
+        await asyncio.to_thread(self.release, url, workspace)
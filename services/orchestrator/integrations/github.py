@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import hashlib
 import hmac
+import importlib.util
 import time
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional
 
-import httpx
+from .github_cache import CachedResponse, DefaultBranchMemo, ResponseCache
+from .ratelimit import request_priority
+
+if TYPE_CHECKING:
+    import httpx
+
+    from .ratelimit import GitHubRateLimiter
 
 
 def verify_signature(secret: str, signature_header: str, payload: bytes) -> bool:
@@ -20,82 +28,220 @@ def verify_signature(secret: str, signature_header: str, payload: bytes) -> bool
     return hmac.compare_digest(expected, signature_header)
 
 
+def _api_headers(token: str) -> dict[str, str]:
+    return {
+        "Authorization": f"Bearer {token}",
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28",
+        "User-Agent": "dsf-bot",
+    }
+
+
+def _read_path(path: str) -> str:
+    """GET path whose cached response a write to ``path`` makes stale."""
+    return path.replace("/git/refs/", "/git/ref/", 1)
+
+
+def _rate_limited(resp: httpx.Response) -> bool:
+    """Primary (remaining == 0) or secondary (retry-after / abuse message) rate limit."""
+    if resp.status_code == 429:
+        return True
+    if resp.status_code != 403:
+        return False
+    return (
+        resp.headers.get("x-ratelimit-remaining") == "0"
+        or "retry-after" in resp.headers
+        or "secondary rate limit" in resp.text.lower()
+    )
+
+
 @dataclass
-class GitHubClient:
+class AsyncGitHubClient:
+    """GitHub REST client for the orchestrator's event loop.
+
+    All calls share one keep-alive connection pool (HTTP/2 when ``h2`` is installed),
+    at most ``max_concurrency`` requests are in flight, and retries back off with
+    ``asyncio.sleep`` so other tasks keep running. Call ``aclose`` on shutdown.
+    """
+
     repo: str  # e.g., "owner/name"
     token: str
     api_base: str = "https://api.github.com"
     default_branch: str = "main"
+    max_connections: int = 20
+    max_concurrency: int = 10
+    http2: Optional[bool] = None  # None: enable when h2 is importable
+    timeout: float = 15.0
+    max_retries: int = 3
+    backoff: float = 1.0
+    inline_limit: int = 256 * 1024  # larger files are uploaded as separate blobs
+    limiter: Optional[GitHubRateLimiter] = None  # shared budget; see integrations.ratelimit
+    cache: Optional[ResponseCache] = None  # ETag revalidation for GETs (304s are free)
+    default_sha_ttl: float = 60.0
+    transport: Any = None  # httpx.AsyncBaseTransport override (tests)
+    _client: Optional[httpx.AsyncClient] = field(default=None, init=False, repr=False)
+    _slots: Optional[asyncio.Semaphore] = field(default=None, init=False, repr=False)
+    _default: DefaultBranchMemo = field(init=False, repr=False)
 
-    def _headers(self) -> dict[str, str]:
-        return {
-            "Authorization": f"Bearer {self.token}",
-            "Accept": "application/vnd.github+json",
-            "X-GitHub-Api-Version": "2022-11-28",
-            "User-Agent": "dsf-bot",
-        }
+    def __post_init__(self):
+        self._default = DefaultBranchMemo(ttl=self.default_sha_ttl)
+
+    def _pool(self) -> httpx.AsyncClient:
+        if self._client is None:
+            import httpx
+
+            http2 = self.http2
+            if http2 is None:
+                http2 = importlib.util.find_spec("h2") is not None
+            self._client = httpx.AsyncClient(
+                base_url=self.api_base,
+                http2=http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self.transport,
+            )
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(
+        self, method: str, path: str, ok_statuses: tuple[int, ...] = (), **kwargs
+    ) -> httpx.Response:
+        """Send a request, returning 2xx (and ``ok_statuses``) responses and raising otherwise.
 
-    def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
-        url = f"{self.api_base}{path}"
-        headers = self._headers()
+        Transport errors and 5xx responses are retried with exponential backoff; other
+        4xx responses are raised immediately since repeating them cannot succeed.
+        """
+        import httpx
+
+        client = self._pool()
+        headers = _api_headers(self.token)
         headers.update(kwargs.pop("headers", {}))
-        max_retries = 3
-        backoff = 1.0
-        for attempt in range(max_retries):
+        priority = request_priority(method, path)
+        cache_key = cached = None
+        if method == "GET" and self.cache is not None:
+            cache_key = ResponseCache.key(path, kwargs.get("params"))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                headers["If-None-Match"] = cached.etag
+        backoff = self.backoff
+        for attempt in range(self.max_retries):
+            if self.limiter is not None:
+                await self.limiter.acquire(priority)
             try:
-                with httpx.Client(timeout=15) as client:
-                    resp = client.request(method, url, headers=headers, **kwargs)
-                # Handle rate limiting
-                if resp.status_code == 403 and resp.headers.get("x-ratelimit-remaining") == "0":
+                async with self._slots:
+                    resp = await client.request(method, path, headers=headers, **kwargs)
+            except httpx.TransportError:
+                if attempt == self.max_retries - 1:
+                    raise
+                await asyncio.sleep(backoff)
+                backoff *= 2
+                continue
+            limited = _rate_limited(resp)
+            if self.limiter is not None:
+                await self.limiter.aobserve(
+                    resp.status_code, resp.headers, resp.text if limited else ""
+                )
+            if resp.status_code == 304 and cached is not None:
+                # Not modified: serve the stored body; conditional hits cost no rate limit
+                self.cache.touch(cache_key)
+                self.cache.hits += 1
+                if self.limiter is not None:
+                    await self.limiter.arefund(priority)
+                return httpx.Response(
+                    200, headers=cached.headers, content=cached.body, request=resp.request
+                )
+            # Handle rate limiting
+            if limited and attempt < self.max_retries - 1:
+                if self.limiter is None:
                     reset = resp.headers.get("x-ratelimit-reset")
-                    if reset and reset.isdigit():
+                    retry_after = resp.headers.get("retry-after")
+                    if retry_after and retry_after.isdigit():
+                        wait_for = int(retry_after)
+                    elif reset and reset.isdigit():
                         wait_for = max(0, int(reset) - int(time.time())) + 1
-                        time.sleep(min(wait_for, 10))
-                        continue
-                if resp.status_code >= 500:
-                    raise RuntimeError(f"GitHub server error {resp.status_code}")
-                if resp.status_code >= 400:
-                    raise RuntimeError(f"GitHub API error {resp.status_code}: {resp.text}")
-                return resp
-            except Exception:
-                if attempt < max_retries - 1:
-                    time.sleep(backoff)
-                    backoff *= 2
-                else:
-                    raise
+                    else:
+                        wait_for = backoff
+                    await asyncio.sleep(min(wait_for, 10))
+                # With a limiter, the next acquire() waits out the pause it recorded
+                continue
+            if resp.status_code >= 500 and attempt < self.max_retries - 1:
+                await asyncio.sleep(backoff)
+                backoff *= 2
+                continue
+            if resp.status_code >= 400 and resp.status_code not in ok_statuses:
+                raise RuntimeError(f"GitHub API error {resp.status_code}: {resp.text}")
+            if self.cache is not None:
+                if cache_key and resp.status_code == 200 and resp.headers.get("etag"):
+                    self.cache.misses += 1
+                    self.cache.put(
+                        cache_key,
+                        CachedResponse(
+                            etag=resp.headers["etag"],
+                            body=resp.content,
+                            headers={"content-type": resp.headers.get("content-type", "")},
+                        ),
+                    )
+                elif method != "GET" and resp.status_code < 400:
+                    self.cache.invalidate(_read_path(path))
+            return resp
+        raise RuntimeError(f"GitHub request failed after {self.max_retries} attempts")
+
+    def note_push(self, ref: str, sha: Optional[str]) -> None:
+        """Apply a push webhook: refresh the memoized default-branch sha and cached ref."""
+        branch = ref.removeprefix("refs/heads/")
+        if self.cache is not None:
+            self.cache.invalidate(f"/repos/{self.repo}/git/ref/heads/{branch}")
+        if branch == (self._default.branch() or self.default_branch):
+            if sha and sha.strip("0"):  # all-zero sha means the branch was deleted
+                self._default.set(branch, sha)
+            else:
+                self._default.invalidate()
 
-    def get_branch_ref(self, branch: str) -> Optional[str]:
-        r = self._request("GET", f"/repos/{self.repo}/git/ref/heads/{branch}")
+    async def get_branch_ref(self, branch: str) -> Optional[str]:
+        r = await self._request(
+            "GET", f"/repos/{self.repo}/git/ref/heads/{branch}", ok_statuses=(404,)
+        )
         if r.status_code == 404:
             return None
-        data = r.json()
-        return data.get("object", {}).get("sha")
-
-    def get_default_branch_sha(self) -> str:
-        r = self._request("GET", f"/repos/{self.repo}")
-        data = r.json()
-        default_branch = data.get("default_branch", self.default_branch)
-        r2 = self._request("GET", f"/repos/{self.repo}/git/ref/heads/{default_branch}")
-        return r2.json()["object"]["sha"]
-
-    def create_branch(self, branch: str, from_sha: Optional[str] = None) -> None:
-        sha = from_sha or self.get_default_branch_sha()
-        self._request(
+        return r.json().get("object", {}).get("sha")
+
+    async def get_default_branch_sha(self) -> str:
+        memo = self._default.get()
+        if memo is not None:
+            return memo[1]
+        r = await self._request("GET", f"/repos/{self.repo}")
+        default_branch = r.json().get("default_branch", self.default_branch)
+        r2 = await self._request("GET", f"/repos/{self.repo}/git/ref/heads/{default_branch}")
+        sha = r2.json()["object"]["sha"]
+        self._default.set(default_branch, sha)
+        return sha
+
+    async def create_branch(self, branch: str, from_sha: Optional[str] = None) -> None:
+        sha = from_sha or await self.get_default_branch_sha()
+        await self._request(
             "POST",
             f"/repos/{self.repo}/git/refs",
             json={"ref": f"refs/heads/{branch}", "sha": sha},
         )
 
-    def create_or_update_file(self, path: str, content: str, message: str, branch: str) -> None:
-        # Try get existing to fetch sha
-        sha: Optional[str] = None
-        r = self._request(
+    async def create_or_update_file(
+        self, path: str, content: str, message: str, branch: str
+    ) -> None:
+        r = await self._request(
             "GET",
             f"/repos/{self.repo}/contents/{path}",
+            ok_statuses=(404,),
             params={"ref": branch},
         )
-        if r.status_code == 200:
-            sha = r.json().get("sha")
+        sha = r.json().get("sha") if r.status_code == 200 else None
         payload = {
             "message": message,
             "content": base64.b64encode(content.encode()).decode(),
@@ -103,20 +249,87 @@ class GitHubClient:
         }
         if sha:
             payload["sha"] = sha
-        self._request("PUT", f"/repos/{self.repo}/contents/{path}", json=payload)
+        await self._request("PUT", f"/repos/{self.repo}/contents/{path}", json=payload)
 
-    def create_pull_request(self, branch: str, title: str, body: str = "") -> int:
-        r = self._request(
+    async def create_pull_request(
+        self, branch: str, title: str, body: str = "", base: Optional[str] = None
+    ) -> int:
+        """Open a PR from ``branch`` into ``base`` (the default branch when omitted)."""
+        r = await self._request(
             "POST",
             f"/repos/{self.repo}/pulls",
-            json={"title": title, "head": branch, "base": self.default_branch, "body": body},
+            json={
+                "title": title,
+                "head": branch,
+                "base": base or self.default_branch,
+                "body": body,
+            },
         )
         return r.json()["number"]
 
-    def comment_on_issue(self, issue_number: int, body: str) -> int:
-        r = self._request(
+    async def comment_on_issue(self, issue_number: int, body: str) -> int:
+        r = await self._request(
             "POST",
             f"/repos/{self.repo}/issues/{issue_number}/comments",
             json={"body": body},
         )
         return int(r.json().get("id", 0))
+
+    async def create_blob(self, content: str) -> str:
+        r = await self._request(
+            "POST",
+            f"/repos/{self.repo}/git/blobs",
+            json={"content": content, "encoding": "utf-8"},
+        )
+        return r.json()["sha"]
+
+    async def commit_files(
+        self,
+        branch: str,
+        files: dict[str, str],
+        message: str,
+        base_branch: Optional[str] = None,
+    ) -> str:
+        """Write ``files`` (path -> content) to ``branch`` as a single commit.
+
+        The branch is created from ``base_branch`` (default branch when omitted) if it does
+        not exist. Small files are sent inline in the tree request, so the call count does
+        not grow with the number of files. Returns the new commit sha.
+        """
+        head = await self.get_branch_ref(branch)
+        if head:
+            parent = head
+        elif base_branch:
+            parent = await self.get_branch_ref(base_branch)
+            if parent is None:
+                raise RuntimeError(f"Base branch {base_branch} not found")
+        else:
+            parent = await self.get_default_branch_sha()
+        r = await self._request("GET", f"/repos/{self.repo}/git/commits/{parent}")
+        base_tree = r.json()["tree"]["sha"]
+
+        entries = []
+        for path, content in files.items():
+            entry = {"path": path, "mode": "100644", "type": "blob"}
+            if len(content.encode()) > self.inline_limit:
+                entry["sha"] = await self.create_blob(content)
+            else:
+                entry["content"] = content
+            entries.append(entry)
+        r = await self._request(
+            "POST", f"/repos/{self.repo}/git/trees", json={"base_tree": base_tree, "tree": entries}
+        )
+        tree = r.json()["sha"]
+        r = await self._request(
+            "POST",
+            f"/repos/{self.repo}/git/commits",
+            json={"message": message, "tree": tree, "parents": [parent]},
+        )
+        commit = r.json()["sha"]
+        if head:
+            await self._request(
+                "PATCH", f"/repos/{self.repo}/git/refs/heads/{branch}", json={"sha": commit}
+            )
+        else:
+            await self.create_branch(branch, from_sha=commit)
+        return commit
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class CachedResponse:
+    etag: str
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    stored_at: float = field(default_factory=time.monotonic)
+
+
+class ResponseCache:
+    """LRU cache of GET responses keyed by URL, used for ``If-None-Match`` revalidation.
+
+    Entries older than ``ttl`` seconds are dropped; the cache holds at most
+    ``max_entries`` responses, evicting the least recently used.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(path: str, params: Optional[dict] = None) -> str:
+        if not params:
+            return path
+        return path + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, key: str) -> None:
+        """Mark ``key`` as revalidated (a 304 restarts its TTL)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.stored_at = time.monotonic()
+
+    def invalidate(self, path: str) -> None:
+        """Drop every entry for ``path`` regardless of query parameters."""
+        with self._lock:
+            for key in [k for k in self._entries if k.split("?", 1)[0] == path]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class DefaultBranchMemo:
+    """Default branch name and head sha for one repository, refreshed after ``ttl``."""
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._value: Optional[Tuple[str, str, float]] = None
+
+    def get(self) -> Optional[Tuple[str, str]]:
+        if self._value is None or time.monotonic() - self._value[2] > self.ttl:
+            return None
+        return self._value[0], self._value[1]
+
+    def set(self, branch: str, sha: str) -> None:
+        self._value = (branch, sha, time.monotonic())
+
+    def branch(self) -> Optional[str]:
+        return self._value[0] if self._value else None
+
+    def invalidate(self) -> None:
+        self._value = None
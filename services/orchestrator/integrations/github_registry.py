@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+def repo_secret_name(repo: str) -> str:
+    """Secret holding a repository's own token, e.g. ``DSF_GITHUB_TOKEN_ACME_API``."""
+    return "DSF_GITHUB_TOKEN_" + re.sub(r"[^A-Za-z0-9]+", "_", repo).upper()
+
+
+class GitHubClientRegistry:
+    """One GitHub client per repository, built on first use by ``factory(repo)``.
+
+    Every repository gets its own connection pool, concurrency cap and response
+    cache, so one busy repository cannot hold the connections another needs. Rate
+    budgets follow tokens: repositories configured with their own token (see
+    ``repo_secret_name``) also get their own budget.
+
+    Only ``default_repo`` and the ``allowed`` repositories are accepted; ``allow_any``
+    opts in to any repository the token can reach.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], Any],
+        default_repo: Optional[str] = None,
+        allowed: Optional[Iterable[str]] = None,
+        allow_any: bool = False,
+    ):
+        self._factory = factory
+        self.default_repo = default_repo
+        self._allowed = {r.strip() for r in allowed or () if r.strip()}
+        self.allow_any = allow_any
+        self._clients: Dict[str, Any] = {}
+
+    def resolve(self, repo: Optional[str]) -> str:
+        """Repository a feature targets; raises ValueError when it is not allowed."""
+        repo = repo or self.default_repo
+        if not repo:
+            raise ValueError("No repository given and DSF_GITHUB_REPO is not set")
+        if not self.allow_any and repo not in self._allowed and repo != self.default_repo:
+            raise ValueError(f"Repository {repo!r} is not in DSF_GITHUB_REPOS")
+        return repo
+
+    def get(self, repo: Optional[str] = None) -> Any:
+        repo = self.resolve(repo)
+        client = self._clients.get(repo)
+        if client is None:
+            client = self._clients[repo] = self._factory(repo)
+        return client
+
+    def peek(self, repo: str) -> Optional[Any]:
+        """The client for ``repo`` if one was built, without creating it."""
+        return self._clients.get(repo)
+
+    def repos(self) -> List[str]:
+        return sorted(self._clients)
+
+    def rotate_token(self, old: Optional[str], new: str) -> int:
+        """Point clients using ``old`` at ``new``; returns how many were updated."""
+        rotated = 0
+        for client in self._clients.values():
+            if getattr(client, "token", None) == old:
+                client.token = new  # read per request, so in-flight retries pick it up
+                rotated += 1
+        return rotated
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
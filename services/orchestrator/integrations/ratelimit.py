@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import os
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from enum import IntEnum
+from typing import Any, Callable, Dict, Mapping, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    HIGH = 0  # PR creation and git writes
+    NORMAL = 1  # reads
+    LOW = 2  # issue comments
+
+
+def request_priority(method: str, path: str) -> Priority:
+    if method == "POST" and path.endswith("/comments"):
+        return Priority.LOW
+    if method == "GET":
+        return Priority.NORMAL
+    return Priority.HIGH
+
+
+class BucketStore(ABC):
+    """Shared limiter state; ``update`` runs ``fn`` on it as one atomic read-modify-write.
+
+    ``blocking`` stores do I/O in ``update``; the limiter's async methods run them on
+    a worker thread so a slow file lock or Redis round trip never stalls the loop.
+    """
+
+    blocking = True
+
+    @abstractmethod
+    def update(self, fn: Callable[[Dict[str, Any]], T]) -> T: ...
+
+
+class LocalBucketStore(BucketStore):
+    blocking = False
+
+    def __init__(self):
+        self._state: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def update(self, fn: Callable[[Dict[str, Any]], T]) -> T:
+        with self._lock:
+            return fn(self._state)
+
+
+class FileBucketStore(BucketStore):
+    """State in a JSON file guarded by ``flock``; shared by processes on one host."""
+
+    def __init__(self, path: str = "artifacts/github-ratelimit.json"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._path = path
+
+    def update(self, fn: Callable[[Dict[str, Any]], T]) -> T:
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                raw = f.read()
+                state = json.loads(raw) if raw.strip() else {}
+                result = fn(state)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class RedisBucketStore(BucketStore):
+    """State in one Redis key, updated with optimistic WATCH/MULTI transactions.
+
+    A transaction that keeps losing the race is retried ``max_attempts`` times with a
+    short jittered pause, then gives up with ``RuntimeError``.
+    """
+
+    max_attempts = 20
+
+    def __init__(self, key: str, url: Optional[str] = None):
+        import redis
+
+        self._key = key
+        url = url or os.getenv("DSF_REDIS_URL", "redis://localhost:6379/0")
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._watch_error = redis.WatchError
+
+    def update(self, fn: Callable[[Dict[str, Any]], T]) -> T:
+        with self._client.pipeline() as pipe:
+            for attempt in range(self.max_attempts):
+                try:
+                    pipe.watch(self._key)
+                    raw = pipe.get(self._key)
+                    state = json.loads(raw) if raw else {}
+                    result = fn(state)
+                    pipe.multi()
+                    pipe.set(self._key, json.dumps(state), ex=7200)
+                    pipe.execute()
+                    return result
+                except self._watch_error:
+                    time.sleep(random.uniform(0, 0.002 * (attempt + 1)))  # nosec B311
+        raise RuntimeError(f"Rate limit state {self._key} stayed contended; gave up")
+
+
+class GitHubRateLimiter:
+    """Paces GitHub requests so the hourly budget lasts until the reset, across processes.
+
+    ``remaining``/``reset`` come from ``x-ratelimit-*`` headers and are decremented
+    locally between responses. Tokens refill at ``remaining / seconds-to-reset`` up to
+    ``burst``, so traffic slows down before the budget runs out instead of failing.
+    Lower priorities stop at a reserve (a fraction of the limit) that is left for PR
+    creation, and secondary-limit responses pause everyone until ``retry-after``.
+    """
+
+    def __init__(
+        self,
+        store: BucketStore,
+        burst: int = 50,
+        limit: int = 5000,
+        window: float = 3600.0,
+        reserves: Optional[Mapping[Priority, float]] = None,
+        max_wait: float = 3600.0,
+    ):
+        self._store = store
+        self.burst = burst
+        self.limit = limit
+        self.window = window
+        self.reserves = dict(
+            reserves or {Priority.HIGH: 0.0, Priority.NORMAL: 0.02, Priority.LOW: 0.1}
+        )
+        self.max_wait = max_wait
+
+    def _take(self, st: Dict[str, Any], now: float, priority: Priority) -> float:
+        paused_until = st.get("paused_until", 0.0)
+        if now < paused_until:
+            return paused_until - now
+        if now >= st.get("reset", 0.0):
+            # New window (or no headers yet): assume a full budget until told otherwise
+            st.update(
+                limit=st.get("limit", self.limit),
+                remaining=st.get("limit", self.limit),
+                reset=now + self.window,
+                tokens=float(self.burst),
+                updated=now,
+            )
+        remaining, reset = st["remaining"], st["reset"]
+        if remaining - 1 < self.reserves[priority] * st["limit"]:
+            return reset - now
+        rate = remaining / max(reset - now, 1.0)
+        tokens = min(float(self.burst), st["tokens"] + (now - st["updated"]) * rate)
+        st["updated"] = now
+        if tokens < 1:
+            st["tokens"] = tokens
+            return (1 - tokens) / rate
+        st["tokens"] = tokens - 1
+        st["remaining"] = remaining - 1
+        return 0.0
+
+    def try_acquire(self, priority: Priority = Priority.NORMAL) -> float:
+        """Take a token if one is available; otherwise return seconds to wait."""
+        now = time.time()
+        return self._store.update(lambda st: self._take(st, now, priority))
+
+    async def _off_loop(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._store.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def acquire(self, priority: Priority = Priority.NORMAL) -> None:
+        while True:
+            wait = await self._off_loop(self.try_acquire, priority)
+            if wait <= 0:
+                return
+            await asyncio.sleep(min(wait, self.max_wait))
+
+    async def arefund(self, priority: Priority = Priority.NORMAL) -> None:
+        """``refund`` without blocking the event loop on the store."""
+        await self._off_loop(self.refund, priority)
+
+    async def aobserve(self, status: int, headers: Mapping[str, str], body: str = "") -> None:
+        """``observe`` without blocking the event loop on the store."""
+        await self._off_loop(self.observe, status, headers, body)
+
+    def refund(self, priority: Priority = Priority.NORMAL) -> None:
+        """Return a token for a request GitHub did not count (e.g. a 304 revalidation)."""
+
+        def apply(st: Dict[str, Any]) -> None:
+            if "remaining" in st:
+                st["remaining"] = min(st["remaining"] + 1, st["limit"])
+                st["tokens"] = min(st["tokens"] + 1, float(self.burst))
+
+        self._store.update(apply)
+
+    def observe(self, status: int, headers: Mapping[str, str], body: str = "") -> None:
+        """Sync shared state with a response's rate-limit headers and limit signals."""
+        now = time.time()
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        limit = headers.get("x-ratelimit-limit")
+        retry_after = headers.get("retry-after")
+
+        def apply(st: Dict[str, Any]) -> None:
+            if remaining is not None and reset is not None:
+                if limit is not None:
+                    st["limit"] = int(limit)
+                if float(reset) != st.get("reset"):
+                    st.update(
+                        remaining=int(remaining),
+                        reset=float(reset),
+                        tokens=min(st.get("tokens", float(self.burst)), float(self.burst)),
+                        updated=now,
+                    )
+                else:
+                    # Responses can arrive out of order; never raise the count within a window
+                    st["remaining"] = min(st["remaining"], int(remaining))
+                st.setdefault("limit", self.limit)
+            if status in (403, 429):
+                pause = None
+                if retry_after and retry_after.isdigit():
+                    pause = now + int(retry_after)
+                elif remaining == "0" and reset is not None:
+                    pause = float(reset)
+                elif "secondary rate limit" in body.lower():
+                    pause = now + 60
+                if pause is not None:
+                    st["paused_until"] = max(st.get("paused_until", 0.0), pause)
+
+        self._store.update(apply)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self._store.update(dict)
+
+
+def limiter_from_env(name: str, redis_url: Optional[str] = None) -> GitHubRateLimiter:
+    """Limiter for the token in secret ``name``, shared via DSF_GITHUB_RATE_BACKEND.
+
+    GitHub budgets are per token; keying by the secret name rather than the token
+    keeps one budget across rotations and keeps tokens out of keys and file names.
+    """
+    key = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+    backend = os.getenv("DSF_GITHUB_RATE_BACKEND", "file").lower()
+    store: BucketStore
+    if backend == "redis":
+        store = RedisBucketStore(f"dsf:github:ratelimit:{key}", url=redis_url)
+    elif backend == "file":
+        store = FileBucketStore(f"artifacts/github-ratelimit-{key}.json")
+    else:
+        store = LocalBucketStore()
+    return GitHubRateLimiter(store, burst=int(os.getenv("DSF_GITHUB_RATE_BURST", "50")))
@@ -2,11 +2,35 @@ from __future__ import annotations
 
 import logging
 import os
+import threading
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
 
-from azure.identity import DefaultAzureCredential
-from azure.keyvault.secrets import SecretClient
+# Azure SDK classes are resolved on first use (see _load_azure_sdk) so processes
+# that never enable Key Vault do not pay for importing azure-identity.
+DefaultAzureCredential = None
+SecretClient = None
+
+RotationCallback = Callable[[str, Optional[str], Optional[str]], None]
+
+
+def _load_azure_sdk():
+    global DefaultAzureCredential, SecretClient
+    if DefaultAzureCredential is None:
+        from azure.identity import DefaultAzureCredential as _Credential
+
+        DefaultAzureCredential = _Credential
+    if SecretClient is None:
+        from azure.keyvault.secrets import SecretClient as _Client
+
+        SecretClient = _Client
+    return DefaultAzureCredential, SecretClient
+
+
+class _Entry(NamedTuple):
+    value: Optional[str]  # None: not found / fetch failed (negative entry)
+    expires: float
 
 
 class SecretsProvider:
@@ -14,18 +38,42 @@ class SecretsProvider:
     Loads secrets from Azure Key Vault when enabled, with environment variable fallback.
     - Enable with DSF_KEYVAULT_ENABLED=true and set DSF_KEYVAULT_URI (e.g., https://<name>.vault.azure.net/)
     - Uses DefaultAzureCredential (MSI in Azure, Azure CLI locally)
-    - Caches secrets in-process to reduce calls
+    - ``shared()`` is the process-wide instance; ``prefetch`` loads the startup set concurrently
+    - Values are cached for ``ttl`` seconds and misses/failures for ``negative_ttl``;
+      a background thread refreshes entries before they expire, so reads never wait
+      on Key Vault; a secret read before it was loaded returns the default and is
+      fetched in the background (``prefetch`` the ones needed at startup)
+    - ``subscribe`` reports rotated values (e.g. to swap a GitHub token in place),
+      including a value arriving for a secret that readers were given the default for
     """
 
-    def __init__(self, enabled: bool, vault_uri: Optional[str] = None):
+    _shared: Optional["SecretsProvider"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        enabled: bool,
+        vault_uri: Optional[str] = None,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+    ):
         self._enabled = enabled and bool(vault_uri)
         self._vault_uri = vault_uri
-        self._cache: dict[str, Optional[str]] = {}
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._cache: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._inflight: set[str] = set()
+        self._subscribers: Dict[str, List[RotationCallback]] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
         self._client: Optional[SecretClient] = None
         if self._enabled:
             try:
-                cred = DefaultAzureCredential()
-                self._client = SecretClient(vault_url=vault_uri, credential=cred)
+                credential_cls, client_cls = _load_azure_sdk()
+                cred = credential_cls()
+                self._client = client_cls(vault_url=vault_uri, credential=cred)
             except Exception as e:
                 logging.warning("Key Vault client init failed; falling back to env: %s", e)
                 self._enabled = False
@@ -34,36 +82,139 @@ class SecretsProvider:
     def from_env(cls) -> "SecretsProvider":
         enabled = os.getenv("DSF_KEYVAULT_ENABLED", "false").lower() in {"1", "true", "yes"}
         uri = os.getenv("DSF_KEYVAULT_URI")
-        return cls(enabled=enabled, vault_uri=uri)
+        return cls(
+            enabled=enabled,
+            vault_uri=uri,
+            ttl=float(os.getenv("DSF_SECRETS_TTL_SECONDS", "300")),
+            negative_ttl=float(os.getenv("DSF_SECRETS_NEGATIVE_TTL_SECONDS", "30")),
+        )
 
-    def get_secret(self, name: str, default: Optional[str] = None) -> Optional[str]:
-        # Cached
-        if name in self._cache:
-            return self._cache[name]
+    @classmethod
+    def shared(cls) -> "SecretsProvider":
+        """Process-wide provider (built from the environment, refreshing in the background)."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls.from_env()
+                cls._shared.start_refresh()
+            return cls._shared
 
+    # Reads
+
+    def get_secret(self, name: str, default: Optional[str] = None) -> Optional[str]:
         # Env fallback first for convenience (allows overrides)
         env_val = os.getenv(name)
         if env_val:
-            self._cache[name] = env_val
             return env_val
-
-        # Key Vault
+        entry = self._cache.get(name)
+        if entry is not None:
+            if entry.expires <= time.monotonic():
+                # Serve the stale value and refresh off the caller's thread
+                self._schedule_refresh(name)
+            return entry.value if entry.value is not None else default
         if not self._enabled or not self._client:
-            self._cache[name] = default
             return default
-        # Simple retries for transient issues
+        # Not prefetched: never block the caller on Key Vault. The placeholder marks
+        # that readers got the default, so the value's arrival is reported to subscribers.
+        with self._lock:
+            self._cache.setdefault(name, _Entry(None, 0.0))
+        self._schedule_refresh(name)
+        return default
+
+    def prefetch(self, names: Iterable[str]) -> None:
+        """Warm the cache for ``names`` in parallel instead of one blocking fetch at a time."""
+        missing = [n for n in dict.fromkeys(names) if n not in self._cache and not os.getenv(n)]
+        if not missing or not self._enabled or not self._client:
+            return
+        with ThreadPoolExecutor(
+            max_workers=min(8, len(missing)), thread_name_prefix="dsf-secrets"
+        ) as pool:
+            list(pool.map(self._refresh, missing))
+
+    # Rotation
+
+    def subscribe(self, name: str, callback: RotationCallback) -> None:
+        """Call ``callback(name, old, new)`` whenever a refresh changes ``name``'s value."""
+        with self._lock:
+            self._subscribers.setdefault(name, []).append(callback)
+
+    def unsubscribe(self, name: str, callback: RotationCallback) -> None:
+        with self._lock:
+            callbacks = self._subscribers.get(name, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def start_refresh(self) -> None:
+        """Refresh entries shortly before they expire, on a daemon thread."""
+        if not self._enabled or self._refresher is not None:
+            return
+        self._refresher = threading.Thread(
+            target=self._refresh_loop, name="dsf-secrets-refresh", daemon=True
+        )
+        self._refresher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def _refresh_loop(self) -> None:
+        interval = max(0.05, min(self.ttl, self.negative_ttl) / 4)
+        while not self._stop.wait(interval):
+            # Refresh ahead: anything expiring within the next fifth of its TTL
+            horizon = time.monotonic() + max(interval, self.ttl / 5)
+            for name, entry in list(self._cache.items()):
+                if entry.expires <= horizon:
+                    self._schedule_refresh(name)
+
+    def _schedule_refresh(self, name: str) -> None:
+        with self._lock:
+            if name in self._inflight or self._stop.is_set():
+                return
+            self._inflight.add(name)
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="dsf-secrets")
+        try:
+            self._pool.submit(self._refresh, name)
+        except RuntimeError:  # pool shut down
+            self._inflight.discard(name)
+
+    def _refresh(self, name: str, attempts: int = 3) -> Optional[str]:
+        """Fetch ``name`` from Key Vault and update the cache; returns the cached value."""
+        try:
+            value, found = self._fetch(name, attempts)
+            now = time.monotonic()
+            with self._lock:
+                previous = self._cache.get(name)
+                if found:
+                    self._cache[name] = _Entry(value, now + self.ttl)
+                elif previous is not None and previous.value is not None:
+                    # Keep serving the last good value; try again after the negative TTL
+                    value = previous.value
+                    self._cache[name] = _Entry(value, now + self.negative_ttl)
+                else:
+                    self._cache[name] = _Entry(None, now + self.negative_ttl)
+                callbacks = list(self._subscribers.get(name, ()))
+            if found and previous is not None and previous.value != value:
+                for callback in callbacks:
+                    try:
+                        callback(name, previous.value, value)
+                    except Exception as e:
+                        logging.warning("Secret rotation handler for %s failed: %s", name, e)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.discard(name)
+
+    def _fetch(self, name: str, attempts: int) -> tuple[Optional[str], bool]:
+        # Simple retries for transient issues (background threads only when attempts > 1)
         backoff = 0.5
-        for attempt in range(3):
+        for attempt in range(attempts):
             try:
-                secret = self._client.get_secret(name)
-                value = secret.value
-                self._cache[name] = value
-                return value
+                return self._client.get_secret(name).value, True
             except Exception as e:
-                if attempt == 2:
+                if attempt == attempts - 1:
                     logging.warning("Key Vault get_secret failed for %s: %s", name, e)
                     break
                 time.sleep(backoff)
                 backoff *= 2
-        self._cache[name] = default
-        return default
+        return None, False
@@ -2,33 +2,60 @@ from __future__ import annotations
 
 import asyncio
 import json
+import logging
 import os
+from typing import Optional
 
-from services.orchestrator.core.orchestrator import Orchestrator
-from services.orchestrator.core.queue.redis_queue import RedisQueue
+from services.orchestrator.core.orchestrator import Orchestrator, startup_secret_names
+from services.orchestrator.core.queue.base import TaskQueue
+from services.orchestrator.integrations.secrets import SecretsProvider
 
 
-async def handle_task(orch: Orchestrator, task_id: str) -> None:
-    await orch._run_task(task_id)
+async def handle_task(orch: Orchestrator, task_id: str, repo: Optional[str] = None) -> None:
+    await orch.run_queued_task(task_id, repo)
+
+
+async def run_worker(queue, orch: Orchestrator, poll_timeout: int = 5) -> None:
+    # One long-lived event loop so pooled clients (e.g. GitHub) keep their connections
+    try:
+        await orch.start()
+        while True:
+            msg = await asyncio.to_thread(queue.dequeue, True, poll_timeout)
+            if not msg:
+                continue
+            try:
+                data = json.loads(msg)
+                await handle_task(orch, data["task_id"], data.get("repo"))
+            except Exception as e:
+                logging.error("Worker failed on %s: %s", msg, e)
+    finally:
+        await orch.aclose()
+
+
+def queue_from_env(secrets: SecretsProvider) -> Optional[TaskQueue]:
+    """The task queue selected by DSF_QUEUE (redis|sqlite), or None when tasks run inline."""
+    backend = os.getenv("DSF_QUEUE", "").lower()
+    if backend == "redis":
+        from services.orchestrator.core.queue.redis_queue import RedisQueue
+
+        return RedisQueue(url=secrets.get_secret("DSF_REDIS_URL", os.getenv("DSF_REDIS_URL")))
+    if backend == "sqlite":
+        from services.orchestrator.core.queue.sqlite_queue import SQLiteQueue
+
+        return SQLiteQueue()  # the orchestrator database
+    return None
 
 
 def main() -> int:
-    if os.getenv("DSF_QUEUE", "").lower() != "redis":
-        print("DSF_QUEUE!=redis; worker is idle.")
+    secrets = SecretsProvider.shared()
+    secrets.prefetch(startup_secret_names())
+    queue = queue_from_env(secrets)
+    if queue is None:
+        print("DSF_QUEUE is not redis or sqlite; worker is idle.")
         return 0
-    queue = RedisQueue()
-    orch = Orchestrator()
-    print("DSF worker started (redis)")
-    while True:
-        msg = queue.dequeue(block=True, timeout=5)
-        if not msg:
-            continue
-        try:
-            data = json.loads(msg)
-            task_id = data["task_id"]
-            asyncio.run(handle_task(orch, task_id))
-        except Exception as e:
-            print(f"worker error: {e}")
+    orch = Orchestrator(secrets=secrets)
+    print(f"DSF worker started ({os.getenv('DSF_QUEUE', '').lower()})")
+    asyncio.run(run_worker(queue, orch))
     return 0
 
 
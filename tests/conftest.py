@@ -0,0 +1,167 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class MockGitHubServer(ThreadingHTTPServer):
+    """Small stateful stand-in for the GitHub REST API, served over real local sockets."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _MockGitHubHandler)
+        self.lock = threading.Lock()
+        self.requests: list[tuple[str, str]] = []
+        self.connections: set[tuple[str, int]] = set()
+        self.fail_next: list[int] = []
+        self.extra_headers: dict[str, str] = {}
+        self.delay = 0.0
+        self.not_modified = 0
+        self.refs = {"heads/main": "base-sha"}
+        self.files: dict[tuple[str, str], str] = {}
+        self.pulls: list[dict] = []
+        self.comments: list[dict] = []
+        # Git Data API objects: commit sha -> {tree, parents, message}, tree sha -> files
+        self.commits = {"base-sha": {"tree": "base-tree", "parents": [], "message": "init"}}
+        self.trees: dict[str, dict[str, str]] = {"base-tree": {}}
+        self.blobs: dict[str, str] = {}
+
+    def _new_sha(self, kind: str) -> str:
+        return f"{kind}-{len(self.commits) + len(self.trees) + len(self.blobs)}"
+
+    def tree_files(self, ref: str) -> dict[str, str]:
+        return self.trees[self.commits[self.refs[ref]]["tree"]]
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, method: str, pattern: str) -> int:
+        return sum(1 for m, p in self.requests if m == method and re.search(pattern, p))
+
+
+class _MockGitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body=None, headers=None):
+        data = json.dumps(body if body is not None else {}).encode()
+        headers = dict(headers or {})
+        if self.command == "GET" and status == 200:
+            etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                self.server.not_modified += 1
+                status, data = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in {**self.server.extra_headers, **headers}.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _handle(self):
+        srv: MockGitHubServer = self.server
+        path = self.path.split("?", 1)[0]
+        body = self._body()
+        with srv.lock:
+            srv.requests.append((self.command, path))
+            srv.connections.add(self.client_address)
+            status = srv.fail_next.pop(0) if srv.fail_next else None
+        if srv.delay:
+            time.sleep(srv.delay)
+        if status is not None:
+            return self._send(status, {"message": "injected failure"})
+        route = re.match(r"^/repos/[^/]+/[^/]+(?P<rest>/.*)?$", path)
+        if not route:
+            return self._send(404, {"message": "Not Found"})
+        rest = route.group("rest") or ""
+        with srv.lock:
+            return self._route(srv, rest, body)
+
+    def _route(self, srv: MockGitHubServer, rest: str, body: dict):
+        method = self.command
+        if method == "GET" and rest == "":
+            return self._send(200, {"default_branch": "main"})
+        m = re.match(r"^/git/ref/(?P<ref>.+)$", rest)
+        if method == "GET" and m:
+            sha = srv.refs.get(m.group("ref"))
+            if sha is None:
+                return self._send(404, {"message": "Not Found"})
+            return self._send(200, {"object": {"sha": sha}})
+        m = re.match(r"^/git/commits/(?P<sha>[^/]+)$", rest)
+        if method == "GET" and m:
+            commit = srv.commits.get(m.group("sha"))
+            if commit is None:
+                return self._send(404, {"message": "Not Found"})
+            return self._send(200, {"sha": m.group("sha"), "tree": {"sha": commit["tree"]}})
+        if method == "POST" and rest == "/git/blobs":
+            sha = srv._new_sha("blob")
+            srv.blobs[sha] = body["content"]
+            return self._send(201, {"sha": sha})
+        if method == "POST" and rest == "/git/trees":
+            files = dict(srv.trees[body["base_tree"]]) if body.get("base_tree") else {}
+            for entry in body["tree"]:
+                files[entry["path"]] = entry.get("content", srv.blobs.get(entry.get("sha")))
+            sha = srv._new_sha("tree")
+            srv.trees[sha] = files
+            return self._send(201, {"sha": sha})
+        if method == "POST" and rest == "/git/commits":
+            sha = srv._new_sha("commit")
+            srv.commits[sha] = {k: body[k] for k in ("tree", "parents", "message")}
+            return self._send(201, {"sha": sha})
+        m = re.match(r"^/git/refs/(?P<ref>.+)$", rest)
+        if method == "PATCH" and m:
+            srv.refs[m.group("ref")] = body["sha"]
+            return self._send(200, {"object": {"sha": body["sha"]}})
+        if method == "POST" and rest == "/git/refs":
+            ref = body["ref"].removeprefix("refs/")
+            if ref in srv.refs:
+                return self._send(422, {"message": "Reference already exists"})
+            srv.refs[ref] = body["sha"]
+            return self._send(201, {"ref": body["ref"], "object": {"sha": body["sha"]}})
+        m = re.match(r"^/contents/(?P<path>.+)$", rest)
+        if m:
+            branch = self.path.partition("ref=")[2] or body.get("branch", "main")
+            key = (branch, m.group("path"))
+            if method == "GET":
+                if key not in srv.files:
+                    return self._send(404, {"message": "Not Found"})
+                return self._send(200, {"sha": srv.files[key]})
+            if method == "PUT":
+                srv.files[key] = f"file-sha-{len(srv.files) + 1}"
+                return self._send(201, {"content": {"sha": srv.files[key]}})
+        if method == "POST" and rest == "/pulls":
+            srv.pulls.append(body)
+            return self._send(201, {"number": len(srv.pulls)})
+        m = re.match(r"^/issues/(?P<num>\d+)/comments$", rest)
+        if method == "POST" and m:
+            srv.comments.append({"issue": int(m.group("num")), **body})
+            return self._send(201, {"id": len(srv.comments)})
+        return self._send(404, {"message": "Not Found"})
+
+    do_GET = do_POST = do_PUT = do_PATCH = _handle
+
+
+@pytest.fixture
+def mock_github():
+    server = MockGitHubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.orchestrator.core.admission import (
+    AdmissionController,
+    AdmissionLimits,
+    Overloaded,
+    Pressure,
+)
+from services.orchestrator.core.models import FeatureState, TaskStatus
+from services.orchestrator.core.orchestrator import Orchestrator
+
+
+def test_retry_after_grows_with_the_backlog_and_shrinks_with_drain_rate():
+    controller = AdmissionController(AdmissionLimits(max_inflight_tasks=10), window=10)
+    assert controller.decide(Pressure(inflight_tasks=6), "a/b", cost=4).admitted
+    shed = controller.decide(Pressure(inflight_tasks=20), "a/b", cost=4)
+    assert (shed.admitted, shed.reason) == (False, "inflight_tasks")
+    deeper = controller.decide(Pressure(inflight_tasks=40), "a/b", cost=4)
+    assert deeper.retry_after > shed.retry_after
+    for _ in range(50):
+        controller.record_completion()
+    fast = controller.decide(Pressure(inflight_tasks=20, drain_rate=5.0), "a/b", cost=4)
+    assert 1 <= fast.retry_after < shed.retry_after
+
+
+def test_tenant_quotas():
+    limits = AdmissionLimits(tenant_features=1, tenant_quotas={"big/repo": 3})
+    controller = AdmissionController(limits)
+    busy = Pressure(tenants={"small/repo": 1, "big/repo": 2})
+    assert controller.decide(busy, "small/repo", 4).reason == "tenant_quota"
+    assert controller.decide(busy, "big/repo", 4).admitted
+    assert controller.decide(busy, "other/repo", 4).admitted
+
+
+@pytest.mark.asyncio
+async def test_deferred_features_start_when_pressure_drops(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_ADMIT_TENANT_FEATURES", "1")
+    orch = Orchestrator()
+    first = orch.submit_feature("First", "admitted", admit=True)
+    with pytest.raises(Overloaded) as shed:
+        orch.submit_feature("Second", "shed", admit=True)
+    assert shed.value.admission.reason == "tenant_quota"
+    assert shed.value.admission.retry_after >= 1
+    deferred = orch.submit_feature("Third", "waits", admit=True, defer=60)
+    assert deferred.state == FeatureState.DEFERRED and deferred.admit_by is not None
+    assert orch.admission_status()["deferred"] == 1
+
+    # Still over quota until the first feature finishes
+    assert await orch._admit_deferred() == []
+    await orch.run_feature(first.id)
+    assert await orch._admit_deferred() == [deferred.id]
+    assert orch.get_feature(deferred.id).state == FeatureState.ACTIVE
+    await orch.run_feature(deferred.id)
+    assert orch.feature_status(deferred.id).status == "done"
+
+
+@pytest.mark.asyncio
+async def test_deferred_features_expire(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_ADMIT_MAX_INFLIGHT_TASKS", "4")
+    orch = Orchestrator()
+    orch.submit_feature("Hog", "fills the limit", admit=True)
+    late = orch.submit_feature("Late", "gives up", admit=True, defer=0.01)
+    await asyncio.sleep(0.05)
+    await orch.claim_once()
+    assert orch.get_feature(late.id).state == FeatureState.CANCELLED
+    assert all(t.status == TaskStatus.CANCELLED for t in orch.list_tasks(late.id))
+    await orch.aclose()
+
+
+def test_api_sheds_with_retry_after(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_ADMIT_MAX_INFLIGHT_TASKS", "4")
+    monkeypatch.setenv("DSF_MAX_ACTIVE_FEATURES", "0")  # keep the first feature in flight
+    from services.orchestrator.app import main
+
+    with TestClient(main.app) as client:
+        body = {"title": "Storm", "description": "many issues"}
+        assert client.post("/features", json=body).status_code == 200
+        shed = client.post("/features", json=body)
+        assert shed.status_code == 429
+        assert int(shed.headers["Retry-After"]) >= 1
+        queued = client.post("/features?defer=600", json=body)
+        assert queued.status_code == 202 and queued.json()["state"] == "deferred"
+        assert client.get(f"/features/{queued.json()['id']}").json()["status"] == "deferred"
+        status = client.get("/admission").json()
+        assert status["limits"]["max_inflight_tasks"] == 4
+        assert status["pressure"]["inflight_tasks"] == 4
+        assert status["deferred"] == 1
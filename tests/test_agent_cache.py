@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from services.orchestrator.core import orchestrator as orch_mod
+from services.orchestrator.core.agents.cache import ResultCache, task_fingerprint
+from services.orchestrator.core.agents.code_writer import CodeWriterAgent
+from services.orchestrator.core.metrics import Metrics
+from services.orchestrator.core.models import AgentType, Task
+
+
+def _task(title="Implement", result=None):
+    return Task(title=title, description="d", agent_type=AgentType.CODE, result=result)
+
+
+def test_fingerprint_ignores_ids_but_not_content():
+    a, b = _task(), _task()
+    dep1, dep2 = _task("Plan", result="p"), _task("Plan", result="p")
+    assert task_fingerprint(a, [dep1], "code", "1") == task_fingerprint(b, [dep2], "code", "1")
+    assert task_fingerprint(a, [dep1], "code", "1") != task_fingerprint(a, [dep1], "code", "2")
+    assert task_fingerprint(a, [dep1], "code", "1") != task_fingerprint(
+        a, [_task("Plan", result="q")], "code", "1"
+    )
+    assert task_fingerprint(a, [], "code", "1", context="abc") != task_fingerprint(
+        a, [], "code", "1", context="def"
+    )
+
+
+def test_memory_lru_and_disk_tier(tmp_path):
+    registry = Metrics()
+    cache = ResultCache(max_entries=2, directory=str(tmp_path), registry=registry)
+    for key in ("aa1", "bb2", "cc3"):
+        cache.put(key, key.upper())
+    assert registry.counter("agent_cache_evictions", tier="memory") == 1
+    assert cache.get("cc3") == "CC3"
+    # Evicted from memory, still on disk; a disk hit is promoted back
+    assert cache.get("aa1") == "AA1"
+    assert registry.counter("agent_cache_hits", tier="disk") == 1
+    assert cache.get("aa1") == "AA1"
+    assert registry.counter("agent_cache_hits", tier="memory") == 2
+    assert cache.get("zz9") is None
+    assert registry.counter("agent_cache_misses") == 1
+    # A new process finds earlier results on disk
+    assert ResultCache(directory=str(tmp_path), registry=registry).get("bb2") == "BB2"
+
+
+def test_overwrite_does_not_double_count_disk_bytes(tmp_path):
+    cache = ResultCache(directory=str(tmp_path), registry=Metrics())
+    cache.put("aa1", "x" * 100)
+    cache.put("aa1", "y" * 40)
+    assert cache.stats()["disk_bytes"] == 40
+
+
+def test_disk_tier_is_size_bounded(tmp_path):
+    registry = Metrics()
+    cache = ResultCache(max_entries=1, directory=str(tmp_path), max_bytes=250, registry=registry)
+    for i in range(5):
+        cache.put(f"k{i:02d}", "x" * 100)
+        past = 1_000_000 + i
+        os.utime(os.path.join(str(tmp_path), "k0", f"k{i:02d}"), (past, past))
+    assert cache.stats()["disk_bytes"] <= 250
+    assert registry.counter("agent_cache_evictions", tier="disk") >= 3
+    assert cache.get("k04") == "x" * 100
+
+
+@pytest.mark.asyncio
+async def test_repeated_features_skip_the_agent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_AGENT_CACHE", "true")
+    monkeypatch.setenv("DSF_AGENT_CACHE_DIR", str(tmp_path / "cache"))
+    calls = []
+    original = CodeWriterAgent.run
+
+    async def run(self, task, workspace=None):
+        calls.append(task.id)
+        return await original(self, task, workspace=workspace)
+
+    monkeypatch.setattr(CodeWriterAgent, "run", run)
+    orch = orch_mod.Orchestrator()
+    first = orch.submit_feature("Cache", "same inputs")
+    await orch.run_feature(first.id)
+    ran = len(calls)  # plan + implement
+    second = orch.submit_feature("Cache", "same inputs")
+    await orch.run_feature(second.id)
+    assert ran and len(calls) == ran
+    assert orch.feature_status(second.id).status == "done"
+    results = lambda fid: sorted(t.result for t in orch.list_tasks(fid))  # noqa: E731
+    assert results(first.id) == results(second.id)
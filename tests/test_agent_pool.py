@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from services.orchestrator.core.agents.base import BaseAgent
+from services.orchestrator.core.agents.pool import AgentPool, pool_sizes_from_env
+from services.orchestrator.core.models import AgentType
+
+
+class ProbeAgent(BaseAgent):
+    name = "probe"
+    created = 0
+
+    def __init__(self):
+        ProbeAgent.created += 1
+        self.healthy = True
+        self.closed = False
+
+    async def check(self) -> bool:
+        return self.healthy
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+    async def run(self, task, workspace=None) -> str:
+        await asyncio.sleep(0.05)
+        return "ok"
+
+
+@pytest.fixture(autouse=True)
+def _reset_counter():
+    ProbeAgent.created = 0
+
+
+@pytest.mark.asyncio
+async def test_pool_bounds_concurrency_per_type():
+    pool = AgentPool(ProbeAgent, size=2)
+    active = peak = 0
+
+    async def use():
+        nonlocal active, peak
+        async with pool.lease() as agent:
+            active += 1
+            peak = max(peak, active)
+            await agent.run(None)
+            active -= 1
+
+    await asyncio.gather(*(use() for _ in range(6)))
+    stats = pool.stats()
+    assert peak == 2 and ProbeAgent.created == 2, "instances are reused, not created per task"
+    assert stats["leases"] == 6 and stats["idle"] == 2 and stats["leased"] == 0
+    assert 0 < stats["utilization"] <= 1
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failed_unhealthy_instance_is_replaced():
+    pool = AgentPool(ProbeAgent, size=1)
+    with pytest.raises(RuntimeError):
+        async with pool.lease() as agent:
+            agent.healthy = False
+            raise RuntimeError("model client crashed")
+    assert agent.closed
+    async with pool.lease() as fresh:
+        assert fresh is not agent
+    assert pool.stats()["restarts"] == 1 and pool.stats()["errors"] == 1
+
+    # A failure that passes the health probe keeps the instance
+    with pytest.raises(RuntimeError):
+        async with pool.lease() as same:
+            raise RuntimeError("bad input")
+    async with pool.lease() as again:
+        assert again is same
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failed_restart_keeps_the_slot_and_the_task_error():
+    broken = False
+
+    def factory():
+        if broken:
+            raise OSError("model endpoint unreachable")
+        return ProbeAgent()
+
+    pool = AgentPool(factory, size=1)
+    with pytest.raises(RuntimeError, match="model client crashed"):
+        async with pool.lease() as agent:
+            agent.healthy = False
+            broken = True
+            raise RuntimeError("model client crashed")
+    assert pool.stats()["instances"] == 0 and pool.stats()["restarts"] == 1
+
+    with pytest.raises(OSError):
+        async with pool.lease():
+            pass
+    broken = False
+    async with pool.lease() as fresh:
+        assert fresh is not agent
+    assert pool.stats()["instances"] == 1
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_probe_and_resize():
+    pool = AgentPool(ProbeAgent, size=2)
+    await pool.start()
+    async with pool.lease() as agent:
+        agent.healthy = False
+    assert await pool.probe() == 1
+    assert pool.stats()["instances"] == 2
+
+    await pool.resize(4)
+    assert pool.stats()["idle"] == 4
+    await pool.resize(1)
+    assert pool.stats()["instances"] == 1
+    await pool.aclose()
+
+
+def test_pool_sizes_from_env(monkeypatch):
+    monkeypatch.setenv("DSF_AGENT_POOL_SIZE", "3")
+    monkeypatch.setenv("DSF_AGENT_POOL_CODE", "8")
+    sizes = pool_sizes_from_env(list(AgentType))
+    assert sizes == {AgentType.CODE: 8, AgentType.TEST: 3, AgentType.REVIEW: 3}
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_reports_agent_utilization(monkeypatch, tmp_path):
+    from services.orchestrator.core.orchestrator import Orchestrator
+
+    monkeypatch.chdir(tmp_path)
+    orch = Orchestrator()
+    feat = orch.submit_feature("Pool", "stats")
+    await orch.run_feature(feat.id)
+    stats = orch.agent_stats()
+    assert sum(s["leases"] for s in stats.values()) == len(feat.task_ids)
+    await orch.aclose()
@@ -0,0 +1,67 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from services.orchestrator.core.analytics import latency_bin, parse_window, summarize
+from services.orchestrator.core.models import TaskStatus
+from services.orchestrator.core.orchestrator import Orchestrator
+
+
+def test_percentiles_from_rollup_bins_are_within_five_percent():
+    samples = [0.01 * i for i in range(1, 1001)]  # 10 ms .. 10 s
+    bins = {}
+    for s in samples:
+        bins[latency_bin(s)] = bins.get(latency_bin(s), 0) + 1
+    summary = summarize(bins.items(), sum(samples))
+    assert summary["count"] == 1000
+    assert summary["mean"] == pytest.approx(5.005)
+    for name, exact in (("p50", 5.0), ("p90", 9.0), ("p99", 9.9)):
+        assert summary[name] == pytest.approx(exact, rel=0.05)
+    assert parse_window("90m") == 5400
+    with pytest.raises(ValueError):
+        parse_window("yesterday")
+
+
+@pytest.mark.asyncio
+async def test_lifecycle_is_recorded_and_rolled_up(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    orch = Orchestrator()
+    feat = orch.submit_feature("Timed", "record every transition")
+    await orch.run_feature(feat.id)
+
+    # A fresh instance reads the timestamps back from the database
+    tasks = Orchestrator().list_tasks(feat.id)
+    for t in tasks:
+        assert t.status == TaskStatus.DONE
+        assert t.queued_at <= t.started_at <= t.finished_at
+    events = [e.event for e in orch.task_events(tasks[-1].id)]
+    assert events == ["pending", "queued", "running", "done"]
+
+    report = orch.latency_analytics("1h", ["agent_type"])
+    by_type = {g["agent_type"]: g for g in report["groups"]}
+    for agent_type in ("code", "test", "review"):
+        count = sum(1 for t in tasks if t.agent_type.value == agent_type)
+        group = by_type[agent_type]
+        assert group["outcomes"] == {"done": count}
+        assert group["latency"]["run"]["count"] == count
+        assert group["latency"]["queue_wait"]["count"] == count
+        assert 0 <= group["latency"]["run"]["p50"] <= group["latency"]["run"]["p99"]
+    assert by_type[""]["latency"]["feature_lead"]["count"] == 1
+    assert orch.latency_analytics("1h", ["repo"], agent_type="review")["groups"] == [
+        {
+            "repo": None,
+            "latency": by_type["review"]["latency"],
+            "outcomes": by_type["review"]["outcomes"],
+        }
+    ]
+
+
+def test_analytics_endpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from services.orchestrator.app import main
+
+    with TestClient(main.app) as client:
+        report = client.get("/analytics/latency?window=7d&group_by=agent_type,bucket").json()
+        assert report["groups"] == [] and report["group_by"] == ["agent_type", "bucket"]
+        assert client.get("/analytics/latency?window=soon").status_code == 400
+        assert client.get("/analytics/latency?group_by=colour").status_code == 400
+        assert client.get("/tasks/nope/events").status_code == 404
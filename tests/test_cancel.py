@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from test_queue import FakeQueue
+
+from services.orchestrator.core.agents.code_writer import CodeWriterAgent
+from services.orchestrator.core.models import FeatureState, TaskStatus
+from services.orchestrator.core.orchestrator import Orchestrator
+
+
+async def _wait_for(predicate, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def blocking_agent(monkeypatch):
+    """CodeWriterAgent runs block until released; records starts and cancellations."""
+    state = {"started": 0, "cancelled": 0, "release": asyncio.Event()}
+    original = CodeWriterAgent.run
+
+    async def run(self, task, workspace=None):
+        state["started"] += 1
+        try:
+            await state["release"].wait()
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+        return await original(self, task, workspace=workspace)
+
+    monkeypatch.setattr(CodeWriterAgent, "run", run)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_cancel_stops_in_flight_agents_and_frees_the_slot(
+    tmp_path, monkeypatch, blocking_agent
+):
+    monkeypatch.chdir(tmp_path)
+    orch = Orchestrator()
+    feat = orch.submit_feature("Cancel me", "long running")
+    driver = asyncio.create_task(orch.run_feature(feat.id))
+    await _wait_for(lambda: blocking_agent["started"] == 1)
+    assert feat.id in orch._owned
+
+    cancelled = await orch.cancel_feature(feat.id)
+    assert driver.done()
+    assert blocking_agent["cancelled"] == 1
+    assert feat.id not in orch._owned
+    assert orch.lease_owner(feat.id) is None
+    assert set(cancelled) == set(feat.task_ids)
+    status = orch.feature_status(feat.id)
+    assert status.status == "cancelled" and status.cancelled == status.total
+    assert feat.id not in orch._persistence.list_unfinished_features()
+    with pytest.raises(RuntimeError):
+        orch.resume_feature(feat.id)
+    with pytest.raises(RuntimeError):
+        await orch.cancel_feature(feat.id)
+
+
+@pytest.mark.asyncio
+async def test_pause_then_resume_keeps_finished_work(tmp_path, monkeypatch, blocking_agent):
+    monkeypatch.chdir(tmp_path)
+    orch = Orchestrator()
+    feat = orch.submit_feature("Pause me", "resume later")
+    driver = asyncio.create_task(orch.run_feature(feat.id))
+    await _wait_for(lambda: blocking_agent["started"] == 1)
+
+    interrupted = await orch.pause_feature(feat.id)
+    assert driver.done() and feat.id not in orch._owned
+    assert interrupted == [feat.task_ids[0]]
+    status = orch.feature_status(feat.id)
+    assert status.status == "paused" and status.pending == status.total
+    assert feat.id not in orch._persistence.list_unfinished_features()
+    # A restarted instance does not pick the paused feature up
+    assert await Orchestrator().claim_once() == []
+
+    blocking_agent["release"].set()
+    other = Orchestrator()
+    other.resume_feature(feat.id)
+    assert other.get_feature(feat.id).state == FeatureState.ACTIVE
+    await other.run_feature(feat.id)
+    assert other.feature_status(feat.id).status == "done"
+
+
+@pytest.mark.asyncio
+async def test_cancel_purges_queued_tasks(tmp_path, monkeypatch):
+    monkeypatch.setenv("DSF_QUEUE", "redis")
+    monkeypatch.chdir(tmp_path)
+    from services.orchestrator.core import orchestrator as orch_mod
+
+    monkeypatch.setattr(orch_mod, "RedisQueue", FakeQueue, raising=True)
+    orch = orch_mod.Orchestrator()
+    feat = orch.submit_feature("Queued", "never consumed")
+    queue = FakeQueue.last_instance
+    driver = asyncio.create_task(orch.run_feature(feat.id))
+    await _wait_for(lambda: len(queue._items) == 1)
+
+    await orch.cancel_feature(feat.id)
+    assert driver.done()
+    assert queue._items == []
+    assert all(t.status == TaskStatus.CANCELLED for t in orch.list_tasks(feat.id))
+    # A message dequeued by a worker just before the cancel is skipped
+    await orch._run_task(feat.task_ids[0])
+    assert orch.get_task(feat.task_ids[0]).status == TaskStatus.CANCELLED
+
+
+@pytest.mark.asyncio
+async def test_claim_loop_refills_a_freed_slot_immediately(tmp_path, monkeypatch, blocking_agent):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_MAX_ACTIVE_FEATURES", "1")
+    orch = Orchestrator()
+    first = orch.submit_feature("First", "hogs the only slot")
+    second = orch.submit_feature("Second", "waits for it")
+    loop = asyncio.create_task(orch.claim_loop(interval=60))
+    try:
+        await _wait_for(lambda: first.id in orch._owned)
+        assert second.id not in orch._owned
+        await orch.cancel_feature(first.id)
+        await _wait_for(lambda: second.id in orch._owned, timeout=2)
+    finally:
+        loop.cancel()
+        await orch.aclose()
@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import pytest
+
+from services.orchestrator.integrations.github import AsyncGitHubClient
+
+
+def _client(server, **kwargs) -> AsyncGitHubClient:
+    return AsyncGitHubClient(
+        repo="owner/repo", token="t", api_base=server.url, http2=False, backoff=0.05, **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_task_publish_flow_reuses_one_connection(mock_github):
+    gh = _client(mock_github)
+    try:
+        await gh.create_branch("dsf/f/t")
+        await gh.create_or_update_file("artifacts/a.txt", "hi", "msg", branch="dsf/f/t")
+        assert await gh.create_pull_request("dsf/f/t", "title") == 1
+        assert await gh.comment_on_issue(3, "done") == 1
+        assert await gh.get_branch_ref("missing") is None
+    finally:
+        await gh.aclose()
+    assert mock_github.refs["heads/dsf/f/t"] == "base-sha"
+    assert ("dsf/f/t", "artifacts/a.txt") in mock_github.files
+    assert len(mock_github.requests) == 8
+    assert len(mock_github.connections) == 1
+
+
+@pytest.mark.asyncio
+async def test_server_errors_back_off_without_blocking_the_loop(mock_github):
+    mock_github.fail_next = [502, 503]
+    gh = _client(mock_github)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    t = asyncio.create_task(ticker())
+    try:
+        assert await gh.create_pull_request("b", "title") == 1
+    finally:
+        t.cancel()
+        await gh.aclose()
+    assert mock_github.count("POST", "/pulls$") == 3
+    assert ticks >= 10, "backoff must yield to other coroutines"
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(mock_github):
+    gh = _client(mock_github)
+    try:
+        await gh.create_branch("dup", from_sha="x")
+        with pytest.raises(RuntimeError, match="422"):
+            await gh.create_branch("dup", from_sha="x")
+    finally:
+        await gh.aclose()
+    assert mock_github.count("POST", "/git/refs$") == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit(mock_github):
+    mock_github.delay = 0.1
+    gh = _client(mock_github, max_concurrency=2)
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(gh.comment_on_issue(1, str(i)) for i in range(4)))
+    finally:
+        await gh.aclose()
+    elapsed = time.perf_counter() - started
+    assert 0.2 <= elapsed < 0.4
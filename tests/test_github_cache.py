@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from services.orchestrator.integrations.github import AsyncGitHubClient
+from services.orchestrator.integrations.github_cache import CachedResponse, ResponseCache
+from services.orchestrator.integrations.ratelimit import GitHubRateLimiter, LocalBucketStore
+
+
+def test_response_cache_evicts_lru_and_expires():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    cache.put("/a", CachedResponse("e1", b"a"))
+    cache.put("/b", CachedResponse("e2", b"b"))
+    assert cache.get("/a") is not None
+    cache.put("/c", CachedResponse("e3", b"c"))
+    assert cache.get("/b") is None, "least recently used entry is evicted"
+    cache.put(ResponseCache.key("/a", {"ref": "x"}), CachedResponse("e4", b"a2"))
+    cache.invalidate("/a")
+    assert cache.get("/a") is None and cache.get("/a?ref=x") is None
+
+    cache.put("/old", CachedResponse("e5", b"", stored_at=time.monotonic() - 120))
+    assert cache.get("/old") is None
+
+
+@pytest.mark.asyncio
+async def test_conditional_gets_are_served_from_cache(mock_github):
+    limiter = GitHubRateLimiter(LocalBucketStore(), burst=10)
+    gh = AsyncGitHubClient(
+        repo="o/r", token="t", api_base=mock_github.url, limiter=limiter, cache=ResponseCache()
+    )
+    try:
+        assert await gh.get_branch_ref("main") == "base-sha"
+        spent = limiter.snapshot()["remaining"]
+        assert await gh.get_branch_ref("main") == "base-sha"
+        assert mock_github.not_modified == 1
+        assert limiter.snapshot()["remaining"] == spent, "304s do not consume budget"
+        assert gh.cache.stats()["hits"] == 1
+
+        # A write to the ref drops its cached read
+        await gh.commit_files("main", {"a.txt": "x"}, "msg")
+        assert await gh.get_branch_ref("main") == mock_github.refs["heads/main"] != "base-sha"
+    finally:
+        await gh.aclose()
+
+
+@pytest.mark.asyncio
+async def test_default_branch_sha_is_memoized_until_push(mock_github):
+    gh = AsyncGitHubClient(repo="o/r", token="t", api_base=mock_github.url, cache=ResponseCache())
+    try:
+        assert await gh.get_default_branch_sha() == "base-sha"
+        assert await gh.get_default_branch_sha() == "base-sha"
+        assert mock_github.count("GET", "/git/ref/heads/main$") == 1
+
+        gh.note_push("refs/heads/main", "pushed-sha")
+        assert await gh.get_default_branch_sha() == "pushed-sha"
+        gh.note_push("refs/heads/main", "0" * 40)
+        assert await gh.get_default_branch_sha() == "base-sha"
+        assert mock_github.count("GET", "/git/ref/heads/main$") == 2
+    finally:
+        await gh.aclose()
@@ -28,26 +28,29 @@ async def test_orchestrator_github_hook(monkeypatch):
         def __init__(self, *a, **k):
             pass
 
-        def create_branch(self, branch, from_sha=None):
+        async def create_branch(self, branch, from_sha=None):
             calls.append(("branch", branch))
 
-        def create_or_update_file(self, path, content, message, branch):
+        async def create_or_update_file(self, path, content, message, branch):
             calls.append(("file", path, branch))
 
-        def create_pull_request(self, branch, title, body=""):
+        async def create_pull_request(self, branch, title, body=""):
             calls.append(("pr", branch))
             return 1
 
     monkeypatch.setattr(
-        "services.orchestrator.core.orchestrator.GitHubClient", DummyClient, raising=True
+        "services.orchestrator.core.orchestrator.AsyncGitHubClient", DummyClient, raising=True
     )
 
     orch = Orchestrator()
     feat = orch.submit_feature("GH Hook", "demo")
     await orch.run_feature(feat.id)
+    # Task completion only writes the outbox; the relay publishes afterwards
+    await orch.flush_outbox()
     # We expect at least one call (the last task completion creates a PR)
     assert any(c[0] == "pr" for c in calls)
     # Running again should not create duplicate PRs due to persistence guard
     prev_count = len([c for c in calls if c[0] == "pr"])
     await orch.run_feature(feat.id)
+    await orch.flush_outbox()
     assert len([c for c in calls if c[0] == "pr"]) == prev_count
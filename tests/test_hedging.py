@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from services.orchestrator.core.agents.code_writer import CodeWriterAgent
+from services.orchestrator.core.hedging import LatencyTracker, hedged
+from services.orchestrator.core.metrics import metrics
+from services.orchestrator.core.models import AgentType
+from services.orchestrator.core.orchestrator import Orchestrator
+
+
+def test_percentile_needs_enough_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for i in range(9):
+        tracker.record("code", i / 10)
+    assert tracker.percentile("code", 95) is None
+    for i in range(9, 100):
+        tracker.record("code", i / 10)
+    assert tracker.percentile("code", 50) == pytest.approx(5.0)
+    assert tracker.percentile("code", 95) == pytest.approx(9.5)
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_duplicated():
+    calls = []
+
+    async def attempt(name, seconds):
+        calls.append(name)
+        await asyncio.sleep(seconds)
+        return name
+
+    outcome = await hedged(lambda: attempt("primary", 0.01), lambda: attempt("hedge", 0), 0.2)
+    assert outcome == ("primary", False, False)
+    assert calls == ["primary"]
+
+
+@pytest.mark.asyncio
+async def test_straggler_loses_to_hedge_and_is_cancelled():
+    cancelled = asyncio.Event()
+
+    async def straggler():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def hedge():
+        await asyncio.sleep(0.01)
+        return "hedge"
+
+    outcome = await asyncio.wait_for(hedged(straggler, hedge, 0.05), 2)
+    assert outcome == ("hedge", True, True)
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_failed_attempt_waits_for_the_other():
+    async def primary():
+        await asyncio.sleep(0.1)
+        return "primary"
+
+    async def hedge():
+        raise RuntimeError("hedge broke")
+
+    assert (await hedged(primary, hedge, 0.01)).result == "primary"
+
+    async def broken():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("primary broke")
+
+    with pytest.raises(RuntimeError, match="primary broke"):
+        await hedged(broken, hedge, 0.01)
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_hedges_straggling_agent(monkeypatch):
+    monkeypatch.setenv("DSF_DB", "memory")
+    monkeypatch.setenv("DSF_HEDGE", "true")
+    monkeypatch.setenv("DSF_HEDGE_MIN_SAMPLES", "5")
+    slow = {"Plan: Hedge"}
+
+    async def run(self, task, workspace=None):
+        if task.title in slow:
+            slow.discard(task.title)  # only the first attempt straggles
+            await asyncio.sleep(30)
+        await asyncio.sleep(0.01)
+        return f"done: {task.title}"
+
+    monkeypatch.setattr(CodeWriterAgent, "run", run)
+    orch = Orchestrator()
+    for _ in range(10):
+        orch._latency.record(AgentType.CODE, 0.02)
+    before = metrics.counter("agent_hedge_wins", agent="code")
+    feat = orch.submit_feature("Hedge", "straggler")
+    await asyncio.wait_for(orch.run_feature(feat.id), 5)
+    assert orch.feature_status(feat.id).status == "done"
+    assert metrics.counter("agent_hedge_wins", agent="code") == before + 1
+    plan = orch.list_tasks(feat.id)[0]
+    assert orch.task_output(plan.id) == ["done: Plan: Hedge"]
+    assert 0 < metrics.snapshot()["gauges"]["agent_hedge_rate{agent=code}"] <= 1
+    await orch.aclose()
@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import pytest
+
+from services.orchestrator.core.lease.local import LocalLeaseStore
+from services.orchestrator.core.lease.sqlite_lease import SQLiteLeaseStore
+from services.orchestrator.core.orchestrator import Orchestrator
+
+
+@pytest.fixture(params=["local", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "local":
+        return LocalLeaseStore()
+    return SQLiteLeaseStore(str(tmp_path / "leases.db"))
+
+
+def test_lease_semantics(store):
+    assert store.acquire("k", "a", ttl=5)
+    assert store.acquire("k", "a", ttl=5), "re-acquire by holder is allowed"
+    assert not store.acquire("k", "b", ttl=5)
+    assert not store.renew("k", "b", ttl=5)
+    assert store.renew("k", "a", ttl=5)
+    assert store.owner("k") == "a"
+    store.release("k", "b")
+    assert store.owner("k") == "a", "only the holder can release"
+    store.release("k", "a")
+    assert store.owner("k") is None
+
+
+def test_expired_lease_can_be_taken_over(store):
+    assert store.acquire("k", "a", ttl=0.05)
+    time.sleep(0.1)
+    assert not store.renew("k", "a", ttl=5)
+    assert store.acquire("k", "b", ttl=5)
+    assert store.owner("k") == "b"
+
+
+@pytest.mark.asyncio
+async def test_instance_resumes_feature_after_lease_expiry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_LEASE_TTL_SECONDS", "0.2")
+    crashed = Orchestrator()
+    feat = crashed.submit_feature("Takeover", "resume after crash")
+    # Simulate an owner that claimed the feature and died without releasing it
+    assert crashed._leases.acquire(f"feature:{feat.id}", crashed.instance_id, 0.2)
+
+    survivor = Orchestrator()
+    await survivor.run_feature(feat.id)
+    assert survivor.feature_status(feat.id).completed == 0, "live lease blocks other owners"
+
+    await asyncio.sleep(0.3)
+    assert await survivor.claim_once() == [feat.id]
+    while feat.id in survivor._owned:
+        await asyncio.sleep(0.01)
+    status = survivor.feature_status(feat.id)
+    assert status.completed == status.total
+    assert survivor.lease_owner(feat.id) is None
+
+
+@pytest.mark.asyncio
+async def test_features_spread_across_instances(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_MAX_ACTIVE_FEATURES", "1")
+    a, b = Orchestrator(), Orchestrator()
+    first = a.submit_feature("One", "spread")
+    second = a.submit_feature("Two", "spread")
+
+    claimed_a = await a.claim_once()
+    claimed_b = await b.claim_once()
+    assert len(claimed_a) == len(claimed_b) == 1
+    assert set(claimed_a + claimed_b) == {first.id, second.id}
+    await asyncio.gather(*a._owned.values(), *b._owned.values())
+    for orch, fid in ((a, claimed_a[0]), (b, claimed_b[0])):
+        status = orch.feature_status(fid)
+        assert status.completed == status.total
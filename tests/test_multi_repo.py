@@ -0,0 +1,119 @@
+import json
+import sqlite3
+
+import pytest
+
+from services.orchestrator.core import orchestrator as orch_mod
+from services.orchestrator.core.models import Feature
+from services.orchestrator.core.persistence.sqlite import SQLitePersistence
+from services.orchestrator.integrations.github import AsyncGitHubClient
+from services.orchestrator.integrations.github_registry import GitHubClientRegistry
+
+
+def test_features_table_gains_repo_column(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE features (id TEXT PRIMARY KEY, title TEXT NOT NULL,"
+        " description TEXT NOT NULL, created_at TEXT NOT NULL)"
+    )
+    conn.close()
+    db = SQLitePersistence(path)
+    db.init()
+    db.init()  # idempotent
+    feat = Feature(title="t", description="d", repo="acme/api")
+    db.save_feature_with_tasks(feat, [])
+    assert db.get_feature(feat.id).repo == "acme/api"
+
+
+def test_registry_resolves_and_allowlists_repos():
+    built = []
+    registry = GitHubClientRegistry(
+        lambda repo: built.append(repo) or object(), default_repo="acme/api", allowed=["acme/web"]
+    )
+    assert registry.resolve(None) == "acme/api"
+    assert registry.get("acme/web") is registry.get("acme/web")
+    assert built == ["acme/web"]
+    with pytest.raises(ValueError):
+        registry.resolve("evil/repo")
+
+
+def test_registry_without_allowlist_accepts_only_the_default_repo():
+    registry = GitHubClientRegistry(lambda repo: object(), default_repo="acme/api")
+    assert registry.resolve(None) == "acme/api"
+    with pytest.raises(ValueError):
+        registry.resolve("evil/repo")
+    opted_in = GitHubClientRegistry(lambda repo: object(), default_repo="acme/api", allow_any=True)
+    assert opted_in.resolve("acme/other") == "acme/other"
+
+
+def test_sharded_queue_serves_repos_round_robin(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    from services.orchestrator.core.queue import redis_queue
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis_queue.redis.Redis,
+        "from_url",
+        lambda url, **kw: fakeredis.FakeRedis(server=server, **kw),
+    )
+    queue = redis_queue.RedisQueue()
+    for i in range(20):
+        queue.enqueue(json.dumps({"task_id": f"noisy-{i}"}), shard="acme/noisy")
+    queue.enqueue(json.dumps({"task_id": "quiet-0"}), shard="acme/quiet")
+    assert queue.depth() == {"": 0, "acme/noisy": 20, "acme/quiet": 1}
+
+    first = [json.loads(queue.dequeue(timeout=1))["task_id"] for _ in range(3)]
+    assert "quiet-0" in first, "a deep backlog in one repo does not starve another"
+
+
+def test_sharded_queue_prunes_drained_shards(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    from services.orchestrator.core.queue import redis_queue
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis_queue.redis.Redis,
+        "from_url",
+        lambda url, **kw: fakeredis.FakeRedis(server=server, **kw),
+    )
+    queue = redis_queue.RedisQueue()
+    for i in range(10):
+        queue.enqueue(json.dumps({"task_id": f"t{i}"}), shard=f"acme/repo{i}")
+    drained = [queue.dequeue(block=False) for _ in range(10)]
+    assert None not in drained and len(queue.depth()) == 11
+    assert queue.dequeue(block=False) is None  # idle: drained shards are dropped
+    assert queue.depth() == {"": 0}
+    queue.enqueue(json.dumps({"task_id": "again"}), shard="acme/repo0")
+    assert queue.depth() == {"": 0, "acme/repo0": 1}
+
+
+@pytest.mark.asyncio
+async def test_features_publish_to_their_own_repo(mock_github, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_GITHUB_ENABLED", "true")
+    monkeypatch.setenv("DSF_GITHUB_TOKEN", "shared")
+    monkeypatch.setenv("DSF_GITHUB_REPO", "acme/api")
+    monkeypatch.setenv("DSF_GITHUB_TOKEN_ACME_WEB", "web-token")
+    monkeypatch.setenv("DSF_GITHUB_REPOS", "acme/web")
+    monkeypatch.setenv("DSF_GITHUB_PUBLISH_MODE", "feature")
+    monkeypatch.setattr(
+        orch_mod,
+        "AsyncGitHubClient",
+        lambda **kw: AsyncGitHubClient(api_base=mock_github.url, http2=False, **kw),
+    )
+    orch = orch_mod.Orchestrator()
+    api = orch.submit_feature("API", "default repo")
+    web = orch.submit_feature("Web", "other repo", repo="acme/web")
+    assert api.repo == "acme/api" and orch.get_feature(web.id).repo == "acme/web"
+
+    await orch.run_feature(api.id)
+    await orch.run_feature(web.id)
+    await orch.flush_outbox()
+    clients = {repo: orch._github.get(repo) for repo in orch._github.repos()}
+    assert set(clients) == {"acme/api", "acme/web"}
+    assert clients["acme/web"].token == "web-token"
+    assert clients["acme/api"].limiter is not clients["acme/web"].limiter
+    assert mock_github.count("POST", "^/repos/acme/api/pulls$") == 1
+    assert mock_github.count("POST", "^/repos/acme/web/pulls$") == 1
+    await orch.aclose()
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from services.orchestrator.core import orchestrator as orch_mod
+from services.orchestrator.core.models import AgentType, Feature, OutboxEvent, Task, TaskStatus
+from services.orchestrator.core.outbox import MemoryOutbox, OutboxRelay
+from services.orchestrator.core.persistence.sqlite import SQLitePersistence
+from services.orchestrator.integrations.github import AsyncGitHubClient
+
+
+def test_outbox_is_written_with_the_task_update(tmp_path):
+    db = SQLitePersistence(str(tmp_path / "dsf.db"))
+    db.init()
+    feature = Feature(title="f", description="d")
+    task = Task(title="t", agent_type=AgentType.CODE)
+    db.save_feature_with_tasks(feature, [task])
+
+    task.status = TaskStatus.DONE
+    event = OutboxEvent(key=f"task:{task.id}", feature_id=feature.id, kind="task")
+    db.update_task(task, outbox=[event])
+    db.update_task(task, outbox=[event])  # re-completion is deduplicated by key
+    assert db.list_tasks(feature.id)[0].status == TaskStatus.DONE
+    assert db.outbox_depth() == 1
+
+    (claimed,) = db.claim_outbox(10, lease_seconds=60)
+    assert claimed.key == event.key and claimed.attempts == 1
+    assert db.claim_outbox(10, lease_seconds=60) == [], "claimed events are hidden"
+    db.fail_outbox(claimed.id, "boom", retry_in=0)
+    (retried,) = db.claim_outbox(10, lease_seconds=60)
+    assert retried.attempts == 2
+    db.complete_outbox(retried.id)
+    assert db.outbox_depth() == 0
+
+
+class FlakyPublisher:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.published = []
+
+    async def publish_task(self, feature_id, task):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("GitHub down")
+        self.published.append(task.id)
+
+
+@pytest.mark.asyncio
+async def test_relay_retries_with_backoff_then_parks_dead_events():
+    feature = Feature(title="f", description="d")
+    task = Task(title="t", agent_type=AgentType.CODE)
+    store = MemoryOutbox()
+    publisher = FlakyPublisher(failures=1)
+    relay = OutboxRelay(store, lambda f: publisher, lambda fid: (feature, [task]), backoff=0.01)
+
+    store.add(
+        [OutboxEvent(key="k", feature_id=feature.id, kind="task", payload={"task_id": task.id})]
+    )
+    await relay.flush()
+    assert publisher.published == [] and store.outbox_depth() == 1
+    time.sleep(0.02)
+    await relay.flush()
+    assert publisher.published == [task.id] and store.outbox_depth() == 0
+
+    publisher.failures = 10
+    relay.max_attempts = 1
+    store.add(
+        [OutboxEvent(key="k2", feature_id=feature.id, kind="task", payload={"task_id": task.id})]
+    )
+    await relay.flush()
+    assert store.outbox_depth() == 0, "gave up after max_attempts"
+
+
+@pytest.mark.asyncio
+async def test_task_scheduling_does_not_wait_for_github(mock_github, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_GITHUB_ENABLED", "true")
+    monkeypatch.setenv("DSF_GITHUB_TOKEN", "fake")
+    monkeypatch.setenv("DSF_GITHUB_REPO", "owner/repo")
+    monkeypatch.setattr(
+        orch_mod,
+        "AsyncGitHubClient",
+        lambda **kw: AsyncGitHubClient(api_base=mock_github.url, http2=False, **kw),
+    )
+    mock_github.delay = 0.2
+    orch = orch_mod.Orchestrator()
+    feat = orch.submit_feature("Slow GitHub", "publish later")
+
+    started = time.perf_counter()
+    await orch.run_feature(feat.id)
+    assert time.perf_counter() - started < 1.0, "publishing is off the critical path"
+    assert orch.feature_status(feat.id).status == "done"
+
+    await orch.flush_outbox()
+    assert len(mock_github.pulls) == len(feat.task_ids)
+    await orch.aclose()
@@ -0,0 +1,75 @@
+import pytest
+
+from services.orchestrator.core import orchestrator as orch_mod
+from services.orchestrator.integrations.github import AsyncGitHubClient
+
+
+@pytest.fixture
+def github_orchestrator(mock_github, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_GITHUB_ENABLED", "true")
+    monkeypatch.setenv("DSF_GITHUB_TOKEN", "fake")
+    monkeypatch.setenv("DSF_GITHUB_REPO", "owner/repo")
+
+    def client(**kwargs):
+        return AsyncGitHubClient(api_base=mock_github.url, http2=False, backoff=0.01, **kwargs)
+
+    monkeypatch.setattr(orch_mod, "AsyncGitHubClient", client)
+
+    def build(mode: str) -> orch_mod.Orchestrator:
+        monkeypatch.setenv("DSF_GITHUB_PUBLISH_MODE", mode)
+        return orch_mod.Orchestrator()
+
+    return build
+
+
+@pytest.mark.asyncio
+async def test_commit_files_writes_one_commit(mock_github):
+    gh = AsyncGitHubClient(repo="o/r", token="t", api_base=mock_github.url, inline_limit=8)
+    try:
+        files = {"a.txt": "small", "b.txt": "larger than inline limit"}
+        sha = await gh.commit_files("dsf/x", files, "msg")
+        assert mock_github.refs["heads/dsf/x"] == sha
+        assert mock_github.commits[sha]["parents"] == ["base-sha"]
+        assert mock_github.tree_files("heads/dsf/x") == files
+        assert mock_github.count("POST", "/git/blobs$") == 1, "only large files use blobs"
+
+        second = await gh.commit_files("dsf/x", {"c.txt": "more"}, "msg 2")
+        assert mock_github.commits[second]["parents"] == [sha]
+        assert set(mock_github.tree_files("heads/dsf/x")) == {"a.txt", "b.txt", "c.txt"}
+        assert mock_github.count("PATCH", "/git/refs/heads/dsf/x$") == 1
+    finally:
+        await gh.aclose()
+
+
+@pytest.mark.asyncio
+async def test_feature_mode_publishes_single_commit_and_pr(mock_github, github_orchestrator):
+    orch = github_orchestrator("feature")
+    feat = orch.submit_feature("Batch", "one commit")
+    await orch.run_feature(feat.id)
+    await orch.aclose()
+
+    assert len(mock_github.pulls) == 1
+    assert mock_github.pulls[0]["head"] == f"dsf/{feat.id}"
+    files = mock_github.tree_files(f"heads/dsf/{feat.id}")
+    assert {f"artifacts/agents/{feat.id}/{tid}.txt" for tid in feat.task_ids} == set(files)
+    assert mock_github.count("POST", "/git/commits$") == 1
+    assert len(mock_github.requests) <= 8
+
+    # Reruns are idempotent through task_prs
+    await orch.run_feature(feat.id)
+    assert len(mock_github.pulls) == 1
+
+
+@pytest.mark.asyncio
+async def test_level_mode_stacks_one_pr_per_level(mock_github, github_orchestrator):
+    orch = github_orchestrator("level")
+    feat = orch.submit_feature("Levels", "per level")
+    await orch.run_feature(feat.id)
+    await orch.aclose()
+
+    heads = [pr["head"] for pr in mock_github.pulls]
+    assert heads == [f"dsf/{feat.id}/level-{i}" for i in range(1, 5)]
+    bases = [pr["base"] for pr in mock_github.pulls]
+    assert bases == ["main"] + heads[:-1], "each level's PR is stacked on the previous one"
+    assert len(mock_github.tree_files(f"heads/dsf/{feat.id}/level-4")) == 4
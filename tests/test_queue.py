@@ -11,7 +11,7 @@ class FakeQueue:
         self._items: list[str] = []
         FakeQueue.last_instance = self
 
-    def enqueue(self, payload: str) -> None:
+    def enqueue(self, payload: str, shard=None) -> None:
         self._items.append(payload)
 
     def dequeue(self, block: bool = True, timeout: int = 5):
@@ -19,6 +19,11 @@ class FakeQueue:
             return self._items.pop(0)
         return None
 
+    def remove(self, payload: str, shard=None) -> int:
+        before = len(self._items)
+        self._items = [item for item in self._items if item != payload]
+        return before - len(self._items)
+
 
 async def consume_until_done(orch, feature_id: str, q: FakeQueue):
     # Drain queue messages and run tasks until feature is completed
@@ -54,3 +59,85 @@ async def test_queue_execution_with_fake(monkeypatch, tmp_path):
     status = orch.feature_status(feat.id)
     assert status.completed == status.total
     assert status.failed == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_tasks_it_did_not_submit(monkeypatch, tmp_path):
+    fakeredis = pytest.importorskip("fakeredis")
+    from services.orchestrator import worker
+    from services.orchestrator.core import orchestrator as orch_mod
+    from services.orchestrator.core.queue import redis_queue
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis_queue.redis.Redis,
+        "from_url",
+        lambda url, **kw: fakeredis.FakeRedis(server=server, **kw),
+    )
+    monkeypatch.setenv("DSF_QUEUE", "redis")
+    monkeypatch.chdir(tmp_path)
+
+    api = orch_mod.Orchestrator()
+    feat = api.submit_feature("Queued Feature", "run by a separate worker process")
+    # A separate instance sharing only the database and Redis, like a worker process
+    remote = orch_mod.Orchestrator()
+    queue = redis_queue.RedisQueue()
+
+    async def work():
+        while True:
+            msg = queue.dequeue(block=False)
+            if msg:
+                data = json.loads(msg)
+                await worker.handle_task(remote, data["task_id"], data["repo"])
+            else:
+                await asyncio.sleep(0.01)
+
+    consumer = asyncio.create_task(work())
+    try:
+        await asyncio.wait_for(api.run_feature(feat.id), 30)
+    finally:
+        consumer.cancel()
+    status = api.feature_status(feat.id)
+    assert status.failed == 0 and status.completed == status.total
+    await worker.handle_task(remote, "no-such-task")  # unknown ids are dropped, not raised
+
+
+def test_sqlite_queue_serves_shards_round_robin(tmp_path):
+    from services.orchestrator.core.queue.sqlite_queue import SQLiteQueue
+
+    q = SQLiteQueue(str(tmp_path / "dsf.db"))
+    for i in range(3):
+        q.enqueue(f"a{i}", shard="acme/a")
+    q.enqueue("b0", shard="acme/b")
+    q.enqueue("plain")
+    assert q.depth() == {"": 1, "acme/a": 3, "acme/b": 1}
+    assert q.remove("a2", shard="acme/a") == 1
+    # Another connection to the same file sees the same queue, like a worker process
+    other = SQLiteQueue(str(tmp_path / "dsf.db"))
+    drained = [other.dequeue(block=False) for _ in range(4)]
+    assert sorted(drained) == ["a0", "a1", "b0", "plain"]
+    assert drained.index("a0") < drained.index("a1")
+    assert drained.index("b0") < drained.index("a1"), "one shard starved the others"
+    assert other.dequeue(block=True, timeout=0.05) is None
+    q.close()
+    other.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_queue_runs_features_on_workers(monkeypatch, tmp_path):
+    from services.orchestrator import worker
+    from services.orchestrator.core.orchestrator import Orchestrator
+    from services.orchestrator.integrations.secrets import SecretsProvider
+
+    monkeypatch.setenv("DSF_QUEUE", "sqlite")
+    monkeypatch.chdir(tmp_path)
+    api = Orchestrator()
+    feat = api.submit_feature("SQLite Queued", "no Redis needed")
+    queue = worker.queue_from_env(SecretsProvider.shared())
+    consumer = asyncio.create_task(worker.run_worker(queue, Orchestrator(), poll_timeout=1))
+    try:
+        await asyncio.wait_for(api.run_feature(feat.id), 30)
+    finally:
+        consumer.cancel()
+    status = api.feature_status(feat.id)
+    assert status.failed == 0 and status.completed == status.total
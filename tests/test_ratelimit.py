@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+
+from services.orchestrator.integrations.github import AsyncGitHubClient
+from services.orchestrator.integrations.ratelimit import (
+    FileBucketStore,
+    GitHubRateLimiter,
+    LocalBucketStore,
+    Priority,
+    RedisBucketStore,
+)
+
+
+def _headers(remaining: int, reset_in: float = 3600, limit: int = 100) -> dict[str, str]:
+    return {
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-reset": str(int(time.time() + reset_in)),
+        "x-ratelimit-limit": str(limit),
+    }
+
+
+def test_low_priority_yields_reserve_to_pr_creation():
+    limiter = GitHubRateLimiter(LocalBucketStore(), burst=10)
+    limiter.observe(200, _headers(remaining=8))
+    assert limiter.try_acquire(Priority.LOW) > 0, "comments stop at the 10% reserve"
+    assert limiter.try_acquire(Priority.NORMAL) == 0
+    assert limiter.try_acquire(Priority.HIGH) == 0
+
+
+def test_paces_budget_ahead_of_exhaustion():
+    limiter = GitHubRateLimiter(LocalBucketStore(), burst=2)
+    limiter.observe(200, _headers(remaining=50, reset_in=100, limit=5000))
+    assert limiter.try_acquire(Priority.HIGH) == 0
+    assert limiter.try_acquire(Priority.HIGH) == 0
+    # Burst spent: next token arrives at remaining/seconds-to-reset (~0.5/s)
+    assert 1.0 < limiter.try_acquire(Priority.HIGH) < 3.0
+
+
+def test_secondary_limit_pauses_all_priorities():
+    limiter = GitHubRateLimiter(LocalBucketStore())
+    limiter.observe(403, {"retry-after": "30"}, "You have exceeded a secondary rate limit")
+    for priority in Priority:
+        assert 29 < limiter.try_acquire(priority) <= 30
+
+
+def test_file_store_is_shared_between_limiters(tmp_path):
+    path = str(tmp_path / "bucket.json")
+    a = GitHubRateLimiter(FileBucketStore(path), burst=3)
+    b = GitHubRateLimiter(FileBucketStore(path), burst=3)
+    assert a.try_acquire() == 0
+    assert b.try_acquire() == 0
+    assert a.try_acquire() == 0
+    assert b.try_acquire() > 0, "burst is shared, not per process"
+    assert a.snapshot()["remaining"] == b.snapshot()["limit"] - 3
+
+
+@pytest.mark.asyncio
+async def test_slow_store_does_not_block_the_event_loop():
+    class SlowStore(LocalBucketStore):
+        blocking = True
+
+        def update(self, fn):
+            time.sleep(0.2)  # a contended flock or a slow Redis round trip
+            return super().update(fn)
+
+    limiter = GitHubRateLimiter(SlowStore())
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    await limiter.acquire(Priority.HIGH)
+    await limiter.aobserve(200, _headers(remaining=10))
+    await limiter.arefund(Priority.HIGH)
+    ticker.cancel()
+    assert ticks > 20, "the loop kept running while the store was busy"
+
+
+def test_redis_store_gives_up_under_endless_contention(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    import redis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis.Redis, "from_url", lambda url, **kw: fakeredis.FakeRedis(server=server, **kw)
+    )
+    store = RedisBucketStore("dsf:test:ratelimit")
+    rival = fakeredis.FakeRedis(server=server)
+    monkeypatch.setattr(RedisBucketStore, "max_attempts", 3)
+    calls = 0
+
+    def always_raced(state):
+        nonlocal calls
+        calls += 1
+        rival.set("dsf:test:ratelimit", "{}")  # another process wins every time
+        return state
+
+    with pytest.raises(RuntimeError):
+        store.update(always_raced)
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_client_throttles_comments_before_hitting_the_limit(mock_github):
+    mock_github.extra_headers = _headers(remaining=5, reset_in=2)
+    limiter = GitHubRateLimiter(LocalBucketStore(), burst=10)
+    gh = AsyncGitHubClient(repo="o/r", token="t", api_base=mock_github.url, limiter=limiter)
+    try:
+        assert await gh.create_pull_request("b", "first") == 1
+        comment = asyncio.create_task(gh.comment_on_issue(1, "later"))
+        await asyncio.sleep(0.1)
+        assert not comment.done(), "comment waits for the window to reset"
+        assert await gh.create_pull_request("b", "second") == 2
+        mock_github.extra_headers = _headers(remaining=100)
+        assert await asyncio.wait_for(comment, timeout=4) == 1
+    finally:
+        await gh.aclose()
+    assert mock_github.count("POST", "/comments$") == 1
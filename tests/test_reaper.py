@@ -0,0 +1,97 @@
+import asyncio
+import json
+import time
+
+import pytest
+from test_queue import FakeQueue
+
+from services.orchestrator.core.agents.code_writer import CodeWriterAgent
+from services.orchestrator.core.metrics import metrics
+from services.orchestrator.core.models import TaskStatus
+
+
+@pytest.fixture
+def queued_orchestrator(tmp_path, monkeypatch):
+    monkeypatch.setenv("DSF_QUEUE", "redis")
+    monkeypatch.chdir(tmp_path)
+    from services.orchestrator.core import orchestrator as orch_mod
+
+    monkeypatch.setattr(orch_mod, "RedisQueue", FakeQueue, raising=True)
+    return orch_mod.Orchestrator
+
+
+def _crash_worker(orch, task_id: str) -> None:
+    """A worker took the task and died without finishing it."""
+    task = orch._persistence.get_task(task_id)
+    task.status = TaskStatus.RUNNING
+    task.attempts += 1
+    orch._persistence.start_task(task, "dead-worker", time.time() - 1)
+
+
+@pytest.mark.asyncio
+async def test_orphaned_running_task_is_requeued(queued_orchestrator):
+    orch = queued_orchestrator()
+    queue = FakeQueue.last_instance
+    feat = orch.submit_feature("Crash", "worker dies")
+    driver = asyncio.create_task(orch.run_feature(feat.id))
+    while not queue._items:
+        await asyncio.sleep(0.01)
+    plan = json.loads(queue.dequeue())["task_id"]
+    _crash_worker(orch, plan)
+    before = metrics.counter("tasks_reaped", action="requeued", agent="code")
+
+    assert orch.reap_once() == [plan]
+    assert orch.reap_once() == []
+    assert orch.get_task(plan).status == TaskStatus.PENDING
+    assert json.loads(queue._items[0])["task_id"] == plan
+    assert metrics.counter("tasks_reaped", action="requeued", agent="code") == before + 1
+    # A healthy worker picks the requeued message up and the feature completes
+    while not driver.done():
+        item = queue.dequeue()
+        if item:
+            await orch._run_task(json.loads(item)["task_id"])
+        await asyncio.sleep(0.01)
+    assert orch.feature_status(feat.id).status == "done"
+
+
+@pytest.mark.asyncio
+async def test_reaped_task_fails_without_attempts_left(queued_orchestrator, monkeypatch):
+    monkeypatch.setenv("DSF_TASK_MAX_ATTEMPTS", "1")
+    orch = queued_orchestrator()
+    queue = FakeQueue.last_instance
+    feat = orch.submit_feature("Crash", "no retries")
+    driver = asyncio.create_task(orch.run_feature(feat.id))
+    while not queue._items:
+        await asyncio.sleep(0.01)
+    plan = json.loads(queue.dequeue())["task_id"]
+    _crash_worker(orch, plan)
+
+    assert orch.reap_once() == [plan]
+    await asyncio.wait_for(driver, 2)
+    task = orch.get_task(plan)
+    assert task.status == TaskStatus.FAILED and "heartbeat" in task.result
+    assert queue._items == []
+
+
+@pytest.mark.asyncio
+async def test_heartbeats_keep_slow_tasks_alive(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_TASK_LEASE_SECONDS", "0.3")
+    original = CodeWriterAgent.run
+
+    async def slow(self, task, workspace=None):
+        await asyncio.sleep(1.0)
+        return await original(self, task, workspace=workspace)
+
+    monkeypatch.setattr(CodeWriterAgent, "run", slow)
+    from services.orchestrator.core.orchestrator import Orchestrator
+
+    orch = Orchestrator()
+    feat = orch.submit_feature("Slow", "outlives its lease ttl")
+    driver = asyncio.create_task(orch.run_feature(feat.id))
+    deadline = time.monotonic() + 1.5
+    while time.monotonic() < deadline:
+        assert orch.reap_once() == []
+        await asyncio.sleep(0.05)
+    driver.cancel()
+    await asyncio.gather(driver, return_exceptions=True)
@@ -0,0 +1,94 @@
+import pytest
+
+from services.orchestrator.core.agents.code_writer import CodeWriterAgent
+from services.orchestrator.core.agents.review import ReviewAgent
+from services.orchestrator.core.models import AgentType, TaskStatus
+from services.orchestrator.core.orchestrator import Orchestrator
+from services.orchestrator.core.retry import RetryPolicy, retry_policies_from_env
+
+
+def test_policies_from_env(monkeypatch):
+    monkeypatch.setenv("DSF_TASK_MAX_ATTEMPTS", "2")
+    monkeypatch.setenv("DSF_TASK_MAX_ATTEMPTS_REVIEW", "5")
+    policies = retry_policies_from_env(AgentType)
+    assert policies[AgentType.CODE].max_attempts == 2
+    assert policies[AgentType.REVIEW].max_attempts == 5
+    policy = RetryPolicy(backoff=1.0, max_backoff=3.0)
+    assert 0.5 <= policy.delay(1) <= 1.0
+    assert 1.5 <= policy.delay(5) <= 3.0
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_TASK_RETRY_BACKOFF", "0.01")
+    failures = {"Review: Flaky": 2}
+
+    async def run(self, task, workspace=None):
+        if failures.get(task.title):
+            failures[task.title] -= 1
+            raise RuntimeError("model timeout")
+        return "LGTM"
+
+    monkeypatch.setattr(ReviewAgent, "run", run)
+    orch = Orchestrator()
+    feat = orch.submit_feature("Flaky", "transient")
+    await orch.run_feature(feat.id)
+    review = Orchestrator().list_tasks(feat.id)[-1]
+    assert review.status == TaskStatus.DONE
+    assert review.attempts == 3
+
+
+@pytest.mark.asyncio
+async def test_resume_reruns_only_the_failed_subtree(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_TASK_MAX_ATTEMPTS", "1")
+    broken = True
+    code_runs = []
+
+    async def review(self, task, workspace=None):
+        if broken:
+            raise RuntimeError("reviewer unavailable")
+        return "LGTM"
+
+    original = CodeWriterAgent.run
+
+    async def code(self, task, workspace=None):
+        code_runs.append(task.title)
+        return await original(self, task, workspace=workspace)
+
+    monkeypatch.setattr(ReviewAgent, "run", review)
+    monkeypatch.setattr(CodeWriterAgent, "run", code)
+    orch = Orchestrator()
+    feat = orch.submit_feature("Resume", "keep finished work")
+    await orch.run_feature(feat.id)
+    status = orch.feature_status(feat.id)
+    assert status.failed == 1 and status.completed == 3
+    assert feat.id not in orch._persistence.list_unfinished_features()
+
+    broken = False
+    # A new instance (e.g. after a restart) resumes from the stored checkpoint
+    other = Orchestrator()
+    reset = other.resume_feature(feat.id)
+    assert reset == [status.tasks[-1].id]
+    assert feat.id in other._persistence.list_unfinished_features()
+    await other.run_feature(feat.id)
+    assert other.feature_status(feat.id).status == "done"
+    assert len(code_runs) == 2, "plan and implement were not re-run"
+    assert other.resume_feature(feat.id) == []
+
+
+@pytest.mark.asyncio
+async def test_status_reads_during_a_task_do_not_stall_the_feature(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    orch = Orchestrator()
+    original = CodeWriterAgent.run
+
+    async def code(self, task, workspace=None):
+        orch.list_tasks(feat.id)  # e.g. GET /features/{id} while the agent runs
+        return await original(self, task, workspace=workspace)
+
+    monkeypatch.setattr(CodeWriterAgent, "run", code)
+    feat = orch.submit_feature("Polled", "status read mid-task")
+    await orch.run_feature(feat.id)
+    assert orch.feature_status(feat.id).status == "done"
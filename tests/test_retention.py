@@ -0,0 +1,85 @@
+import gzip
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.orchestrator.core.agents.review import ReviewAgent
+from services.orchestrator.core.orchestrator import Orchestrator
+from services.orchestrator.core.persistence.archive import FeatureArchive
+
+HOT_TABLES = ("features", "tasks", "task_deps", "task_output", "task_events", "outbox")
+
+
+def _rows(db: str, feature_id: str) -> dict:
+    conn = sqlite3.connect(db)
+    tasks = "SELECT id FROM tasks WHERE feature_id=?"
+    counts = {
+        "features": "SELECT COUNT(*) FROM features WHERE id=?",
+        "tasks": "SELECT COUNT(*) FROM tasks WHERE feature_id=?",
+        "task_deps": f"SELECT COUNT(*) FROM task_deps WHERE task_id IN ({tasks})",
+        "task_output": f"SELECT COUNT(*) FROM task_output WHERE task_id IN ({tasks})",
+        "task_events": f"SELECT COUNT(*) FROM task_events WHERE task_id IN ({tasks})",
+        "outbox": "SELECT COUNT(*) FROM outbox WHERE feature_id=?",
+    }
+    try:
+        return {t: conn.execute(sql, (feature_id,)).fetchone()[0] for t, sql in counts.items()}
+    finally:
+        conn.close()
+
+
+def test_archive_segments_are_append_only_gzip(tmp_path):
+    archive = FeatureArchive(str(tmp_path), segment_bytes=40)
+    first = archive.append([{"n": 1}, {"n": 2}])
+    second = archive.append([{"n": 3}])
+    assert first[0][0] == first[1][0] != second[0][0], "full segment was not rolled over"
+    assert [archive.read(*where)["n"] for where in first + second] == [1, 2, 3]
+    # A segment is still plain gzipped JSON lines for offline tools
+    with gzip.open(tmp_path / first[0][0], "rt") as f:
+        assert [json.loads(line)["n"] for line in f] == [1, 2]
+    # A new writer continues the newest segment rather than starting over
+    assert FeatureArchive(str(tmp_path), segment_bytes=40).append([{"n": 4}])[0][0] > first[0][0]
+
+
+@pytest.mark.asyncio
+async def test_finished_features_move_to_the_archive(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_ARCHIVE_BATCH", "1")
+    monkeypatch.setenv("DSF_TASK_MAX_ATTEMPTS", "1")
+    orch = Orchestrator()
+    done = [orch.submit_feature(f"Done {i}", "finished work") for i in range(3)]
+    for feat in done:
+        await orch.run_feature(feat.id)
+
+    async def review(self, task, workspace=None):
+        raise RuntimeError("reviewer unavailable")
+
+    monkeypatch.setattr(ReviewAgent, "run", review)
+    failed = orch.submit_feature("Failed", "may still be resumed")
+    await orch.run_feature(failed.id)
+    before = orch.feature_status(done[0].id)
+    db = orch._persistence.path
+    assert all(_rows(db, done[0].id)[t] for t in ("features", "tasks", "task_events"))
+
+    assert await orch.archive_once(older_than=3600) == []  # too recent
+    archived = await orch.archive_once(older_than=0)
+    assert sorted(archived) == sorted(f.id for f in done)
+    for feat in done:
+        assert _rows(db, feat.id) == dict.fromkeys(HOT_TABLES, 0)
+    assert _rows(db, failed.id)["tasks"] > 0, "an unfinished feature was archived"
+    conn = sqlite3.connect(db)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    conn.close()
+
+    # Still readable through the API, from a fresh instance
+    monkeypatch.setenv("DSF_ARCHIVE_AFTER_DAYS", "0")
+    from services.orchestrator.app import main
+
+    with TestClient(main.app) as client:
+        status = client.get(f"/features/{done[0].id}").json()
+        assert status == before.model_dump()
+        tasks = client.get(f"/features/{done[0].id}/tasks").json()
+        assert [t["result"] for t in tasks] == [t.result for t in before.tasks]
+        assert client.get("/features/missing").status_code == 404
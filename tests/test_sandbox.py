@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from services.orchestrator.core.agents.test_writer import TestWriterAgent
+from services.orchestrator.core.models import AgentType, TaskStatus
+from services.orchestrator.core.orchestrator import Orchestrator
+from services.orchestrator.core.sandbox import SandboxLimits, SandboxPool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SandboxPool(workers=2)
+    yield pool
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_runs_generated_tests(pool):
+    passed = await pool.run_pytest("def test_ok():\n    assert 1 + 1 == 2\n")
+    assert passed.ok and "1 passed" in passed.stdout
+    failed = await pool.run_pytest("def test_bad():\n    assert 1 == 2\n")
+    assert not failed.ok and failed.returncode == 1
+
+
+@pytest.mark.asyncio
+async def test_jail_limits_and_environment(pool, monkeypatch):
+    monkeypatch.setenv("DSF_GITHUB_TOKEN", "secret")
+    leaked = await pool.run({}, ["sh", "-c", 'echo "token=$DSF_GITHUB_TOKEN"; pwd'])
+    assert leaked.ok
+    assert "secret" not in leaked.stdout and "dsf-sandbox-" in leaked.stdout
+    hog = await pool.run({"hog.py": "x = bytearray(4 * 1024**3)\n"}, ["python", "hog.py"])
+    assert hog.returncode == 1 and "MemoryError" in hog.stderr
+    with pytest.raises(ValueError):
+        await pool.run({"../escape.py": ""}, ["python", "escape.py"])
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_job_without_blocking_the_loop(pool):
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    started = time.monotonic()
+    spin = await pool.run(
+        {"spin.py": "while True:\n    pass\n"},
+        ["python", "spin.py"],
+        limits=SandboxLimits(wall_seconds=0.5),
+    )
+    ticker.cancel()
+    assert spin.timed_out and not spin.ok
+    assert time.monotonic() - started < 5
+    assert ticks > 10
+
+
+@pytest.mark.asyncio
+async def test_failing_generated_tests_fail_the_task(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_SANDBOX", "true")
+    monkeypatch.setenv("DSF_SANDBOX_WORKERS", "1")
+
+    async def run(self, task, workspace=None):
+        return "def test_generated():\n    assert False, 'broken'\n"
+
+    monkeypatch.setattr(TestWriterAgent, "run", run)
+    orch = Orchestrator()
+    try:
+        feat = orch.submit_feature("Sandboxed", "verify generated tests")
+        await orch.run_feature(feat.id)
+        test_task = next(t for t in orch.list_tasks(feat.id) if t.agent_type == AgentType.TEST)
+        assert test_task.status == TaskStatus.FAILED
+        assert "generated tests failed" in test_task.result and "broken" in test_task.result
+    finally:
+        await orch.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stuck_worker_is_bounded_by_the_caller():
+    pool = SandboxPool(workers=1, limits=SandboxLimits(wall_seconds=0.2))
+    pool.grace_seconds = 0.5
+    try:
+        # A job whose worker is busy longer than wall + grace (e.g. a wedged fork)
+        pool._pool().submit(time.sleep, 5)
+        result = await pool.run({}, ["true"])
+        assert result.timed_out and not result.ok
+        assert pool._executor is None, "the wedged pool is torn down"
+        assert (await pool.run({}, ["true"])).ok, "and rebuilt on next use"
+    finally:
+        await pool.aclose()
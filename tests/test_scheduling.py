@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from services.orchestrator.core.agents.code_writer import CodeWriterAgent
+from services.orchestrator.core.dag import (
+    critical_path,
+    decompose,
+    mentioned_modules,
+    remaining_path,
+)
+from services.orchestrator.core.models import AgentType
+from services.orchestrator.core.orchestrator import Orchestrator
+
+WIDE = "Touch api/routes.py, core/db.py and core/db.py again; see README.md"
+
+
+def test_decompose_fans_out_per_module():
+    assert mentioned_modules(WIDE) == ["api/routes.py", "core/db.py"]
+    tasks, g = decompose("Wide", WIDE)
+    titles = [t.title for t in tasks]
+    assert titles == [
+        "Plan: Wide",
+        "Implement: Wide [api/routes.py]",
+        "Test: Wide [api/routes.py]",
+        "Implement: Wide [core/db.py]",
+        "Test: Wide [core/db.py]",
+        "Review: Wide",
+    ]
+    review = tasks[-1]
+    assert set(review.depends_on) == {tasks[2].id, tasks[4].id}
+    assert "Scope: core/db.py" in tasks[3].description
+    # One or no module named: the serial chain
+    assert len(decompose("Narrow", "only api/routes.py")[0]) == 4
+
+
+def test_critical_path_follows_the_costliest_branch():
+    tasks, g = decompose("Wide", WIDE)
+    cost = {AgentType.CODE: 10.0, AgentType.TEST: 5.0, AgentType.REVIEW: 1.0}
+    slow_test = tasks[4]
+    remaining = remaining_path(g, lambda t: 50.0 if t.id == slow_test.id else cost[t.agent_type])
+    assert remaining[tasks[0].id] == 10 + 10 + 50 + 1
+    assert remaining[tasks[3].id] > remaining[tasks[1].id]
+    assert critical_path(g, remaining) == [tasks[0].id, tasks[3].id, slow_test.id, tasks[-1].id]
+
+
+@pytest.mark.asyncio
+async def test_modules_run_in_parallel_critical_path_first(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_AGENT_POOL_CODE", "1")
+    started = []
+    original = CodeWriterAgent.run
+
+    async def run(self, task, workspace=None):
+        started.append(task.title)
+        await asyncio.sleep(0.01)
+        return await original(self, task, workspace=workspace)
+
+    monkeypatch.setattr(CodeWriterAgent, "run", run)
+    orch = Orchestrator()
+    feat = orch.submit_feature("Wide", WIDE)
+    tasks = orch.list_tasks(feat.id)
+    assert all(t.estimate == 60.0 for t in tasks)  # no history yet: the default
+    # The db module's tests are known to be slow, so its branch is the critical path
+    tasks[4].estimate = 600.0
+    orch._persistence.update_task(tasks[4])
+    status = orch.feature_status(feat.id)
+    assert status.eta_seconds == 60 + 60 + 600 + 60
+    assert status.critical_path == [tasks[0].id, tasks[3].id, tasks[4].id, tasks[5].id]
+
+    await orch.run_feature(feat.id)
+    # With one code agent the implement tasks queue for it: db first, although listed second
+    assert started[1:3] == ["Implement: Wide [core/db.py]", "Implement: Wide [api/routes.py]"]
+    status = orch.feature_status(feat.id)
+    assert status.status == "done" and status.eta_seconds == 0 and status.critical_path == []
+
+
+@pytest.mark.asyncio
+async def test_independent_modules_overlap(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    active, peak = 0, 0
+
+    async def run(self, task, workspace=None):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return "code"
+
+    monkeypatch.setattr(CodeWriterAgent, "run", run)
+    orch = Orchestrator()
+    feat = orch.submit_feature("Wide", WIDE)
+    await orch.run_feature(feat.id)
+    assert orch.feature_status(feat.id).status == "done"
+    assert peak == 2
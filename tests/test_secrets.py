@@ -55,10 +55,13 @@ class TestSecretsProvider:
 
     def test_vault_used_when_env_missing_and_cache(self, monkeypatch):
         provider, dummy_client = self._install_dummies(monkeypatch, value="vault-abc")
-        # No env for this name; should hit vault once and then cache
-        assert provider.get_secret("NO_ENV_SECRET") == "vault-abc"
+        # No env for this name: the first read does not wait on the vault, it returns
+        # the default and loads the secret in the background; later reads are cached
+        assert provider.get_secret("NO_ENV_SECRET", default="fallback") == "fallback"
+        _wait_until(lambda: provider.get_secret("NO_ENV_SECRET") == "vault-abc")
         assert provider.get_secret("NO_ENV_SECRET") == "vault-abc"
         assert dummy_client.calls == 1
+        provider.stop()
 
     def test_default_returned_when_disabled(self, monkeypatch):
         # Disable Key Vault
@@ -67,3 +70,134 @@ class TestSecretsProvider:
 
         provider = SecretsProvider.from_env()
         assert provider.get_secret("MISSING", default="fallback") == "fallback"
+
+
+class VaultStub:
+    """SecretClient stand-in whose values can be changed (rotated) or made to fail."""
+
+    values: dict = {}
+    failing: set = set()
+    calls = 0
+
+    def __init__(self, *a, **k):
+        pass
+
+    def get_secret(self, name: str):
+        VaultStub.calls += 1
+        if name in VaultStub.failing or name not in VaultStub.values:
+            raise RuntimeError("vault unavailable")
+
+        class Secret:
+            value = VaultStub.values[name]
+
+        return Secret()
+
+
+@pytest.fixture
+def vault(monkeypatch):
+    from services.orchestrator.integrations import secrets as secrets_mod
+
+    monkeypatch.setattr(secrets_mod, "DefaultAzureCredential", lambda: None)
+    monkeypatch.setattr(secrets_mod, "SecretClient", VaultStub)
+    VaultStub.values, VaultStub.failing, VaultStub.calls = {}, set(), 0
+
+    def build(**kwargs):
+        return secrets_mod.SecretsProvider(enabled=True, vault_uri="https://dummy.vault", **kwargs)
+
+    return build
+
+
+def _wait_until(predicate, timeout: float = 2.0) -> None:
+    import time
+
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_background_refresh_applies_rotation_without_blocking(vault):
+    VaultStub.values["ROTATING"] = "v1"
+    provider = vault(ttl=0.2, negative_ttl=0.2)
+    rotations = []
+    provider.subscribe("ROTATING", lambda *args: rotations.append(args))
+    provider.prefetch(["ROTATING"])
+    provider.start_refresh()
+    try:
+        calls = VaultStub.calls
+        assert provider.get_secret("ROTATING") == "v1"
+        assert VaultStub.calls == calls, "cached reads do no I/O"
+
+        VaultStub.values["ROTATING"] = "v2"
+        _wait_until(lambda: provider.get_secret("ROTATING") == "v2")
+        assert rotations == [("ROTATING", "v1", "v2")]
+    finally:
+        provider.stop()
+
+
+def test_failures_are_negatively_cached_then_retried(vault):
+    provider = vault(ttl=60, negative_ttl=0.5)
+    VaultStub.failing.add("FLAKY")
+    VaultStub.values["FLAKY"] = "ok"
+    provider.prefetch(["FLAKY"])
+    assert provider.get_secret("FLAKY", default="fallback") == "fallback"
+    calls = VaultStub.calls
+    assert provider.get_secret("FLAKY", default="fallback") == "fallback"
+    assert VaultStub.calls == calls, "misses are cached too"
+
+    VaultStub.failing.clear()
+    provider.start_refresh()
+    try:
+        _wait_until(lambda: provider.get_secret("FLAKY") == "ok")
+    finally:
+        provider.stop()
+
+
+@pytest.mark.asyncio
+async def test_rotated_github_token_reaches_live_clients(vault, monkeypatch, tmp_path):
+    from services.orchestrator.core.orchestrator import Orchestrator
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_GITHUB_ENABLED", "true")
+    monkeypatch.delenv("DSF_GITHUB_TOKEN", raising=False)
+    monkeypatch.setenv("DSF_GITHUB_REPO", "acme/api")
+    VaultStub.values["DSF_GITHUB_TOKEN"] = "old-token"
+    provider = vault()
+    orch = Orchestrator(secrets=provider)
+    client = orch._github.get()
+    assert client.token == "old-token"
+
+    VaultStub.values["DSF_GITHUB_TOKEN"] = "new-token"
+    provider._refresh("DSF_GITHUB_TOKEN")  # what the refresher thread does near expiry
+    assert client.token == "new-token"
+    await orch.aclose()
+
+
+@pytest.mark.asyncio
+async def test_repo_token_loaded_late_replaces_the_shared_one(vault, monkeypatch, tmp_path):
+    from services.orchestrator.core.orchestrator import Orchestrator, startup_secret_names
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_GITHUB_ENABLED", "true")
+    monkeypatch.delenv("DSF_GITHUB_TOKEN", raising=False)
+    monkeypatch.setenv("DSF_GITHUB_REPO", "acme/api")
+    monkeypatch.setenv("DSF_GITHUB_REPOS", "acme/web")
+    monkeypatch.setenv("DSF_GITHUB_ALLOW_ANY_REPO", "true")
+    assert "DSF_GITHUB_TOKEN_ACME_WEB" in startup_secret_names()
+    VaultStub.values.update(
+        DSF_GITHUB_TOKEN="shared", DSF_GITHUB_TOKEN_ACME_WEB="web", DSF_GITHUB_TOKEN_ACME_NEW="new"
+    )
+    provider = vault()
+    orch = Orchestrator(secrets=provider)
+    assert orch._github.get("acme/web").token == "web", "allowlisted repo tokens are prefetched"
+
+    VaultStub.failing.add("DSF_GITHUB_TOKEN_ACME_NEW")
+    late = orch._github.get("acme/new")  # not prefetched: starts on the shared token
+    assert late.token == "shared" and late.limiter is orch._github.get().limiter
+
+    VaultStub.failing.clear()
+    provider._refresh("DSF_GITHUB_TOKEN_ACME_NEW")  # the background retry
+    assert late.token == "new"
+    assert late.limiter is not orch._github.get().limiter
+    provider.stop()
+    await orch.aclose()
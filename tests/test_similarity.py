@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from services.orchestrator.core.agents.review import ReviewAgent
+from services.orchestrator.core.orchestrator import Orchestrator
+from services.orchestrator.core.similarity import SimilarityIndex, embed
+
+
+def test_near_duplicates_score_higher_than_unrelated_text():
+    login = embed("Add rate limiting to the login endpoint of the auth API")
+    reworded = embed("Rate limit the auth API login endpoint")
+    charts = embed("Render dashboard charts in dark mode")
+    assert float(login @ reworded) > 0.6 > 0.2 > float(login @ charts)
+    assert not embed("").any()
+
+
+def test_index_top_k_updates_and_reload(tmp_path):
+    index = SimilarityIndex(dim=64, directory=str(tmp_path))
+    for i in range(3000):  # past the initial capacity
+        index.add(f"f{i}", f"feature number {i} about topic {i % 7}", {"n": i})
+    index.add("auth", "Add rate limiting to the login endpoint", {"title": "Rate limit login"})
+    best = index.query("rate limiting for login", k=3)
+    assert best[0].key == "auth" and best[0].meta == {"title": "Rate limit login"}
+    assert best[0].score >= best[1].score >= best[2].score
+    assert index.query("rate limiting for login", k=1, exclude="auth")[0].key != "auth"
+    index.add("auth", "Render dashboard charts", {"title": "Charts"})  # replaces the entry
+    assert len(index) == 3001
+
+    # A crash between the two appends leaves a partial vector behind
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(b"\0" * 100)
+    reloaded = SimilarityIndex(dim=64, directory=str(tmp_path))
+    assert len(reloaded) == 3001
+    assert reloaded.query("dashboard charts", k=1)[0].meta == {"title": "Charts"}
+    assert os.path.getsize(tmp_path / "vectors.f32") == 3002 * 64 * 4
+    reloaded.add("new", "brand new entry")
+    assert (
+        SimilarityIndex(dim=64, directory=str(tmp_path)).query("brand new entry", 1)[0].key == "new"
+    )
+
+
+@pytest.mark.asyncio
+async def test_duplicates_are_flagged_and_agents_retrieve_earlier_work(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_SIMILARITY", "true")
+    seen = []
+
+    async def review(self, task, workspace=None):
+        seen.extend(self.related_work(task.description, k=1))
+        return f"LGTM: {task.title}"
+
+    monkeypatch.setattr(ReviewAgent, "run", review)
+    orch = Orchestrator()
+    first = orch.submit_feature("Rate limit login", "Add rate limiting to the auth API login")
+    assert orch.likely_duplicates(first) == []  # nothing has finished yet
+    await orch.run_feature(first.id)
+    assert seen == []
+    first_results = {t.id: t.result for t in orch.list_tasks(first.id)}
+
+    # Indexed on completion and persisted: a restarted instance flags the duplicate
+    other = Orchestrator()
+    again = other.submit_feature("Rate-limit logins", "Add rate limiting to the auth API login")
+    duplicates = other.likely_duplicates(again)
+    assert [d[0] for d in duplicates] == [first.id]
+    unrelated = other.submit_feature("Dark mode", "Render dashboard charts in dark mode")
+    assert other.likely_duplicates(unrelated) == []
+    await other.run_feature(again.id)
+    assert seen and seen[0].meta["feature_id"] == first.id
+    assert seen[0].meta["result"] == first_results[seen[0].key]
@@ -0,0 +1,63 @@
+import subprocess
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+
+def test_app_import_is_lazy(monkeypatch):
+    monkeypatch.setenv("DSF_KEYVAULT_ENABLED", "false")
+    monkeypatch.delenv("DSF_GITHUB_ENABLED", raising=False)
+    monkeypatch.delenv("DSF_QUEUE", raising=False)
+    code = (
+        "import sys, services.orchestrator.app.main as m;"
+        "heavy = [n for n in ('networkx', 'redis', 'httpx', 'azure.identity', 'multiprocessing',"
+        " 'numpy')"
+        " if n in sys.modules];"
+        "print(','.join(heavy))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.strip()
+    assert out == ""
+
+
+def test_lifespan_builds_orchestrator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from services.orchestrator.app import main
+
+    with TestClient(main.app) as client:
+        assert client.get("/healthz").json() == {"ok": True}
+        deadline = time.time() + 5
+        while client.get("/readyz").status_code != 200:
+            assert time.time() < deadline
+            time.sleep(0.01)
+        created = client.post("/features", json={"title": "Lazy", "description": "init"})
+        assert created.status_code == 200
+        status = client.get(f"/features/{created.json()['id']}")
+        assert status.status_code == 200
+    assert main.app.state.orchestrator_init is None
+
+
+def test_prefetch_is_concurrent(monkeypatch):
+    from services.orchestrator.integrations import secrets as secrets_mod
+
+    class DummySecret:
+        value = "v"
+
+    class SlowClient:
+        def __init__(self, *a, **k):
+            pass
+
+        def get_secret(self, name):
+            time.sleep(0.2)
+            return DummySecret()
+
+    monkeypatch.setattr(secrets_mod, "DefaultAzureCredential", lambda: None)
+    monkeypatch.setattr(secrets_mod, "SecretClient", SlowClient)
+    provider = secrets_mod.SecretsProvider(enabled=True, vault_uri="https://dummy.vault")
+    names = [f"PREFETCH_{i}" for i in range(5)]
+    started = time.perf_counter()
+    provider.prefetch(names)
+    assert time.perf_counter() - started < 0.6
+    assert all(provider.get_secret(n) == "v" for n in names)
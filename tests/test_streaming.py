@@ -0,0 +1,88 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.orchestrator.core.agents.code_writer import CodeWriterAgent
+from services.orchestrator.core.orchestrator import Orchestrator
+from services.orchestrator.core.persistence.sqlite import SQLitePersistence
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_persisted_and_followed_while_running(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    gate = asyncio.Event()
+
+    async def stream(self, task, workspace=None):
+        yield f"# {task.title}\n"
+        await gate.wait()
+        yield "print('done')\n"
+
+    monkeypatch.setattr(CodeWriterAgent, "stream", stream)
+    orch = Orchestrator()
+    feat = orch.submit_feature("Stream", "incremental output")
+    plan = feat.task_ids[0]
+    runner = asyncio.create_task(orch.run_feature(feat.id))
+    follower = orch.follow_output(plan)
+    assert await asyncio.wait_for(follower.__anext__(), 2) == (0, "# Plan: Stream\n")
+    # Already on disk before the agent finishes: another process (or a restart) sees it
+    other = SQLitePersistence()
+    assert other.read_task_output(plan) == ["# Plan: Stream\n"]
+    gate.set()
+    assert await asyncio.wait_for(follower.__anext__(), 2) == (1, "print('done')\n")
+    with pytest.raises(StopAsyncIteration):
+        await asyncio.wait_for(follower.__anext__(), 2)
+    await runner
+    task = orch.get_task(plan)
+    assert task.result == "# Plan: Stream\nprint('done')\n"
+    assert orch.task_output(plan, after=1) == ["print('done')\n"]
+
+
+def test_output_endpoints(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from services.orchestrator.app import main
+
+    with TestClient(main.app) as client:
+        created = client.post("/features", json={"title": "Live", "description": "sse"}).json()
+        deadline = time.time() + 5
+        while client.get(f"/features/{created['id']}").json()["status"] != "done":
+            assert time.time() < deadline
+            time.sleep(0.05)
+        task_id = client.get(f"/features/{created['id']}/tasks").json()[0]["id"]
+        out = client.get(f"/tasks/{task_id}/output").json()
+        assert out["status"] == "done" and out["next"] == len(out["chunks"]) >= 1
+        body = client.get(f"/tasks/{task_id}/stream").text
+        assert json.loads(body.split("data: ", 1)[1].split("\n", 1)[0]) == out["chunks"][0]
+        assert body.rstrip().endswith('data: {"status": "done"}')
+        resumed = client.get(f"/tasks/{task_id}/stream", headers={"Last-Event-ID": "0"}).text
+        assert resumed.count("id: ") == len(out["chunks"]) - 1
+        assert client.get("/tasks/missing/output").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_output_chunks_are_written_in_batches(tmp_path, monkeypatch):
+    from services.orchestrator.core.output import TaskOutputLog
+
+    monkeypatch.chdir(tmp_path)
+    store = SQLitePersistence()
+    store.init()
+    writes = []
+    append = store.append_task_output
+    monkeypatch.setattr(
+        store, "append_task_output", lambda *args: writes.append(len(args[2])) or append(*args)
+    )
+    log = TaskOutputLog(store, flush_chunks=10, flush_interval=0.05)
+    log.begin("t1")
+    for i in range(25):
+        log.append("t1", f"line {i}\n")
+    assert writes == [1, 10, 10], "first chunk at once, then full batches"
+    assert len(store.read_task_output("t1")) == 21 and len(log.read("t1")) == 25
+    await asyncio.sleep(0.1)
+    assert writes == [1, 10, 10, 4], "a partial batch is written after the interval"
+    log.append("t1", "last\n")
+    log.end("t1")
+    assert writes == [1, 10, 10, 4, 1]
+    assert store.read_task_output("t1", after=24) == ["line 24\n", "last\n"]
+    assert log.read("t1", after=25) == ["last\n"]
@@ -0,0 +1,119 @@
+import os
+import subprocess
+
+import pytest
+
+from services.orchestrator.core import orchestrator as orch_mod
+from services.orchestrator.core.agents.code_writer import CodeWriterAgent
+from services.orchestrator.core.workspace import FileIndex, IndexEntry, RepoWorkspaces
+
+
+def _git(*args, cwd):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def origin(tmp_path):
+    """A bare repo with one commit, plus the clone used to push more."""
+    src = tmp_path / "src"
+    src.mkdir()
+    _git("init", "-q", "-b", "main", cwd=src)
+    _git("config", "user.email", "dsf@example.com", cwd=src)
+    _git("config", "user.name", "dsf", cwd=src)
+    (src / "pkg").mkdir()
+    (src / "pkg" / "a.py").write_text("A = 1\n")
+    (src / "pkg" / "b.py").write_text("B = 2\n")
+    (src / "README.md").write_text("hello\n")
+    _git("add", ".", cwd=src)
+    _git("commit", "-q", "-m", "init", cwd=src)
+    bare = tmp_path / "origin.git"
+    _git("clone", "-q", "--bare", str(src), str(bare), cwd=tmp_path)
+    _git("remote", "add", "origin", str(bare), cwd=src)
+    return str(bare), src
+
+
+def test_file_index_lookups(tmp_path):
+    path = str(tmp_path / "x.idx")
+    entries = [IndexEntry(f"dir{i % 3}/f{i}.py", f"{i:040x}", i) for i in range(50)]
+    FileIndex.write(path, entries)
+    index = FileIndex(path)
+    assert len(index) == 50
+    assert index.get("dir1/f7.py") == IndexEntry("dir1/f7.py", f"{7:040x}", 7)
+    assert index.get("dir1/missing.py") is None
+    assert {e.path for e in index.iter_prefix("dir2/")} == {
+        e.path for e in entries if e.path.startswith("dir2/")
+    }
+    index.close()
+
+
+def test_worktree_per_task_from_shared_mirror(tmp_path, origin):
+    url, src = origin
+    ws = RepoWorkspaces(root=str(tmp_path / "ws"), fetch_interval=3600)
+    one = ws.checkout(url, "task-1")
+    two = ws.checkout(url, "task-2")
+    assert one.commit == two.commit and one.path != two.path
+    assert one.read("pkg/a.py") == "A = 1\n"
+    assert [e.path for e in one.index.iter_prefix("pkg/")] == ["pkg/a.py", "pkg/b.py"]
+    assert one.index.get("README.md").size == len("hello\n")
+    assert one.setup_ms < 5000
+    assert len([m for m in os.listdir(tmp_path / "ws" / "mirrors") if m.endswith(".git")]) == 1
+    ws.release(url, one)
+    assert not os.path.exists(one.path)
+
+    # New upstream commits arrive through an incremental fetch of the same mirror
+    (src / "pkg" / "c.py").write_text("C = 3\n")
+    _git("add", ".", cwd=src)
+    _git("commit", "-q", "-m", "more", cwd=src)
+    _git("push", "-q", "origin", "main", cwd=src)
+    three = ws.checkout(url, "task-3", refresh=True)
+    assert three.commit != two.commit
+    assert three.index.get("pkg/c.py") is not None
+    assert os.path.exists(os.path.join(two.path, "pkg/b.py")), "older worktrees are untouched"
+
+
+def test_index_cache_keeps_recent_commits_and_token_stays_off_argv(tmp_path, origin, monkeypatch):
+    url, src = origin
+    ws = RepoWorkspaces(root=str(tmp_path / "ws"), fetch_interval=0, max_indexes=2)
+    runs = []
+    real_run = subprocess.run
+    monkeypatch.setattr(
+        subprocess,
+        "run",
+        lambda cmd, **kw: runs.append((cmd, kw.get("env"))) or real_run(cmd, **kw),
+    )
+    commits = []
+    for i in range(4):
+        (src / f"f{i}.py").write_text(f"X = {i}\n")
+        _git("add", ".", cwd=src)
+        _git("commit", "-q", "-m", f"c{i}", cwd=src)
+        _git("push", "-q", "origin", "main", cwd=src)
+        workspace = ws.checkout(url, f"task-{i}", refresh=True, token="s3cret")
+        commits.append(workspace.commit)
+        ws.release(url, workspace)
+    indexes = sorted(os.listdir(tmp_path / "ws" / "index"))
+    assert indexes == sorted(f"{c}.idx" for c in commits[-2:])
+
+    git_runs = [(cmd, env) for cmd, env in runs if cmd[0] == "git" and env]
+    assert git_runs and not any("Authorization" in " ".join(cmd) for cmd, _ in runs)
+    assert all(env["GIT_CONFIG_KEY_0"] == "http.extraHeader" for _, env in git_runs)
+
+
+@pytest.mark.asyncio
+async def test_agents_run_in_a_task_worktree(tmp_path, origin, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DSF_WORKSPACES", "true")
+    monkeypatch.setenv("DSF_GIT_URL", origin[0])
+    seen = []
+
+    original = CodeWriterAgent.run
+
+    async def run(self, task, workspace=None):
+        seen.append(workspace.index.get("pkg/a.py") is not None)
+        return await original(self, task, workspace=workspace)
+
+    monkeypatch.setattr(CodeWriterAgent, "run", run)
+    orch = orch_mod.Orchestrator()
+    feat = orch.submit_feature("Workspace", "uses repo context")
+    await orch.run_feature(feat.id)
+    assert seen and all(seen)
+    assert os.listdir(tmp_path / "artifacts" / "workspaces" / "worktrees") == []